@@ -4,16 +4,37 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 from functools import lru_cache
+from typing import Optional
 
 from dotenv import load_dotenv
 
 
 @dataclass(frozen=True)
 class Settings:
+    """
+    Настройки из окружения: TELEGRAM_*, DATABASE_PATH и NEWS_BOT_*
+    (пояснения к каждой переменной — в .env.example). Новые возможности
+    по умолчанию выключены.
+    """
+
     telegram_bot_token: str
     telegram_chat_id: str
     error_chat_id: str
     database_path: str = "news.db"
+    light_variants: bool = False
+    translation_cache_size: int = 5000
+    translation_memory_size: int = 50000
+    translator_backend: str = "google"
+    translator_rate_limit: float = 5.0
+    translator_max_failures: int = 5
+    tech_terms_file: Optional[str] = None
+    junk_filter: bool = False
+    dedup_days: int = 0
+    html_archive_path: Optional[str] = None
+    compress_content: bool = False
+    db_writer: bool = False
+    retention_days: int = 0
+    archive_dir: Optional[str] = None
 
     @classmethod
     def from_env(cls) -> "Settings":
@@ -25,12 +46,40 @@ class Settings:
 
         error_chat_id = os.getenv("TELEGRAM_ERROR_CHAT_ID", chat_id)
         db_path = os.getenv("DATABASE_PATH", "news.db")
+        light_variants = os.getenv("NEWS_BOT_LIGHT_VARIANTS", "0") == "1"
+        translation_cache_size = int(os.getenv("NEWS_BOT_TRANSLATION_CACHE_SIZE", "5000"))
+        translation_memory_size = int(os.getenv("NEWS_BOT_TRANSLATION_MEMORY_SIZE", "50000"))
+        translator_backend = os.getenv("NEWS_BOT_TRANSLATOR", "google")
+        translator_rate_limit = float(os.getenv("NEWS_BOT_TRANSLATOR_RATE_LIMIT", "5"))
+        translator_max_failures = int(os.getenv("NEWS_BOT_TRANSLATOR_MAX_FAILURES", "5"))
+        tech_terms_file = os.getenv("NEWS_BOT_TECH_TERMS_FILE") or None
+        junk_filter = os.getenv("NEWS_BOT_JUNK_FILTER", "0") == "1"
+        dedup_days = int(os.getenv("NEWS_BOT_DEDUP_DAYS", "0"))
+        html_archive_path = os.getenv("NEWS_BOT_HTML_ARCHIVE") or None
+        compress_content = os.getenv("NEWS_BOT_COMPRESS_CONTENT", "0") == "1"
+        db_writer = os.getenv("NEWS_BOT_DB_WRITER", "0") == "1"
+        retention_days = int(os.getenv("NEWS_BOT_RETENTION_DAYS", "0"))
+        archive_dir = os.getenv("NEWS_BOT_ARCHIVE_DIR") or None
 
         return cls(
             telegram_bot_token=token,
             telegram_chat_id=chat_id,
             error_chat_id=error_chat_id,
             database_path=db_path,
+            light_variants=light_variants,
+            translation_cache_size=translation_cache_size,
+            translation_memory_size=translation_memory_size,
+            translator_backend=translator_backend,
+            translator_rate_limit=translator_rate_limit,
+            translator_max_failures=translator_max_failures,
+            tech_terms_file=tech_terms_file,
+            junk_filter=junk_filter,
+            dedup_days=dedup_days,
+            html_archive_path=html_archive_path,
+            compress_content=compress_content,
+            db_writer=db_writer,
+            retention_days=retention_days,
+            archive_dir=archive_dir,
         )
 
 
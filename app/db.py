@@ -1,17 +1,296 @@
 # app/db.py
+import hashlib
+import os
 import sqlite3
+import threading
+import time
+import zlib
 from contextlib import contextmanager
-from datetime import datetime, timedelta, timezone
-from typing import Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .logging_utils import log_info, log_warning
+
+# --- соединения --- #
+
+# Сколько SQLite сам ждёт снятия блокировки, прежде чем вернуть «database is locked»
+BUSY_TIMEOUT_MS = 5000
+# Сверх этого — повторы с паузой (удваивается), каждая попытка пишется в лог
+LOCK_RETRIES = 3
+LOCK_RETRY_DELAY = 0.5
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KB = 16 * 1024
+
+_LOCKED_ERRORS = ("database is locked", "database is busy", "database table is locked")
+
+
+def _is_locked(exc: sqlite3.OperationalError) -> bool:
+    return any(text in str(exc) for text in _LOCKED_ERRORS)
+
+
+def _retry_locked(conn: "Connection", call: Callable[[], Any]) -> Any:
+    """
+    Выполняет call; если БД занята другим процессом дольше busy_timeout —
+    повторяет до LOCK_RETRIES раз и пишет в лог, сколько ждали.
+    """
+    started = time.monotonic()
+    delay = LOCK_RETRY_DELAY
+    for attempt in range(1, LOCK_RETRIES + 1):
+        try:
+            result = call()
+        except sqlite3.OperationalError as exc:
+            if not _is_locked(exc):
+                raise
+            log_warning(
+                f"БД {conn.db_path} занята ({exc}): повтор {attempt}/{LOCK_RETRIES} "
+                f"через {delay:.1f} с, ждём уже {time.monotonic() - started:.1f} с."
+            )
+            time.sleep(delay)
+            delay *= 2
+        else:
+            if attempt > 1:
+                log_info(
+                    f"БД {conn.db_path}: запрос выполнен с {attempt}-й попытки "
+                    f"за {time.monotonic() - started:.1f} с."
+                )
+            return result
+    return call()
+
+
+class Connection(sqlite3.Connection):
+    """
+    sqlite3.Connection, у которого execute/executemany/commit переживают
+    временную блокировку БД (см. _retry_locked).
+    """
+
+    db_path = ""
+    # глубина вложенных блоков get_connection на этом соединении
+    depth = 0
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return _retry_locked(self, lambda: super(Connection, self).execute(sql, parameters))
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable) -> sqlite3.Cursor:
+        # генератор нельзя перечитать — повторяем только списки/кортежи
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            return super().executemany(sql, seq_of_parameters)
+        return _retry_locked(
+            self, lambda: super(Connection, self).executemany(sql, seq_of_parameters)
+        )
+
+    def commit(self) -> None:
+        _retry_locked(self, super().commit)
+
+
+def _connect(db_path: str, readonly: bool) -> Connection:
+    if readonly:
+        uri = f"{Path(db_path).absolute().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, factory=Connection)
+    else:
+        conn = sqlite3.connect(db_path, factory=Connection)
+    conn.db_path = db_path
+
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE};")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB};")
+    if not readonly and db_path != ":memory:":
+        # auto_vacuum действует, только пока в файле нет таблиц (и до перехода в WAL):
+        # новая БД сразу INCREMENTAL, у существующей режим не меняется
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        # WAL: читатели (healthcheck, мониторинг) не ждут писателя и наоборот;
+        # при WAL synchronous=NORMAL не теряет целостность, но не делает fsync на каждый commit
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+    return conn
+
+
+class _ThreadConnections(threading.local):
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.connections: Dict[Tuple[str, bool], Connection] = {}
+
+
+_local = _ThreadConnections()
+
+
+def _cached_connections() -> Dict[Tuple[str, bool], Connection]:
+    # после fork соединения родителя использовать нельзя
+    if _local.pid != os.getpid():
+        _local.pid = os.getpid()
+        _local.connections = {}
+    return _local.connections
 
 
 @contextmanager
-def get_connection(db_path: str):
-    conn = sqlite3.connect(db_path)
+def get_connection(db_path: str, readonly: bool = False):
+    """
+    Соединение с БД, переиспользуемое в пределах потока (и процесса):
+    WAL, synchronous=NORMAL, mmap, busy_timeout — один раз при открытии.
+    readonly=True — соединение только для чтения (healthcheck, мониторинг);
+    файл БД при этом не создаётся.
+    Незакоммиченная транзакция откатывается по выходу из внешнего блока, как
+    при закрытии; вложенный блок (функция db, вызванная внутри чужого блока)
+    транзакцию вызывающего не трогает.
+    ":memory:" не кэшируется — каждый раз новая пустая БД.
+    """
+    if db_path == ":memory:":
+        conn = _connect(db_path, readonly=False)
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    connections = _cached_connections()
+    key = (db_path, readonly)
+    conn = connections.get(key)
+    if conn is None:
+        conn = connections[key] = _connect(db_path, readonly)
+    conn.depth += 1
     try:
         yield conn
     finally:
+        conn.depth -= 1
+        if conn.depth == 0 and conn.in_transaction:
+            conn.rollback()
+
+
+def close_connections() -> None:
+    """
+    Закрывает соединения текущего потока (перед VACUUM/замером размера файла, в тестах).
+    """
+    connections = _cached_connections()
+    for conn in connections.values():
         conn.close()
+    connections.clear()
+
+
+def checkpoint_and_close(db_path: str) -> None:
+    """
+    При остановке: переносит WAL в основной файл (wal_checkpoint(TRUNCATE)) и
+    закрывает соединения потока, чтобы на диске остался один самодостаточный news.db.
+    """
+    if db_path != ":memory:" and os.path.exists(db_path):
+        with get_connection(db_path) as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    close_connections()
+
+
+# --- сжатие content --- #
+
+CONTENT_COMPRESS_LEVEL = 6
+
+
+def pack_content(content: Optional[str], compress: bool) -> Union[str, bytes, None]:
+    """
+    content сжимается zlib и хранится как BLOB в той же колонке;
+    title/summary остаются текстом — по ним можно искать и сортировать.
+    """
+    if not compress or content is None:
+        return content
+    return zlib.compress(content.encode("utf-8"), CONTENT_COMPRESS_LEVEL)
+
+
+def unpack_content(value: Union[str, bytes, None]) -> Optional[str]:
+    """
+    Старые строки — TEXT, новые (со сжатием) — BLOB; читаем оба вида.
+    """
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+class NewsRecord:
+    """
+    Строка таблицы news. Поля доступны по имени (record.url), а для старого кода —
+    по индексу и распаковкой, как кортеж. content распаковывается только при
+    первом обращении к нему.
+    """
+
+    __slots__ = ("_fields", "_values")
+
+    def __init__(self, fields: Sequence[str], values: Sequence[Any]):
+        self._fields = tuple(fields)
+        self._values = list(values)
+
+    def _value(self, index: int) -> Any:
+        value = self._values[index]
+        if isinstance(value, bytes) and self._fields[index] == "content":
+            value = self._values[index] = unpack_content(value)
+        return value
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            index = self._fields.index(name)
+        except ValueError:
+            raise AttributeError(name) from None
+        return self._value(index)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        return self._value(range(len(self._values))[index])
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self):
+        return (self._value(i) for i in range(len(self._values)))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, NewsRecord):
+            other = tuple(other)
+        return tuple(self) == other
+
+    def __hash__(self) -> int:
+        # равна кортежу — значит, и хэш как у кортежа (set, ключи dict)
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={self._values[i]!r:.40}" for i, name in enumerate(self._fields))
+        return f"NewsRecord({fields})"
+
+
+def _records(cur: sqlite3.Cursor) -> List[NewsRecord]:
+    fields = tuple(column[0] for column in cur.description)
+    return [NewsRecord(fields, row) for row in cur.fetchall()]
+
+
+# Колонки news, которые можно запрашивать у функций чтения (columns=...)
+NEWS_COLUMNS = (
+    "id",
+    "url",
+    "title",
+    "summary",
+    "content",
+    "source",
+    "score",
+    "fetched_at",
+    "published_at",
+    "fetched_ts",
+    "published_ts",
+)
+# Наборы колонок по умолчанию — как раньше, для старых вызовов
+LAST_NEWS_COLUMNS = ("url", "title", "summary", "content", "source", "score", "fetched_at")
+NEWS_BY_URLS_COLUMNS = ("url", "title", "summary", "content", "source", "score")
+
+
+def _select_list(columns: Sequence[str]) -> str:
+    """
+    Список колонок для SELECT. Имена проверяются по NEWS_COLUMNS —
+    в запрос попадают только они.
+    """
+    unknown = [name for name in columns if name not in NEWS_COLUMNS]
+    if not columns or unknown:
+        raise ValueError(f"Неизвестные колонки news: {unknown or '(пусто)'}")
+    return ", ".join(columns)
+
+
+def _since_ts(days_back: float) -> int:
+    """Начало окна «последние days_back дней» в секундах Unix."""
+    return int(time.time() - days_back * 86400)
 
 
 def _table_exists(conn: sqlite3.Connection, table_name: str) -> bool:
@@ -33,7 +312,8 @@ def _create_news_table(conn: sqlite3.Connection) -> None:
             content TEXT,
             source TEXT,
             score REAL,
-            fetched_at TEXT
+            fetched_at TEXT,
+            published_at TEXT
         );
         """
     )
@@ -51,6 +331,7 @@ def _migrate_news_table(conn):
         "source": "TEXT",
         "score": "REAL",
         "fetched_at": "TEXT",
+        "published_at": "TEXT",
     }
 
     for col_name, col_def in needed_columns.items():
@@ -58,21 +339,356 @@ def _migrate_news_table(conn):
             conn.execute(f"ALTER TABLE news ADD COLUMN {col_name} {col_def};")
 
 
-def init_db(db_path: str) -> None:
+def _create_page_variants_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS page_variants (
+            host TEXT PRIMARY KEY,
+            template TEXT NOT NULL,
+            ratio REAL NOT NULL,
+            learned_at TEXT
+        );
+        """
+    )
+
+
+# translation_cache — переводы целых текстов,
+# translation_memory — переводы отдельных предложений/строк
+TRANSLATION_TABLES = ("translation_cache", "translation_memory")
+
+
+def _create_translation_tables(conn: sqlite3.Connection) -> None:
+    for table in TRANSLATION_TABLES:
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                text_hash TEXT NOT NULL,
+                target TEXT NOT NULL,
+                translated TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (text_hash, target)
+            );
+            """
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_used ON {table} (last_used);")
+
+
+# число полос SimHash (по 16 бит из 64) — см. app/dedup.py
+SIMHASH_BANDS = 4
+
+
+def _create_simhash_table(conn: sqlite3.Connection) -> None:
+    """
+    Отпечатки SimHash статей для поиска почти-дубликатов.
+    Кандидаты ищутся по совпадению любой из полос через индексы, а не перебором.
+    duplicate_of — URL статьи, дубликатом которой признана эта (сама в news не пишется).
+    """
+    band_columns = ",\n".join(f"band{i} INTEGER NOT NULL" for i in range(SIMHASH_BANDS))
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS news_simhash (
+            url TEXT PRIMARY KEY,
+            simhash INTEGER NOT NULL,
+            {band_columns},
+            fetched_at TEXT NOT NULL,
+            duplicate_of TEXT
+        );
+        """
+    )
+    for i in range(SIMHASH_BANDS):
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_news_simhash_band{i} "
+            f"ON news_simhash (band{i}, fetched_at);"
+        )
+
+
+def _migration_base_schema(conn: sqlite3.Connection) -> None:
+    """
+    news (или недостающие колонки в старой news) и служебные таблицы.
+    """
+    if not _table_exists(conn, "news"):
+        _create_news_table(conn)
+    else:
+        _migrate_news_table(conn)
+    _create_page_variants_table(conn)
+    _create_translation_tables(conn)
+    _create_simhash_table(conn)
+
+
+def _migrate_news_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Индексы news.
+    Сначала убираем дубликаты url (оставляем самую раннюю запись), иначе
+    уникальный индекс не создастся; после него INSERT OR IGNORE в save_news
+    действительно игнорирует повторы, а поиск по url идёт по индексу.
+    (fetched_at, score) — диапазон по дате для дайджеста и мониторинга
+    отвечается по индексу, без чтения строк таблицы.
+    """
+    conn.execute(
+        """
+        DELETE FROM news
+        WHERE url IS NOT NULL
+          AND id NOT IN (SELECT MIN(id) FROM news WHERE url IS NOT NULL GROUP BY url);
+        """
+    )
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_news_url ON news (url);")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_news_fetched_at_score ON news (fetched_at, score);"
+    )
+
+
+def _migration_v1(conn: sqlite3.Connection) -> None:
+    _migration_base_schema(conn)
+    _migrate_news_indexes(conn)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _epoch_expression(column: str) -> str:
+    """
+    ISO-8601 → секунды Unix средствами SQLite: «Z», смещение и микросекунды
+    понимает, дата без времени — полночь, время без зоны — UTC, мусор — NULL.
+    """
+    return f"CAST(strftime('%s', {column}) AS INTEGER)"
+
+
+def _migration_v2_epoch(conn: sqlite3.Connection) -> None:
+    """
+    Целочисленные fetched_ts/published_ts рядом с ISO-строками.
+    Это вычисляемые (VIRTUAL) колонки: значения берутся из fetched_at/published_at
+    и не могут с ними разойтись, писателям ничего менять не нужно. Заполнение
+    истории — построение индексов, в них значения хранятся. Окна по датам,
+    хранение и мониторинг сравнивают целые числа, а не строки с разными зонами.
+    """
+    for table, columns in (
+        ("news", ("fetched_at", "published_at")),
+        ("news_simhash", ("fetched_at",)),
+    ):
+        # table_xinfo, а не table_info: вычисляемые колонки видны только в нём
+        existing_columns = {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table});")}
+        for column in columns:
+            epoch_column = column.replace("_at", "_ts")
+            if epoch_column in existing_columns:
+                continue
+            conn.execute(
+                f"ALTER TABLE {table} ADD COLUMN {epoch_column} INTEGER "
+                f"GENERATED ALWAYS AS ({_epoch_expression(column)}) VIRTUAL;"
+            )
+
+    conn.execute("DROP INDEX IF EXISTS idx_news_fetched_at_score;")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_news_fetched_ts_score ON news (fetched_ts, score);"
+    )
+    for i in range(SIMHASH_BANDS):
+        conn.execute(f"DROP INDEX IF EXISTS idx_news_simhash_band{i};")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_news_simhash_band{i}_ts "
+            f"ON news_simhash (band{i}, fetched_ts);"
+        )
+
+
+
+# --- полнотекстовый индекс --- #
+
+# Веса bm25 по колонкам news_fts: совпадение в заголовке важнее, чем в тексте
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+FTS_BATCH_SIZE = 500
+
+
+def _create_news_fts(conn: sqlite3.Connection) -> None:
+    """
+    FTS5 по title/summary/content. Таблица без собственного содержимого
+    (content=''): content в news хранится сжатым, и триггеры не могут передать
+    индексу текст, а копия текста в индексе съела бы выигрыш от сжатия.
+    Поэтому индекс пополняют функции записи (insert/update_news_rows),
+    rowid = news.id, а сниппеты строятся по распакованному content.
+    """
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+            title, summary, content,
+            content = '',
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+        """
+    )
+
+
+def _fts_insert(conn: sqlite3.Connection, rows: Iterable[Tuple[int, Any, Any, Any]]) -> None:
+    """(id, title, summary, content) — content распакованный."""
+    conn.executemany(
+        "INSERT INTO news_fts (rowid, title, summary, content) VALUES (?, ?, ?, ?);",
+        rows,
+    )
+
+
+def _fts_delete(conn: sqlite3.Connection, rows: Iterable[Tuple[int, Any, Any, Any]]) -> None:
+    """
+    Убирает строки из индекса. Таблице без содержимого нужны те же значения,
+    что были проиндексированы, — вызывать до изменения строки в news.
+    """
+    conn.executemany(
+        """
+        INSERT INTO news_fts (news_fts, rowid, title, summary, content)
+        VALUES ('delete', ?, ?, ?, ?);
+        """,
+        rows,
+    )
+
+
+def _fill_news_fts(conn: sqlite3.Connection, batch_size: int = FTS_BATCH_SIZE) -> int:
+    """
+    Индексирует все строки news пачками по id (без commit). Возвращает число строк.
+    """
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, title, summary, content FROM news
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?;
+            """,
+            (last_id, batch_size),
+        ).fetchall()
+        if not rows:
+            return indexed
+        _fts_insert(
+            conn,
+            [
+                (row_id, title, summary, unpack_content(content))
+                for row_id, title, summary, content in rows
+            ],
+        )
+        indexed += len(rows)
+        last_id = rows[-1][0]
+
+
+def _migration_v3_fts(conn: sqlite3.Connection) -> None:
+    _create_news_fts(conn)
+    _fill_news_fts(conn)
+
+
+def _migration_v4_archived(conn: sqlite3.Connection) -> None:
+    """
+    news_archived — что осталось в рабочей БД от строк, перенесённых в годовые
+    архивы (archive_old_news): url для link_exists и хэш текста.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS news_archived (
+            url TEXT PRIMARY KEY,
+            content_hash TEXT,
+            fetched_ts INTEGER,
+            year INTEGER
+        ) WITHOUT ROWID;
+        """
+    )
+
+
+def _migration_v5_page_variants(conn: sqlite3.Connection) -> None:
+    """
+    Шаблоны лёгких версий старого вида ("{url}/amp", query первой статьи внутри
+    шаблона) давали чужие страницы — забываем их, хосты выучатся заново.
+    """
+    conn.execute("DELETE FROM page_variants;")
+
+
+# Миграции схемы по порядку; номер последней применённой — в PRAGMA user_version.
+# Новые миграции — только в конец списка, уже выпущенные не менять.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "таблицы и индексы news", _migration_v1),
+    Migration(2, "fetched_ts/published_ts и индексы по ним", _migration_v2_epoch),
+    Migration(3, "полнотекстовый индекс news_fts", _migration_v3_fts),
+    Migration(4, "таблица news_archived", _migration_v4_archived),
+    Migration(5, "сброс шаблонов лёгких версий страниц", _migration_v5_page_variants),
+]
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def migrate(db_path: str, dry_run: bool = False) -> List[Migration]:
+    """
+    Применяет недостающие миграции, каждую — своей транзакцией вместе с
+    обновлением user_version. Если схема актуальна, это одно чтение PRAGMA.
+    dry_run=True — только возвращает (и пишет в лог), что было бы применено.
+    Возвращает список применённых (или ожидающих) миграций.
+    """
     with get_connection(db_path) as conn:
-        if not _table_exists(conn, "news"):
-            _create_news_table(conn)
-        else:
-            _migrate_news_table(conn)
-        conn.commit()
+        (version,) = conn.execute("PRAGMA user_version;").fetchone()
+        if version >= SCHEMA_VERSION:
+            if version > SCHEMA_VERSION:
+                log_warning(
+                    f"БД {db_path}: версия схемы {version} новее известной коду "
+                    f"({SCHEMA_VERSION})."
+                )
+            return []
+
+        pending = [m for m in MIGRATIONS if m.version > version]
+        if dry_run:
+            for migration in pending:
+                log_info(f"Миграция БД {migration.version} ({migration.name}) будет применена.")
+            return pending
+
+        applied = []
+        for migration in pending:
+            started = time.monotonic()
+            conn.execute("BEGIN IMMEDIATE;")
+            # другой процесс мог применить её, пока мы ждали блокировку
+            (current,) = conn.execute("PRAGMA user_version;").fetchone()
+            if current >= migration.version:
+                conn.rollback()
+                continue
+            migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {migration.version};")
+            conn.commit()
+            applied.append(migration)
+            log_info(
+                f"Миграция БД {migration.version} ({migration.name}): "
+                f"{time.monotonic() - started:.2f} с."
+            )
+        return applied
+
+
+def init_db(db_path: str) -> None:
+    migrate(db_path)
 
 
 def link_exists(db_path: str, url: str) -> bool:
+    """
+    Ссылка уже обработана: сохранена как новость (в том числе перенесённая в архив)
+    или отброшена как почти-дубликат.
+    """
     with get_connection(db_path) as conn:
-        cur = conn.execute("SELECT 1 FROM news WHERE url = ? LIMIT 1", (url,))
+        cur = conn.execute(
+            """
+            SELECT 1 FROM news WHERE url = ?
+            UNION ALL
+            SELECT 1 FROM news_archived WHERE url = ?
+            UNION ALL
+            SELECT 1 FROM news_simhash WHERE url = ? AND duplicate_of IS NOT NULL
+            LIMIT 1;
+            """,
+            (url, url, url),
+        )
         return cur.fetchone() is not None
 
 
+# (url, title, summary, content, source, score, published_at);
+# content None — тело статьи не скачивали (сохранены только метаданные <head>)
+NewsRow = Tuple[
+    str, Optional[str], Optional[str], Optional[str], Optional[str], Optional[float],
+    Optional[str],
+]
+# (url, title, summary, content, score, published_at)
+NewsUpdateRow = Tuple[str, Optional[str], Optional[str], str, float, Optional[str]]
+
+
 def save_news(
     db_path: str,
     url: str,
@@ -81,17 +697,96 @@ def save_news(
     content: str,
     source: Optional[str],
     score: Optional[float],
+    published_at: Optional[str] = None,
+    compress: bool = False,
 ) -> None:
-    fetched_at = datetime.now(timezone.utc).isoformat()
+    save_news_many(
+        db_path, [(url, title, summary, content, source, score, published_at)], compress
+    )
+
+
+def save_news_many(
+    db_path: str,
+    rows: Iterable[NewsRow],
+    compress: bool = False,
+) -> List[str]:
+    """
+    Сохраняет пачку новостей одной транзакцией (один fsync на пачку):
+    (url, title, summary, content, source, score, published_at).
+    Как и раньше, INSERT OR IGNORE: уже сохранённые url пропускаются.
+    Возвращает url, которые действительно добавлены, — в порядке rows.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+
     with get_connection(db_path) as conn:
-        conn.execute(
-            """
-            INSERT OR IGNORE INTO news (url, title, summary, content, source, score, fetched_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?);
+        # IMMEDIATE: между проверкой и вставкой никто другой url не добавит
+        conn.execute("BEGIN IMMEDIATE;")
+        inserted = insert_news_rows(conn, rows, compress)
+        conn.commit()
+    return inserted
+
+
+def insert_news_rows(
+    conn: sqlite3.Connection,
+    rows: Sequence[NewsRow],
+    compress: bool = False,
+) -> List[str]:
+    """
+    Тело save_news_many внутри уже открытой транзакции (её фиксирует вызывающий).
+    """
+    fetched_at = datetime.now(timezone.utc).isoformat()
+    urls = list(dict.fromkeys(row[0] for row in rows))
+    placeholders = ",".join("?" for _ in urls)
+    existing = {
+        url
+        for (url,) in conn.execute(
+            f"""
+            SELECT url FROM news WHERE url IN ({placeholders})
+            UNION
+            SELECT url FROM news_archived WHERE url IN ({placeholders});
             """,
-            (url, title, summary, content, source, score, fetched_at),
+            urls * 2,
         )
-        conn.commit()
+    }
+    # ушедшие в архив url тоже не сохраняем повторно
+    rows = [row for row in rows if row[0] not in existing]
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO news
+            (url, title, summary, content, source, score, fetched_at, published_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+        """,
+        [
+            (
+                url,
+                title,
+                summary,
+                pack_content(content, compress),
+                source,
+                score,
+                fetched_at,
+                published_at,
+            )
+            for url, title, summary, content, source, score, published_at in rows
+        ],
+    )
+    inserted = [url for url in urls if url not in existing]
+    if inserted:
+        # в индекс — несжатый текст той строки, что попала в news (первой с этим url)
+        first: Dict[str, NewsRow] = {}
+        for row in rows:
+            first.setdefault(row[0], row)
+        placeholders = ",".join("?" for _ in inserted)
+        ids = dict(
+            conn.execute(f"SELECT url, id FROM news WHERE url IN ({placeholders});", inserted)
+        )
+        _fts_insert(
+            conn,
+            [(ids[url], first[url][1], first[url][2], first[url][3]) for url in inserted],
+        )
+    return inserted
 
 
 def update_score(db_path: str, url: str, score: float) -> None:
@@ -103,59 +798,675 @@ def update_score(db_path: str, url: str, score: float) -> None:
         conn.commit()
 
 
-def get_last_news(db_path: str, limit: int = 5):
-    with get_connection(db_path) as conn:
+def get_last_news(
+    db_path: str,
+    limit: int = 5,
+    columns: Sequence[str] = LAST_NEWS_COLUMNS,
+    readonly: bool = False,
+) -> List[NewsRecord]:
+    """
+    Последние сохранённые новости. columns — какие колонки читать:
+    мониторингу, например, нужен только fetched_at, без content.
+    """
+    with get_connection(db_path, readonly=readonly) as conn:
         cur = conn.execute(
-            """
-            SELECT url, title, summary, content, source, score, fetched_at
+            f"""
+            SELECT {_select_list(columns)}
             FROM news
             ORDER BY id DESC
             LIMIT ?;
             """,
             (limit,),
         )
-        return cur.fetchall()
+        return _records(cur)
+
+
+# До стольких url get_news_by_urls ищет запросами IN пачками, больше — через временную таблицу.
+# Пачка меньше лимита переменных SQLite (32766, в старых сборках 999).
+URLS_CHUNK_SIZE = 512
+URLS_TEMP_TABLE_THRESHOLD = 4096
 
 
 def get_news_by_urls(
-    db_path: str, urls: Iterable[str]
-) -> List[Tuple[str, str, str, str, Optional[str], Optional[float]]]:
-    urls = list(urls)
+    db_path: str, urls: Iterable[str], columns: Sequence[str] = NEWS_BY_URLS_COLUMNS
+) -> List[NewsRecord]:
+    """
+    Новости по списку url — в порядке urls (повторы и отсутствующие url пропускаются).
+    Пачка IN добивается NULL до степени двойки: разных текстов запроса
+    получается несколько, и подготовленные запросы берутся из кэша соединения,
+    а не компилируются заново для каждой длины списка.
+    """
+    urls = list(dict.fromkeys(urls))
     if not urls:
         return []
+    select_list = _select_list(columns)
 
-    placeholders = ",".join("?" for _ in urls)
-    query = f"""
-        SELECT url, title, summary, content, source, score
-        FROM news
-        WHERE url IN ({placeholders});
+    with get_connection(db_path) as conn:
+        if len(urls) > URLS_TEMP_TABLE_THRESHOLD:
+            return _news_by_urls_temp_table(conn, urls, columns)
+
+        found: Dict[str, NewsRecord] = {}
+        for start in range(0, len(urls), URLS_CHUNK_SIZE):
+            chunk = urls[start : start + URLS_CHUNK_SIZE]
+            size = 1 << (len(chunk) - 1).bit_length()
+            placeholders = ",".join("?" * size)
+            cur = conn.execute(
+                f"SELECT url, {select_list} FROM news WHERE url IN ({placeholders});",
+                chunk + [None] * (size - len(chunk)),
+            )
+            fields = tuple(column[0] for column in cur.description[1:])
+            for row in cur.fetchall():
+                found[row[0]] = NewsRecord(fields, row[1:])
+    return [found[url] for url in urls if url in found]
+
+
+def _news_by_urls_temp_table(
+    conn: sqlite3.Connection, urls: Sequence[str], columns: Sequence[str]
+) -> List[NewsRecord]:
+    """
+    Большой список url: во временную таблицу с позицией и JOIN по индексу url —
+    один запрос, порядок задаёт ORDER BY pos. Транзакцию вызывающего
+    (если она открыта) не коммитит: временная таблица очищается в ней же.
+    """
+    own_transaction = not conn.in_transaction
+    conn.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS lookup_urls (pos INTEGER PRIMARY KEY, url TEXT);"
+    )
+    conn.executemany("INSERT INTO temp.lookup_urls (pos, url) VALUES (?, ?);", enumerate(urls))
+    try:
+        cur = conn.execute(
+            f"""
+            SELECT {", ".join(f"n.{name}" for name in columns)}
+            FROM temp.lookup_urls AS l JOIN news AS n ON n.url = l.url
+            ORDER BY l.pos;
+            """
+        )
+        return _records(cur)
+    finally:
+        conn.execute("DELETE FROM temp.lookup_urls;")
+        if own_transaction:
+            conn.commit()
+
+
+def get_news_after_id(
+    db_path: str,
+    after_id: int,
+    limit: int,
+    columns: Sequence[str],
+) -> List[NewsRecord]:
+    """
+    Следующая пачка новостей с id > after_id по возрастанию id — чтение всей
+    таблицы по кускам (keyset) без OFFSET. Соединение только для чтения.
+    """
+    with get_connection(db_path, readonly=True) as conn:
+        cur = conn.execute(
+            f"""
+            SELECT {_select_list(columns)}
+            FROM news
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?;
+            """,
+            (after_id, limit),
+        )
+        return _records(cur)
+
+
+def get_news_urls(db_path: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Все сохранённые URL с fetched_at — в порядке добавления.
+    """
+    with get_connection(db_path) as conn:
+        return conn.execute("SELECT url, fetched_at FROM news ORDER BY id;").fetchall()
+
+
+def update_news_content(
+    db_path: str,
+    rows: Iterable[NewsUpdateRow],
+    compress: bool = False,
+) -> None:
+    """
+    Перезаписывает разобранные поля одной транзакцией:
+    (url, title, summary, content, score, published_at).
+    """
+    with get_connection(db_path) as conn:
+        update_news_rows(conn, rows, compress)
+        conn.commit()
+
+
+def update_news_rows(
+    conn: sqlite3.Connection,
+    rows: Iterable[NewsUpdateRow],
+    compress: bool = False,
+) -> None:
+    """
+    Тело update_news_content на переданном соединении, без commit.
+    Полнотекстовый индекс обновляется тут же: старые значения — из индекса, новые — в него.
+    """
+    latest = {row[0]: row for row in rows}  # для повторного url действует последняя строка
+    if not latest:
+        return
+    placeholders = ",".join("?" for _ in latest)
+    old_rows = conn.execute(
+        f"SELECT id, url, title, summary, content FROM news WHERE url IN ({placeholders});",
+        list(latest),
+    ).fetchall()
+    _fts_delete(
+        conn,
+        [
+            (row_id, title, summary, unpack_content(content))
+            for row_id, _, title, summary, content in old_rows
+        ],
+    )
+    conn.executemany(
+        """
+        UPDATE news
+        SET title = ?, summary = ?, content = ?, score = ?,
+            published_at = COALESCE(?, published_at)
+        WHERE url = ?;
+        """,
+        [
+            (title, summary, pack_content(content, compress), score, published_at, url)
+            for url, title, summary, content, score, published_at in latest.values()
+        ],
+    )
+    _fts_insert(
+        conn,
+        [
+            (row_id, latest[url][1], latest[url][2], latest[url][3])
+            for row_id, url, *_ in old_rows
+        ],
+    )
+
+
+def compress_news_content(db_path: str, batch_size: int = 500) -> int:
+    """
+    Миграция: сжимает content у строк, где он ещё хранится текстом.
+    Идёт пачками по id, каждая пачка — своя транзакция. Возвращает число строк.
+    Место в файле освобождается после VACUUM.
+    """
+    compressed = 0
+    last_id = 0
+    with get_connection(db_path) as conn:
+        while True:
+            rows = conn.execute(
+                """
+                SELECT id, content FROM news
+                WHERE id > ? AND typeof(content) = 'text'
+                ORDER BY id
+                LIMIT ?;
+                """,
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return compressed
+
+            conn.executemany(
+                "UPDATE news SET content = ? WHERE id = ?;",
+                [(pack_content(content, True), row_id) for row_id, content in rows],
+            )
+            conn.commit()
+            compressed += len(rows)
+            last_id = rows[-1][0]
+
+
+def vacuum(db_path: str) -> None:
+    with get_connection(db_path) as conn:
+        conn.execute("VACUUM;")
+        # в режиме WAL новые страницы сначала в -wal; переносим и обрезаем его
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+
+
+# --- хранение: годовые архивы и обслуживание файла --- #
+
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVE_FILE_PATTERN = "news_{year}.db"
+# Колонки, которые переносятся в архив (id — тот же, что был в рабочей БД)
+ARCHIVE_COLUMNS = (
+    "id",
+    "url",
+    "title",
+    "summary",
+    "content",
+    "source",
+    "score",
+    "fetched_at",
+    "published_at",
+)
+
+
+def archive_path(archive_dir: str, year: int) -> str:
+    return os.path.join(archive_dir, ARCHIVE_FILE_PATTERN.format(year=year))
+
+
+def _create_archive_table(conn: sqlite3.Connection, schema: str) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.news (
+            id INTEGER PRIMARY KEY,
+            url TEXT UNIQUE,
+            title TEXT,
+            summary TEXT,
+            content,
+            source TEXT,
+            score REAL,
+            fetched_at TEXT,
+            published_at TEXT,
+            fetched_ts INTEGER GENERATED ALWAYS AS ({_epoch_expression("fetched_at")}) VIRTUAL
+        );
+        """
+    )
+
+
+def _content_hash(content: Optional[str]) -> Optional[str]:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest() if content is not None else None
+
+
+def archive_old_news(
+    db_path: str,
+    days: int,
+    archive_dir: str,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> Dict[int, int]:
+    """
+    Переносит новости старше days дней (по fetched_ts) в годовые архивы
+    archive_dir/news_<год>.db. В рабочей БД от них остаются url и хэш текста
+    в news_archived — link_exists по-прежнему их видит. Возвращает {год: строк}.
+
+    Пачка переносится в два шага: сначала копия коммитится в архив, потом
+    строки удаляются из рабочей БД. В WAL коммит через ATTACH не атомарен
+    между файлами, а так сбой между шагами оставит лишь копию, которую
+    следующий запуск перезапишет (INSERT OR IGNORE), — строки не теряются.
+    """
+    cutoff = _since_ts(days)
+    columns = ", ".join(ARCHIVE_COLUMNS)
+    moved: Dict[int, int] = {}
+    os.makedirs(archive_dir, exist_ok=True)
+
+    with get_connection(db_path) as conn:
+        while True:
+            rows = conn.execute(
+                """
+                SELECT id, url, title, summary, content, fetched_ts,
+                       CAST(strftime('%Y', fetched_ts, 'unixepoch') AS INTEGER)
+                FROM news
+                WHERE fetched_ts < ?
+                ORDER BY fetched_ts
+                LIMIT ?;
+                """,
+                (cutoff, batch_size),
+            ).fetchall()
+            if not rows:
+                return moved
+
+            by_year: Dict[int, List[Tuple]] = {}
+            for row in rows:
+                by_year.setdefault(row[-1], []).append(row)
+
+            for year, year_rows in by_year.items():
+                ids = [row[0] for row in year_rows]
+                placeholders = ",".join("?" for _ in ids)
+
+                conn.execute("ATTACH DATABASE ? AS archive;", (archive_path(archive_dir, year),))
+                try:
+                    _create_archive_table(conn, "archive")
+                    conn.execute(
+                        f"""
+                        INSERT OR IGNORE INTO archive.news ({columns})
+                        SELECT {columns} FROM main.news WHERE id IN ({placeholders});
+                        """,
+                        ids,
+                    )
+                    conn.commit()
+                finally:
+                    conn.execute("DETACH DATABASE archive;")
+
+                texts = {row[0]: unpack_content(row[4]) for row in year_rows}
+                conn.execute("BEGIN IMMEDIATE;")
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO news_archived (url, content_hash, fetched_ts, year)
+                    VALUES (?, ?, ?, ?);
+                    """,
+                    [
+                        (url, _content_hash(texts[row_id]), fetched_ts, year)
+                        for row_id, url, _, _, _, fetched_ts, _ in year_rows
+                        if url is not None
+                    ],
+                )
+                _fts_delete(
+                    conn,
+                    [
+                        (row_id, title, summary, texts[row_id])
+                        for row_id, _, title, summary, *_ in year_rows
+                    ],
+                )
+                conn.execute(f"DELETE FROM news WHERE id IN ({placeholders});", ids)
+                conn.commit()
+                moved[year] = moved.get(year, 0) + len(ids)
+
+
+@contextmanager
+def attach_archives(conn: sqlite3.Connection, archive_dir: str):
     """
+    Подключает к соединению все годовые архивы как archive_<год> —
+    для запросов по истории: SELECT ... FROM archive_2024.news.
+    Отдаёт имена схем; по выходу отключает подключённые здесь (ATTACH живёт
+    столько же, сколько соединение, а соединения из get_connection кэшируются).
+    Уже подключённые схемы не трогает.
+    """
+    attached = {row[1] for row in conn.execute("PRAGMA database_list;")}
+    schemas, added = [], []
+    try:
+        for path in sorted(Path(archive_dir).glob(ARCHIVE_FILE_PATTERN.format(year="*"))):
+            year = path.stem.rsplit("_", 1)[-1]
+            if not year.isdigit():
+                continue
+            schema = f"archive_{year}"
+            if schema not in attached:
+                conn.execute(f"ATTACH DATABASE ? AS {schema};", (str(path),))
+                added.append(schema)
+            schemas.append(schema)
+        yield schemas
+    finally:
+        for schema in reversed(added):
+            conn.execute(f"DETACH DATABASE {schema};")
+
 
+def optimize_db(db_path: str, convert: bool = False) -> Dict[str, int]:
+    """
+    Обслуживание рабочей БД: возвращает свободные страницы файлу
+    (incremental_vacuum) и обновляет статистику планировщика (ANALYZE).
+    Только для БД в режиме auto_vacuum=INCREMENTAL (новые создаются в нём), иначе
+    ничего не делает. Перевести старую БД в этот режим — полный VACUUM под
+    блокировкой всей БД, поэтому только явно: convert=True
+    (python -m app.db_tools auto-vacuum).
+    Возвращает {"freed_pages": ..., "full_vacuum": 0/1, "skipped": 0/1}.
+    """
     with get_connection(db_path) as conn:
-        cur = conn.execute(query, urls)
-        return [(r[0], r[1], r[2], r[3], r[4], r[5]) for r in cur.fetchall()]
+        (mode,) = conn.execute("PRAGMA auto_vacuum;").fetchone()
+        full_vacuum = mode != 2  # 2 — INCREMENTAL
+        if full_vacuum and not convert:
+            return {"freed_pages": 0, "full_vacuum": 0, "skipped": 1}
+
+        (free_before,) = conn.execute("PRAGMA freelist_count;").fetchone()
+        if full_vacuum:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+            conn.execute("VACUUM;")
+        else:
+            # execute() делает один шаг — а это одна страница; executescript — до конца
+            conn.executescript("PRAGMA incremental_vacuum;")
+        # приблизительная статистика по выборке строк: ANALYZE не читает всю таблицу
+        conn.execute("PRAGMA analysis_limit = 1000;")
+        conn.execute("ANALYZE;")
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        (free_after,) = conn.execute("PRAGMA freelist_count;").fetchone()
+    return {
+        "freed_pages": free_before - free_after,
+        "full_vacuum": int(full_vacuum),
+        "skipped": 0,
+    }
 
 
 def get_top_news_for_period(
     db_path: str,
     days_back: int = 7,
     limit: int = 8,
-):
+    columns: Sequence[str] = LAST_NEWS_COLUMNS,
+) -> List[NewsRecord]:
     """
     Возвращает топ-новости за последние days_back дней по score.
     Используется для воскресного дайджеста.
     """
-    since = (datetime.now(timezone.utc) - timedelta(days=days_back)).isoformat()
+    since = _since_ts(days_back)
 
     with get_connection(db_path) as conn:
         cur = conn.execute(
-            """
-            SELECT url, title, summary, content, source, score, fetched_at
+            f"""
+            SELECT {_select_list(columns)}
             FROM news
-            WHERE fetched_at >= ?
-            ORDER BY score DESC, fetched_at DESC
+            WHERE fetched_ts >= ?
+            ORDER BY score DESC, fetched_ts DESC
             LIMIT ?;
             """,
             (since, limit),
         )
-        return cur.fetchall()
+        return _records(cur)
+
+
+def rebuild_news_fts(db_path: str, batch_size: int = FTS_BATCH_SIZE) -> int:
+    """
+    Пересобирает полнотекстовый индекс с нуля одной транзакцией — например,
+    если строки news меняли в обход функций записи. Возвращает число строк.
+    """
+    with get_connection(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE;")
+        conn.execute("INSERT INTO news_fts (news_fts) VALUES ('delete-all');")
+        indexed = _fill_news_fts(conn, batch_size)
+        conn.commit()
+        # слить сегменты индекса в один — поиск быстрее
+        conn.execute("INSERT INTO news_fts (news_fts) VALUES ('optimize');")
+        conn.commit()
+    return indexed
+
+
+SEARCH_COLUMNS = ("url", "title", "summary", "content", "source", "fetched_at")
+
+
+def search_news(
+    db_path: str,
+    query: str,
+    limit: int = 20,
+    since_ts: Optional[int] = None,
+    until_ts: Optional[int] = None,
+) -> List[NewsRecord]:
+    """
+    Полнотекстовый поиск: query — выражение FTS5 (слова, "фразы", префикс*,
+    AND/OR/NOT). since_ts/until_ts — окно по fetched_ts, [since, until).
+    Результаты — по убыванию релевантности (bm25 с весами FTS_WEIGHTS);
+    в записи есть поле rank — чем меньше, тем релевантнее.
+    """
+    conditions = ["news_fts MATCH ?"]
+    params: List[Any] = [query]
+    if since_ts is not None:
+        conditions.append("n.fetched_ts >= ?")
+        params.append(since_ts)
+    if until_ts is not None:
+        conditions.append("n.fetched_ts < ?")
+        params.append(until_ts)
+    params.append(limit)
+
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    columns = ", ".join(f"n.{name}" for name in SEARCH_COLUMNS)
+    with get_connection(db_path) as conn:
+        cur = conn.execute(
+            f"""
+            SELECT {columns}, bm25(news_fts, {weights}) AS rank
+            FROM news_fts JOIN news AS n ON n.id = news_fts.rowid
+            WHERE {" AND ".join(conditions)}
+            ORDER BY rank
+            LIMIT ?;
+            """,
+            params,
+        )
+        return _records(cur)
+
+
+def get_page_variants(db_path: str) -> Dict[str, Tuple[str, float]]:
+    """
+    Выученные шаблоны лёгких версий страниц: {host -> (template, ratio)}.
+    """
+    with get_connection(db_path) as conn:
+        cur = conn.execute("SELECT host, template, ratio FROM page_variants;")
+        return {host: (template, ratio) for host, template, ratio in cur.fetchall()}
+
+
+def save_page_variant(db_path: str, host: str, template: str, ratio: float) -> None:
+    learned_at = datetime.now(timezone.utc).isoformat()
+    with get_connection(db_path) as conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO page_variants (host, template, ratio, learned_at)
+            VALUES (?, ?, ?, ?);
+            """,
+            (host, template, ratio, learned_at),
+        )
+        conn.commit()
+
+
+def delete_page_variant(db_path: str, host: str) -> None:
+    """Забывает шаблон лёгкой версии, который перестал работать."""
+    with get_connection(db_path) as conn:
+        conn.execute("DELETE FROM page_variants WHERE host = ?;", (host,))
+        conn.commit()
+
+
+def get_cached_translations(
+    db_path: str,
+    text_hashes: Iterable[str],
+    target: str,
+    table: str = "translation_cache",
+) -> Dict[str, str]:
+    """
+    Переводы из кэша/памяти переводов: {text_hash -> translated}.
+    Найденным записям обновляет last_used — для LRU.
+    """
+    assert table in TRANSLATION_TABLES
+    text_hashes = list(dict.fromkeys(text_hashes))
+    if not text_hashes:
+        return {}
+
+    placeholders = ",".join("?" for _ in text_hashes)
+    with get_connection(db_path) as conn:
+        cur = conn.execute(
+            f"""
+            SELECT text_hash, translated FROM {table}
+            WHERE target = ? AND text_hash IN ({placeholders});
+            """,
+            (target, *text_hashes),
+        )
+        found = dict(cur.fetchall())
+        if not found:
+            return {}
+
+        now = time.time()
+        conn.executemany(
+            f"UPDATE {table} SET last_used = ? WHERE text_hash = ? AND target = ?;",
+            [(now, h, target) for h in found],
+        )
+        conn.commit()
+        return found
+
+
+def put_cached_translations(
+    db_path: str,
+    translations: Dict[str, str],
+    target: str,
+    max_entries: int,
+    table: str = "translation_cache",
+) -> None:
+    """
+    Кладёт переводы {text_hash -> translated} одной транзакцией
+    и вытесняет давно не использованные записи сверх max_entries.
+    """
+    assert table in TRANSLATION_TABLES
+    now = time.time()
+    with get_connection(db_path) as conn:
+        conn.executemany(
+            f"""
+            INSERT OR REPLACE INTO {table} (text_hash, target, translated, last_used)
+            VALUES (?, ?, ?, ?);
+            """,
+            [(h, target, translated, now) for h, translated in translations.items()],
+        )
+
+        (count,) = conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()
+        if count > max_entries:
+            conn.execute(
+                f"""
+                DELETE FROM {table} WHERE rowid IN (
+                    SELECT rowid FROM {table} ORDER BY last_used ASC LIMIT ?
+                );
+                """,
+                (count - max_entries,),
+            )
+        conn.commit()
+
+
+def get_cached_translation(db_path: str, text_hash: str, target: str) -> Optional[str]:
+    """
+    Перевод из кэша (или None). При попадании обновляет last_used — для LRU.
+    """
+    return get_cached_translations(db_path, [text_hash], target).get(text_hash)
+
+
+def put_cached_translation(
+    db_path: str,
+    text_hash: str,
+    target: str,
+    translated: str,
+    max_entries: int,
+) -> None:
+    """
+    Кладёт перевод в кэш и вытесняет давно не использованные записи сверх max_entries.
+    """
+    put_cached_translations(db_path, {text_hash: translated}, target, max_entries)
+
+
+def save_simhashes(
+    db_path: str,
+    items: Iterable[Tuple[str, int, Sequence[int], Optional[str]]],
+) -> None:
+    """
+    Кладёт отпечатки одной транзакцией: (url, simhash, полосы, duplicate_of).
+    """
+    with get_connection(db_path) as conn:
+        insert_simhash_rows(conn, items)
+        conn.commit()
+
+
+def insert_simhash_rows(
+    conn: sqlite3.Connection,
+    items: Iterable[Tuple[str, int, Sequence[int], Optional[str]]],
+) -> None:
+    """
+    Тело save_simhashes внутри уже открытой транзакции (её фиксирует вызывающий).
+    """
+    fetched_at = datetime.now(timezone.utc).isoformat()
+    band_columns = ", ".join(f"band{i}" for i in range(SIMHASH_BANDS))
+    placeholders = ", ".join("?" for _ in range(SIMHASH_BANDS + 4))
+    conn.executemany(
+        f"""
+        INSERT OR REPLACE INTO news_simhash
+            (url, simhash, {band_columns}, fetched_at, duplicate_of)
+        VALUES ({placeholders});
+        """,
+        [
+            (url, simhash, *bands, fetched_at, duplicate_of)
+            for url, simhash, bands, duplicate_of in items
+        ],
+    )
+
+
+def get_simhash_candidates(
+    db_path: str, bands: Sequence[int], days_back: int
+) -> List[Tuple[str, int]]:
+    """
+    Оригиналы (не дубликаты) за последние days_back дней, у которых совпадает
+    хотя бы одна полоса SimHash: [(url, simhash)]. Каждая полоса — поиск по индексу.
+    """
+    since = _since_ts(days_back)
+    query = " UNION ".join(
+        f"""
+        SELECT url, simhash FROM news_simhash
+        WHERE band{i} = ? AND fetched_ts >= ? AND duplicate_of IS NULL
+        """
+        for i in range(SIMHASH_BANDS)
+    )
+    params: List = []
+    for band in bands:
+        params.extend((band, since))
+
+    with get_connection(db_path) as conn:
+        return conn.execute(query, params).fetchall()
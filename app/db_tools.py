@@ -0,0 +1,183 @@
+# app/db_tools.py
+"""
+Обслуживание базы новостей:
+
+    python -m app.db_tools compress-content [--vacuum]
+    python -m app.db_tools migrate [--dry-run]
+    python -m app.db_tools fts-rebuild
+    python -m app.db_tools retention [--days 365] [--archive-dir DIR]
+    python -m app.db_tools auto-vacuum
+
+compress-content сжимает zlib content у строк, сохранённых до NEWS_BOT_COMPRESS_CONTENT.
+retention (по расписанию — в 04:00) переносит новости старше NEWS_BOT_RETENTION_DAYS
+дней в годовые архивы news_<год>.db; в рабочей БД от них остаются url и хэш текста,
+чтобы их не скачивать повторно. Для запросов по истории архивы подключает
+db.attach_archives. Затем incremental_vacuum и ANALYZE — у БД, созданной до
+auto_vacuum=INCREMENTAL, только после однократного auto-vacuum (полный VACUUM).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from .config import get_settings
+from .db import (
+    SCHEMA_VERSION,
+    archive_old_news,
+    archive_path,
+    compress_news_content,
+    init_db,
+    migrate,
+    optimize_db,
+    rebuild_news_fts,
+    vacuum,
+)
+from .logging_utils import log_info, setup_logging
+
+
+def _file_size_kb(path: str) -> int:
+    """Размер БД вместе с журналом WAL."""
+    return sum(
+        os.path.getsize(name) // 1024
+        for name in (path, f"{path}-wal")
+        if os.path.exists(name)
+    )
+
+
+def cmd_compress_content(db_path: str, args: argparse.Namespace) -> int:
+    size_before = _file_size_kb(db_path)
+    compressed = compress_news_content(db_path, batch_size=args.batch_size)
+    log_info(f"Сжатие content: обработано {compressed} строк.")
+
+    if args.vacuum:
+        vacuum(db_path)
+        log_info(f"VACUUM: размер БД {size_before} КБ → {_file_size_kb(db_path)} КБ.")
+    return 0
+
+
+def cmd_migrate(db_path: str, args: argparse.Namespace) -> int:
+    migrations = migrate(db_path, dry_run=args.dry_run)
+    if not migrations:
+        log_info(f"Схема БД актуальна (версия {SCHEMA_VERSION}).")
+    elif args.dry_run:
+        log_info(f"Ожидают применения миграций: {len(migrations)}.")
+    else:
+        log_info(f"Применено миграций: {len(migrations)}, версия схемы {SCHEMA_VERSION}.")
+    return 0
+
+
+def cmd_fts_rebuild(db_path: str, args: argparse.Namespace) -> int:
+    indexed = rebuild_news_fts(db_path, batch_size=args.batch_size)
+    log_info(f"Полнотекстовый индекс пересобран: {indexed} новостей.")
+    return 0
+
+
+def default_archive_dir(db_path: str) -> str:
+    """Годовые архивы по умолчанию — в папке archive рядом с БД."""
+    return os.path.join(os.path.dirname(db_path) or ".", "archive")
+
+
+def run_retention(db_path: str, days: int, archive_dir: Optional[str] = None) -> int:
+    """
+    Задача хранения: старые новости — в годовые архивы (days > 0), затем
+    incremental_vacuum и ANALYZE рабочей БД. Возвращает число перенесённых строк.
+    """
+    moved = {}
+    if days > 0:
+        archive_dir = archive_dir or default_archive_dir(db_path)
+        moved = archive_old_news(db_path, days, archive_dir)
+        for year, count in sorted(moved.items()):
+            log_info(f"Хранение: {count} новостей перенесено в {archive_path(archive_dir, year)}.")
+        if not moved:
+            log_info(f"Хранение: новостей старше {days} дней нет.")
+
+    _optimize(db_path, convert=False)
+    return sum(moved.values())
+
+
+def _optimize(db_path: str, convert: bool) -> None:
+    size_before = _file_size_kb(db_path)
+    stats = optimize_db(db_path, convert=convert)
+    if stats["skipped"]:
+        log_info(
+            "Обслуживание БД пропущено: auto_vacuum не INCREMENTAL. "
+            "Перевести (однократный полный VACUUM): python -m app.db_tools auto-vacuum."
+        )
+        return
+    if stats["full_vacuum"]:
+        log_info("БД переведена в auto_vacuum=INCREMENTAL (однократный VACUUM).")
+    log_info(
+        f"Обслуживание БД: освобождено страниц {stats['freed_pages']}, "
+        f"размер {size_before} КБ → {_file_size_kb(db_path)} КБ."
+    )
+
+
+def cmd_retention(db_path: str, args: argparse.Namespace) -> int:
+    settings = get_settings()
+    days = settings.retention_days if args.days is None else args.days
+    run_retention(db_path, days, args.archive_dir or settings.archive_dir)
+    return 0
+
+
+def cmd_auto_vacuum(db_path: str, args: argparse.Namespace) -> int:
+    _optimize(db_path, convert=True)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Обслуживание базы новостей.")
+    parser.add_argument("--db", help="путь к БД (по умолчанию DATABASE_PATH)")
+    # команды, которым не нужно приводить схему к актуальной перед запуском
+    parser.set_defaults(skip_init=False)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compress = commands.add_parser(
+        "compress-content", help="сжать content у старых строк (миграция)"
+    )
+    compress.add_argument("--batch-size", type=int, default=500)
+    compress.add_argument("--vacuum", action="store_true", help="освободить место в файле")
+    compress.set_defaults(handler=cmd_compress_content)
+
+    migrate_cmd = commands.add_parser("migrate", help="применить миграции схемы")
+    migrate_cmd.add_argument(
+        "--dry-run", action="store_true", help="только показать, что будет применено"
+    )
+    migrate_cmd.set_defaults(handler=cmd_migrate, skip_init=True)
+
+    fts = commands.add_parser("fts-rebuild", help="пересобрать полнотекстовый индекс news_fts")
+    fts.add_argument("--batch-size", type=int, default=500)
+    fts.set_defaults(handler=cmd_fts_rebuild)
+
+    retention = commands.add_parser(
+        "retention", help="перенести старые новости в годовые архивы и обслужить БД"
+    )
+    retention.add_argument(
+        "--days", type=int, help="старше скольких дней (по умолчанию NEWS_BOT_RETENTION_DAYS)"
+    )
+    retention.add_argument(
+        "--archive-dir", help="каталог архивов (по умолчанию NEWS_BOT_ARCHIVE_DIR)"
+    )
+    retention.set_defaults(handler=cmd_retention)
+
+    auto_vacuum = commands.add_parser(
+        "auto-vacuum",
+        help="перевести БД в auto_vacuum=INCREMENTAL (полный VACUUM) и обслужить её",
+    )
+    auto_vacuum.set_defaults(handler=cmd_auto_vacuum)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    db_path = args.db or get_settings().database_path
+    if not args.skip_init:
+        init_db(db_path)
+    return args.handler(db_path, args)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    setup_logging()  # pragma: no cover
+    sys.exit(main())  # pragma: no cover
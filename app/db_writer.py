@@ -0,0 +1,195 @@
+# app/db_writer.py
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from .db import (
+    NewsRow,
+    NewsUpdateRow,
+    close_connections,
+    get_connection,
+    insert_news_rows,
+    insert_simhash_rows,
+    update_news_rows,
+)
+from .logging_utils import log_error, log_info
+
+WRITER_QUEUE_SIZE = 1000
+WRITER_BATCH_SIZE = 100
+# Сколько ждать новых операций, прежде чем закоммитить неполную пачку
+WRITER_FLUSH_INTERVAL = 0.2
+
+
+@dataclass
+class _Operation:
+    # func=None — «барьер»: пачка коммитится сразу (flush/close)
+    func: Optional[Callable[[sqlite3.Connection], Any]]
+    future: Future
+
+
+_STOP = object()
+
+
+class DbWriter:
+    """
+    Фоновый писатель в SQLite: один поток владеет соединением на запись,
+    забирает операции из ограниченной очереди и коммитит их пачками —
+    по WRITER_BATCH_SIZE операций или раз в WRITER_FLUSH_INTERVAL секунд.
+
+    Каждая операция — функция от соединения без commit; результат и ошибка
+    приходят в Future. Ошибка одной операции откатывает только её (SAVEPOINT),
+    остальные операции пачки сохраняются. Если очередь заполнена, submit ждёт
+    свободного места — это единственное место, где производитель может ждать.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_queue: int = WRITER_QUEUE_SIZE,
+        batch_size: int = WRITER_BATCH_SIZE,
+        flush_interval: float = WRITER_FLUSH_INTERVAL,
+    ):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.operations = 0
+        self.batches = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._closed = False
+
+    def start(self) -> "DbWriter":
+        self._thread.start()
+        return self
+
+    def submit(self, func: Callable[[sqlite3.Connection], Any]) -> Future:
+        """
+        Ставит операцию в очередь. Future.result() — её результат после commit.
+        """
+        if self._closed:
+            raise RuntimeError("DbWriter уже закрыт")
+        future: Future = Future()
+        self._queue.put(_Operation(func, future))
+        return future
+
+    def save_news_many(self, rows: Sequence[NewsRow], compress: bool = False) -> Future:
+        """
+        Как db.save_news_many; Future вернёт добавленные url.
+        """
+        rows = list(rows)
+        return self.submit(lambda conn: insert_news_rows(conn, rows, compress) if rows else [])
+
+    def update_news_content(
+        self, rows: Sequence[NewsUpdateRow], compress: bool = False
+    ) -> Future:
+        """
+        Как db.update_news_content.
+        """
+        rows = list(rows)
+        return self.submit(lambda conn: update_news_rows(conn, rows, compress))
+
+    def save_simhashes(
+        self, items: Sequence[Tuple[str, int, Sequence[int], Optional[str]]]
+    ) -> Future:
+        """
+        Как db.save_simhashes.
+        """
+        items = list(items)
+        return self.submit(lambda conn: insert_simhash_rows(conn, items))
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Ждёт, пока всё поставленное до этого момента будет закоммичено.
+        """
+        if self._closed:
+            return
+        future: Future = Future()
+        self._queue.put(_Operation(None, future))
+        future.result(timeout)
+
+    def close(self) -> None:
+        """
+        Дописывает очередь и останавливает поток.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.ident is None:
+            self._thread.start()  # не запускали — всё равно дописываем очередь
+        self._queue.put(_STOP)
+        self._thread.join()
+        log_info(
+            f"Фоновая запись в БД: операций {self.operations}, транзакций {self.batches}, "
+            f"ошибок {self.failed}."
+        )
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch: List[_Operation] = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while item.func is not None and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+        close_connections()
+
+    def _write_batch(self, batch: List[_Operation]) -> None:
+        if all(op.func is None for op in batch):
+            # одни барьеры: всё до них уже закоммичено
+            for op in batch:
+                op.future.set_result(None)
+            return
+
+        done: List[Tuple[_Operation, Any]] = []
+        try:
+            with get_connection(self.db_path) as conn:
+                conn.execute("BEGIN IMMEDIATE;")
+                for op in batch:
+                    if op.func is None:
+                        done.append((op, None))
+                        continue
+                    conn.execute("SAVEPOINT db_writer_op;")
+                    try:
+                        result = op.func(conn)
+                    except Exception as exc:  # noqa: BLE001
+                        conn.execute("ROLLBACK TO db_writer_op;")
+                        conn.execute("RELEASE db_writer_op;")
+                        self._fail(op, exc)
+                        continue
+                    conn.execute("RELEASE db_writer_op;")
+                    done.append((op, result))
+                conn.commit()
+        except Exception as exc:  # noqa: BLE001
+            # не удалось открыть или закоммитить транзакцию — пачка целиком не записана
+            for op in batch:
+                if not op.future.done():
+                    self._fail(op, exc)
+            return
+
+        self.batches += 1
+        for op, result in done:
+            if op.func is not None:
+                self.operations += 1
+            op.future.set_result(result)
+
+    def _fail(self, op: _Operation, exc: Exception) -> None:
+        self.failed += 1
+        log_error(f"Фоновая запись в БД: ошибка операции: {exc}", alert=False)
+        op.future.set_exception(exc)
@@ -0,0 +1,142 @@
+# app/dedup.py
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .db import SIMHASH_BANDS, get_simhash_candidates, save_simhashes
+from .db_writer import DbWriter
+
+SIMHASH_BITS = 64
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+# Почти-дубликат: отпечатки отличаются не больше чем в стольких битах.
+# Должно быть < SIMHASH_BANDS: тогда хотя бы одна полоса совпадает целиком
+# и кандидат гарантированно находится поиском по индексу полос.
+NEAR_DUPLICATE_DISTANCE = 3
+SHINGLE_SIZE = 3
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _shingle_digest(shingle: str) -> bytes:
+    return hashlib.blake2b(shingle.encode("utf-8"), digest_size=SIMHASH_BITS // 8).digest()
+
+
+def simhash(text: str) -> int:
+    """
+    64-битный SimHash по шинглам из SHINGLE_SIZE слов (регистр не важен).
+    Похожие тексты дают отпечатки с малым расстоянием Хэмминга.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    shingles = {
+        " ".join(words[i : i + SHINGLE_SIZE])
+        for i in range(max(1, len(words) - SHINGLE_SIZE + 1))
+    }
+    if not words:
+        return 0
+
+    # биты всех хэшей шинглов одной матрицей: строка — шингл, столбец — бит
+    digests = b"".join(map(_shingle_digest, shingles))
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(shingles), -1), axis=1)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def simhash_bands(value: int) -> List[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (i * BAND_BITS)) & mask for i in range(SIMHASH_BANDS)]
+
+
+def _to_sqlite(value: int) -> int:
+    """SQLite INTEGER — знаковый 64-битный."""
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def _from_sqlite(value: int) -> int:
+    return value & ((1 << SIMHASH_BITS) - 1)
+
+
+class NearDuplicateDetector:
+    """
+    Почти-дубликаты на входе: одна и та же история у разных источников
+    (CVE, релиз) под разными URL. Сравнивает с историей в БД за days_back дней
+    и со статьями текущего прогона; поиск — по полосам отпечатка, не перебором.
+    """
+
+    def __init__(self, db_path: str, days_back: int = 7):
+        self.db_path = db_path
+        self.days_back = days_back
+        self._batch: Dict[Tuple[int, int], List[Tuple[str, int]]] = defaultdict(list)
+        self._pending: List[Tuple[str, int, List[int], Optional[str], bool]] = []
+        self.duplicates = 0
+
+    def check(self, url: str, text: str) -> Optional[str]:
+        """
+        Возвращает URL оригинала, если статья — почти-дубликат, иначе None.
+        Отпечаток запоминается (сохраняется в БД в flush()).
+        """
+        value = simhash(text)
+        bands = simhash_bands(value)
+
+        # (url, отпечаток, оригинал из прогона, а не из БД)
+        candidates = [
+            (cand_url, _from_sqlite(cand_hash), False)
+            for cand_url, cand_hash in get_simhash_candidates(
+                self.db_path, bands, self.days_back
+            )
+        ]
+        for i, band in enumerate(bands):
+            candidates.extend(
+                (cand_url, cand_hash, True) for cand_url, cand_hash in self._batch[(i, band)]
+            )
+
+        original, from_batch = next(
+            (
+                (cand_url, in_batch)
+                for cand_url, cand_hash, in_batch in candidates
+                if cand_url != url and hamming_distance(value, cand_hash) <= NEAR_DUPLICATE_DISTANCE
+            ),
+            (None, False),
+        )
+
+        if original is None:
+            for i, band in enumerate(bands):
+                self._batch[(i, band)].append((url, value))
+        else:
+            self.duplicates += 1
+        self._pending.append((url, _to_sqlite(value), bands, original, from_batch))
+        return original
+
+    def flush(
+        self, saved_urls: Iterable[str], writer: Optional[DbWriter] = None
+    ) -> Optional[Future]:
+        """
+        Пишет отпечатки прогона в БД: оригиналы — только реально сохранённые в news,
+        дубликаты — если их оригинал есть в БД или сохранён сейчас (чтобы не
+        скачивать их снова). Дубликат несохранённого оригинала не запоминается:
+        иначе ссылка считалась бы обработанной, хотя статьи нет нигде.
+        С writer запись уходит фоновому писателю без ожидания — возвращается её Future.
+        """
+        saved = set(saved_urls)
+        items = [
+            (url, value, bands, original)
+            for url, value, bands, original, from_batch in self._pending
+            if (url in saved if original is None else not from_batch or original in saved)
+        ]
+        self._pending = []
+        self._batch.clear()
+        if not items:
+            return None
+        if writer is not None:
+            return writer.save_simhashes(items)
+        save_simhashes(self.db_path, items)
+        return None
@@ -1,5 +1,6 @@
 # app/filters.py
 from typing import Iterable, List
+from urllib.parse import urldefrag
 
 
 def filter_link_by_substring(links: Iterable[str], substring: str) -> List[str]:
@@ -8,3 +9,11 @@ def filter_link_by_substring(links: Iterable[str], substring: str) -> List[str]:
     Никакой фильтрации по домену/расширению — только простая подстрока.
     """
     return [link for link in links if substring in link]
+
+
+def dedupe_links(links: Iterable[str]) -> List[str]:
+    """
+    Убирает #фрагмент (якорь комментариев и т.п. — та же статья) и повторы;
+    порядок первых вхождений сохраняется.
+    """
+    return list(dict.fromkeys(urldefrag(link).url for link in links))
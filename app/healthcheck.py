@@ -30,11 +30,11 @@ def check_db() -> bool:
     settings = get_settings()
     """
     Простейшая проверка доступности БД:
-    - устанавливаем соединение
+    - устанавливаем соединение только для чтения (не мешает писателям)
     - выполняем SELECT 1
     """
     try:
-        with get_connection(settings.database_path) as conn:
+        with get_connection(settings.database_path, readonly=True) as conn:
             conn.execute("SELECT 1;")
         return True
     except Exception as exc:  # noqa: BLE001
@@ -0,0 +1,104 @@
+# app/html_archive.py
+from __future__ import annotations
+
+import hashlib
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from .db import get_connection
+
+ARCHIVE_COMPRESS_LEVEL = 6
+
+
+class HtmlArchive:
+    """
+    Архив «сырого» HTML в отдельном SQLite-файле — чтобы переразбирать и
+    переоценивать историю без повторного скачивания (многие URL потом пропадают).
+    Страницы хранятся один раз по sha256 содержимого, сжатыми zlib;
+    таблица urls связывает URL с последней скачанной версией.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.bytes_raw = 0
+        self.bytes_stored = 0
+        with get_connection(path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    hash TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS urls (
+                    url TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL
+                );
+                """
+            )
+            conn.commit()
+
+    def put(self, url: str, html: str) -> str:
+        """
+        Кладёт страницу в архив и возвращает её хэш. Одинаковый HTML хранится один раз.
+        """
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        fetched_at = datetime.now(timezone.utc).isoformat()
+
+        with get_connection(self.path) as conn:
+            exists = conn.execute("SELECT 1 FROM pages WHERE hash = ?;", (digest,)).fetchone()
+            if exists is None:
+                data = zlib.compress(raw, ARCHIVE_COMPRESS_LEVEL)
+                conn.execute(
+                    "INSERT INTO pages (hash, data, size) VALUES (?, ?, ?);",
+                    (digest, data, len(raw)),
+                )
+                self.bytes_raw += len(raw)
+                self.bytes_stored += len(data)
+            conn.execute(
+                "INSERT OR REPLACE INTO urls (url, hash, fetched_at) VALUES (?, ?, ?);",
+                (url, digest, fetched_at),
+            )
+            conn.commit()
+        return digest
+
+    def get(self, url: str) -> Optional[str]:
+        with get_connection(self.path) as conn:
+            row = conn.execute(
+                """
+                SELECT p.data FROM urls u JOIN pages p ON p.hash = u.hash
+                WHERE u.url = ?;
+                """,
+                (url,),
+            ).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def iter_pages(self, urls: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """
+        (url, html) для тех URL, что есть в архиве, — по одной странице в памяти.
+        """
+        for url in urls:
+            html = self.get(url)
+            if html is not None:
+                yield url, html
+
+    def stats(self) -> Dict[str, int]:
+        with get_connection(self.path) as conn:
+            pages, raw, stored = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM pages;"
+            ).fetchone()
+            (urls,) = conn.execute("SELECT COUNT(*) FROM urls;").fetchone()
+        return {"pages": pages, "urls": urls, "bytes_raw": raw, "bytes_stored": stored}
+
+    def stats_message(self) -> str:
+        return (
+            f"Архив HTML: записано {self.bytes_raw // 1024} КБ, "
+            f"на диске {self.bytes_stored // 1024} КБ."
+        )
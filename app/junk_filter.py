@@ -0,0 +1,141 @@
+# app/junk_filter.py
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from bs4 import BeautifulSoup
+
+# Настоящая статья короче этого почти не бывает
+JUNK_MIN_CHARS = 300
+# Заглушки (cookie-wall, paywall, 404 со статусом 200) — короткие страницы
+INTERSTITIAL_MAX_CHARS = 1500
+# Плотность ссылок считаем только для небольших страниц — это отдельный разбор HTML
+LINK_DENSITY_MAX_CHARS = 5000
+# Доля текста внутри <a>, начиная с которой страница — список ссылок (рубрика, тег)
+MAX_LINK_DENSITY = 0.5
+
+INTERSTITIAL_PHRASES = (
+    "page not found",
+    "404 not found",
+    "error 404",
+    "this page doesn't exist",
+    "this page does not exist",
+    "access denied",
+    "are you a robot",
+    "verify you are human",
+    "checking your browser",
+    "please enable javascript",
+    "enable cookies",
+    "accept cookies to continue",
+    "subscribe to continue",
+    "subscribe to read",
+    "sign in to continue",
+    "log in to continue",
+    "this content is for subscribers",
+    "страница не найдена",
+    "доступ запрещён",
+    "подпишитесь, чтобы продолжить",
+)
+INTERSTITIAL_PATTERN = re.compile(
+    "|".join(re.escape(phrase) for phrase in INTERSTITIAL_PHRASES), re.IGNORECASE
+)
+
+# Столько разных URL источника с одним текстом за прогон — это шаблон (заглушка, рубрика),
+# а не статья. Два URL с одним текстом — обычно одна статья, её первая копия сохраняется.
+BOILERPLATE_MIN_URLS = 3
+
+# Для отпечатка шаблона игнорируем цифры и пробелы: даты/счётчики на заглушках меняются
+_FINGERPRINT_NOISE = re.compile(r"[\d\s]+")
+
+
+def link_density(html: str) -> float:
+    """
+    Доля видимого текста страницы, которая находится внутри ссылок.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+
+    total = len("".join(soup.get_text().split()))
+    if not total:
+        return 0.0
+    in_links = sum(len("".join(a.get_text().split())) for a in soup.find_all("a"))
+    return min(1.0, in_links / total)
+
+
+def junk_reason(content: str, html: Optional[str] = None) -> Optional[str]:
+    """
+    Дешёвая проверка «это не статья»: возвращает причину или None.
+    html — если передан, для небольших страниц дополнительно считается плотность ссылок.
+    """
+    size = len(content)
+    if size < INTERSTITIAL_MAX_CHARS:
+        match = INTERSTITIAL_PATTERN.search(content)
+        if match:
+            return f"заглушка «{match.group(0).lower()}»"
+
+    if size < JUNK_MIN_CHARS:
+        return "слишком короткий текст"
+
+    if html is not None and size < LINK_DENSITY_MAX_CHARS:
+        density = link_density(html)
+        if density > MAX_LINK_DENSITY:
+            return f"плотность ссылок {density:.0%}"
+
+    return None
+
+
+def boilerplate_fingerprint(content: str) -> str:
+    """
+    Отпечаток текста без цифр и пробелов: одинаковые страницы-шаблоны
+    под разными URL одного источника дают один отпечаток.
+    """
+    normalized = _FINGERPRINT_NOISE.sub("", content.lower())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class JunkStats:
+    """
+    Учёт мусорных страниц за прогон по источникам.
+    """
+
+    checked: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    junk: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def record(self, source: str, is_junk: bool) -> None:
+        self.checked[source] += 1
+        if is_junk:
+            self.junk[source] += 1
+
+    def record_junk(self, source: str) -> None:
+        """
+        Страница уже посчитана в checked, но оказалась мусором позже (шаблон источника).
+        """
+        self.junk[source] += 1
+
+    def stats_messages(self) -> List[str]:
+        return [
+            f"Мусорные страницы {source}: {self.junk[source]} из {total} "
+            f"({self.junk[source] / total:.0%})."
+            for source, total in sorted(self.checked.items())
+            if self.junk.get(source)
+        ]
+
+
+def repeated_fingerprints(
+    items: Iterable[Tuple[str, str]], min_count: int = BOILERPLATE_MIN_URLS
+) -> Set[Tuple[str, str]]:
+    """
+    items: (источник, отпечаток) по одному на URL. Возвращает пары, встретившиеся
+    не меньше min_count раз, — один и тот же текст под многими URL источника
+    (заглушка, шаблон, рубрика).
+    """
+    counts: Dict[Tuple[str, str], int] = defaultdict(int)
+    for item in items:
+        counts[item] += 1
+    return {item for item, count in counts.items() if count >= min_count}
@@ -9,8 +9,11 @@ def main():
 
     settings = get_settings()
 
-    professor = NewsProfessor(db_path=settings.database_path)
-    professor.run_for_today()
+    professor = NewsProfessor.from_settings(settings)
+    try:
+        professor.run_for_today()
+    finally:
+        professor.close()
 
 
 if __name__ == "__main__":
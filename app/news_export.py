@@ -0,0 +1,220 @@
+# app/news_export.py
+"""
+Выгрузка архива новостей в Parquet для аналитики:
+
+    python -m app.news_export --out export/ [--chunk-size 50000] [--with-content] [--full]
+
+Файлы разложены по папкам month=YYYY-MM/source=<источник>/ (hive-разбиение,
+источник закодирован как в URL), читаются, например,
+pyarrow.dataset.dataset("export/", partitioning="hive") или
+pandas.read_parquet("export/"). Повторный запуск дописывает только новые
+строки: последний выгруженный id хранится в export/_export_state.json.
+Состав колонок (--with-content) в существующей выгрузке меняется только с --full.
+Нужен pyarrow: pip install -r requirements-export.txt.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from .config import get_settings
+from .db import NewsRecord, get_news_after_id, init_db
+from .logging_utils import log_error, log_info, setup_logging
+
+EXPORT_CHUNK_SIZE = 50_000
+EXPORT_STATE_FILE = "_export_state.json"
+EXPORT_COMPRESSION = "zstd"
+# Значение разбиения, если месяц или источник неизвестны: pyarrow и Spark
+# читают его как NULL
+UNKNOWN_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+EXPORT_COLUMNS = ("id", "url", "title", "summary", "source", "score", "fetched_ts", "published_ts")
+
+
+def _load_pyarrow():
+    """
+    pyarrow нужен только экспорту — импортируем при вызове, а не при старте бота.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError(
+            "Для выгрузки в Parquet нужен pyarrow: pip install -r requirements-export.txt"
+        ) from None
+    return pyarrow, pyarrow.parquet
+
+
+def _schema(pa, with_content: bool):
+    fields = [
+        ("id", pa.int64()),
+        ("url", pa.string()),
+        ("title", pa.string()),
+        ("summary", pa.string()),
+        ("score", pa.float64()),
+        ("fetched_at", pa.timestamp("s", tz="UTC")),
+        ("published_at", pa.timestamp("s", tz="UTC")),
+    ]
+    if with_content:
+        fields.append(("content", pa.string()))
+    return pa.schema(fields)
+
+
+def partition_key(record: NewsRecord) -> Tuple[str, str]:
+    """
+    (месяц YYYY-MM по fetched_ts, источник) — имена папок разбиения. Источник
+    кодируется как в URL («/» → %2F): разные источники не сливаются в одну
+    папку, а pyarrow при чтении раскодирует значение обратно.
+    """
+    month = (
+        datetime.fromtimestamp(record.fetched_ts, timezone.utc).strftime("%Y-%m")
+        if record.fetched_ts is not None
+        else UNKNOWN_PARTITION
+    )
+    source = quote(record.source, safe="") if record.source else UNKNOWN_PARTITION
+    return month, source
+
+
+def _to_row(record: NewsRecord, with_content: bool) -> Dict[str, Any]:
+    row = {
+        "id": record.id,
+        "url": record.url,
+        "title": record.title,
+        "summary": record.summary,
+        "score": record.score,
+        "fetched_at": record.fetched_ts,
+        "published_at": record.published_ts,
+    }
+    if with_content:
+        row["content"] = record.content
+    return row
+
+
+def load_state(out_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Состояние выгрузки {"last_id": ..., "with_content": ...};
+    None — ещё ничего не выгружали.
+    """
+    try:
+        with open(os.path.join(out_dir, EXPORT_STATE_FILE), encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    # файлы состояния первых выгрузок — без with_content: тогда он не выгружался
+    return {"last_id": int(state["last_id"]), "with_content": bool(state.get("with_content"))}
+
+
+def save_state(out_dir: str, last_id: int, with_content: bool) -> None:
+    """Атомарно: сбой посреди записи не оставит битый файл состояния."""
+    path = os.path.join(out_dir, EXPORT_STATE_FILE)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"last_id": last_id, "with_content": with_content}, f)
+    os.replace(tmp, path)
+
+
+def clear_export(out_dir: str) -> None:
+    """Удаляет прежнюю выгрузку: папки month=* и файл состояния, прочее не трогает."""
+    for name in os.listdir(out_dir):
+        if name.startswith("month="):
+            shutil.rmtree(os.path.join(out_dir, name))
+    state_path = os.path.join(out_dir, EXPORT_STATE_FILE)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+
+
+def export_news(
+    db_path: str,
+    out_dir: str,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    with_content: bool = False,
+    full: bool = False,
+) -> Dict[str, int]:
+    """
+    Выгружает строки news с id больше последнего выгруженного. Читает кусками
+    по chunk_size строк — в памяти не больше одного куска; каждый кусок — по
+    файлу на пару (месяц, источник), имя файла — по первому id в нём. Состояние
+    сохраняется после каждого куска: прерванную выгрузку можно продолжить,
+    а куски после последнего сохранения перезапишутся теми же файлами.
+    У всех файлов выгрузки одна схема: сменить with_content можно только
+    полной перевыгрузкой (full=True), иначе RuntimeError.
+    Возвращает {"rows": ..., "files": ..., "last_id": ...}.
+    """
+    pa, pq = _load_pyarrow()
+    schema = _schema(pa, with_content)
+    columns = EXPORT_COLUMNS + (("content",) if with_content else ())
+
+    os.makedirs(out_dir, exist_ok=True)
+    if full:
+        clear_export(out_dir)
+    state = load_state(out_dir)
+    if state is not None and state["with_content"] != with_content:
+        raise RuntimeError(
+            f"Выгрузка в {out_dir} сделана {'с' if state['with_content'] else 'без'} "
+            "--with-content; чтобы сменить схему, перевыгрузите всё с --full."
+        )
+    last_id = state["last_id"] if state is not None else 0
+    rows = files = 0
+    while True:
+        records = get_news_after_id(db_path, last_id, chunk_size, columns)
+        if not records:
+            break
+
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        for record in records:
+            groups[partition_key(record)].append(_to_row(record, with_content))
+
+        for (month, source), group in groups.items():
+            part_dir = os.path.join(out_dir, f"month={month}", f"source={source}")
+            os.makedirs(part_dir, exist_ok=True)
+            pq.write_table(
+                pa.Table.from_pylist(group, schema=schema),
+                os.path.join(part_dir, f"part-{group[0]['id']:012d}.parquet"),
+                compression=EXPORT_COMPRESSION,
+            )
+            files += 1
+
+        rows += len(records)
+        last_id = records[-1].id
+        save_state(out_dir, last_id, with_content)
+
+    return {"rows": rows, "files": files, "last_id": last_id}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Выгрузка архива новостей в Parquet.")
+    parser.add_argument("--out", required=True, help="каталог выгрузки")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    parser.add_argument(
+        "--with-content", action="store_true", help="выгружать и текст статей (content)"
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="удалить прежнюю выгрузку и выгрузить всё заново"
+    )
+    parser.add_argument("--db", help="путь к БД (по умолчанию DATABASE_PATH)")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or get_settings().database_path
+    init_db(db_path)
+    try:
+        stats = export_news(db_path, args.out, args.chunk_size, args.with_content, args.full)
+    except RuntimeError as exc:
+        log_error(str(exc), alert=False)
+        return 1
+    log_info(
+        f"Выгрузка в Parquet: строк {stats['rows']}, файлов {stats['files']}, "
+        f"последний id {stats['last_id']}."
+    )
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    setup_logging()  # pragma: no cover
+    sys.exit(main())  # pragma: no cover
@@ -1,25 +1,59 @@
 # app/news_professor.py
 from __future__ import annotations
 
+import time
+from concurrent.futures import Future
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from typing import Dict, Iterable, List, Optional, Tuple
 
-from .config import get_settings
+from .config import Settings, get_settings
 from .db import (
+    checkpoint_and_close,
+    get_news_urls,
     init_db,
     link_exists,
-    save_news,
+    update_news_content,
+    save_news_many,
     get_news_by_urls,
     get_last_news,
+    delete_page_variant,
+    get_page_variants,
+    save_page_variant,
 )
 
-from .filters import filter_link_by_substring
+from .db_writer import DbWriter
+from .dedup import NearDuplicateDetector
+from .filters import dedupe_links, filter_link_by_substring
+from .html_archive import HtmlArchive
+from .junk_filter import JunkStats, boilerplate_fingerprint, junk_reason, repeated_fingerprints
 from .link_extractor import extract_links_from_url
 from .logging_utils import log_error, log_info, log_warning
 from .scoring import compute_tfidf_scores
-from .telegram_bot import format_news_message, send_message
-from .text_parser import fetch_text_content
+from .telegram_bot import format_news_message, send_message, split_title_and_body
+from .translation import (
+    CircuitBreaker,
+    LanguageFilter,
+    TokenBucket,
+    TranslationCache,
+    TranslationEngine,
+    TranslationMemory,
+    make_translator_backend,
+)
+from .text_parser import (
+    DEFAULT_TECH_TERMS,
+    PageMetadata,
+    PageVariants,
+    build_tech_term_pattern,
+    extract_head_metadata,
+    extract_text_content,
+    fetch_page,
+    load_tech_terms,
+    translate_to_ru,
+)
+
+# Колонки для подборок и дайджестов: content там не используется
+DIGEST_COLUMNS = ("url", "title", "summary", "source", "score")
 
 # ---------- Наборы сайтов под тематику ----------
 
@@ -75,11 +109,14 @@ class ContentPlanConfig:
     - sites: откуда тянем новости
     - substring: фильтр по URL (обычно /2025/)
     - max_fetch: сколько максимум новых статей за раз сохраняем
+    - full_body: нужен ли полный текст статьи (в дни подборок/дайджестов
+      публикуются только title+summary — хватает метаданных из <head>)
     """
 
     sites: List[str]
     substring: str
     max_fetch: int
+    full_body: bool = True
 
 
 # 0 = Пн, 6 = Вс
@@ -113,11 +150,13 @@ CONTENT_PLAN: Dict[int, ContentPlanConfig] = {
         sites=SITES_TOOLS_DAY,
         substring="/2025/",
         max_fetch=60,
+        full_body=False,
     ),
     6: ContentPlanConfig(  # Воскресенье — дайджест недели
         sites=ALL_SITES,
         substring="/2025/",
         max_fetch=80,
+        full_body=False,
     ),
 }
 
@@ -204,6 +243,21 @@ def split_title_and_summary(content: str) -> Tuple[Optional[str], Optional[str]]
     return title, summary
 
 
+def title_and_summary_from_metadata(
+    meta: PageMetadata, content: Optional[str]
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Metadata-first: title/summary берём из og:/meta/JSON-LD,
+    а чего не хватает — из первых строк текста статьи.
+    """
+    title, summary = split_title_and_summary(content or "")
+    if meta.title:
+        title = meta.title[:200]
+    if meta.summary:
+        summary = meta.summary[:600]
+    return title, summary
+
+
 def build_tool_use_case(source: str) -> str:
     """
     Простая эвристика по источнику для юзкейса.
@@ -243,9 +297,102 @@ class NewsProfessor:
     - публикует топ в Telegram
     """
 
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        light_variants: bool = False,
+        translation_cache_size: int = 0,
+        translation_memory_size: int = 0,
+        translator_backend: str = "google",
+        translator_rate_limit: float = 0.0,
+        translator_max_failures: int = 0,
+        tech_terms_file: Optional[str] = None,
+        junk_filter: bool = False,
+        dedup_days: int = 0,
+        html_archive: Optional[str] = None,
+        compress_content: bool = False,
+        db_writer: bool = False,
+    ):
         self.db_path = db_path
+        self.compress_content = compress_content
+        self.html_archive = HtmlArchive(html_archive) if html_archive else None
+        self.light_variants = light_variants
+        self.junk_filter = junk_filter
+        self.dedup_days = dedup_days
+        self.tech_term_pattern = (
+            build_tech_term_pattern(DEFAULT_TECH_TERMS + tuple(load_tech_terms(tech_terms_file)))
+            if tech_terms_file
+            else None
+        )
+        self.translation_engine = TranslationEngine(
+            make_translator_backend(translator_backend),
+            cache=(
+                TranslationCache(db_path, max_entries=translation_cache_size)
+                if translation_cache_size > 0
+                else None
+            ),
+            memory=(
+                TranslationMemory(db_path, max_entries=translation_memory_size)
+                if translation_memory_size > 0
+                else None
+            ),
+            rate_limiter=(
+                TokenBucket(translator_rate_limit) if translator_rate_limit > 0 else None
+            ),
+            breaker=(
+                CircuitBreaker(translator_max_failures) if translator_max_failures > 0 else None
+            ),
+            language_filter=LanguageFilter("ru"),
+        )
         init_db(self.db_path)
+        # фоновый писатель: сохранение и переразбор не ждут диска (кроме результата вставки)
+        self.db_writer = DbWriter(db_path).start() if db_writer else None
+        # записи, результат которых прогону не нужен: ждём их в конце работы
+        self._pending_writes: List[Future] = []
+
+    def close(self) -> None:
+        """
+        Дописывает отложенные операции фонового писателя, останавливает пул потоков
+        перевода и сбрасывает WAL в файл БД. Вызывать в конце работы.
+        """
+        self.translation_engine.close()
+        if self.db_writer is not None:
+            self.db_writer.close()
+        self._wait_pending_writes()
+        checkpoint_and_close(self.db_path)
+
+    def _wait_pending_writes(self) -> None:
+        """Ошибки отложенных записей — вызывающему."""
+        pending, self._pending_writes = self._pending_writes, []
+        for future in pending:
+            future.result()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "NewsProfessor":
+        return cls(
+            db_path=settings.database_path,
+            light_variants=settings.light_variants,
+            translation_cache_size=settings.translation_cache_size,
+            translation_memory_size=settings.translation_memory_size,
+            translator_backend=settings.translator_backend,
+            translator_rate_limit=settings.translator_rate_limit,
+            translator_max_failures=settings.translator_max_failures,
+            tech_terms_file=settings.tech_terms_file,
+            junk_filter=settings.junk_filter,
+            dedup_days=settings.dedup_days,
+            html_archive=settings.html_archive_path,
+            compress_content=settings.compress_content,
+            db_writer=settings.db_writer,
+        )
+
+    def _translate(self, text: str) -> str:
+        return translate_to_ru(
+            text, engine=self.translation_engine, tech_terms=self.tech_term_pattern
+        )
+
+    def _log_translation_stats(self) -> None:
+        for message in self.translation_engine.stats_messages():
+            log_info(message)
 
     def collect_links(self, sites: Iterable[str]) -> List[str]:
         all_links: List[str] = []
@@ -264,18 +411,36 @@ class NewsProfessor:
         links: Iterable[str],
         substring: str,
         max_to_fetch: int,
+        full_body: bool = True,
     ) -> List[str]:
         """
         - фильтруем ссылки по подстроке (например, /2025/)
         - пропускаем те, что уже есть в БД
         - парсим контент, считаем TF-IDF score, сохраняем в БД
+        - full_body=False: если метаданных <head> хватает на title+summary,
+          тело статьи не разбираем и не переводим (оно не будет опубликовано)
+        - junk_filter: заглушки, 404 со статусом 200, рубрики и повторяющиеся
+          шаблоны источника отбрасываются до TF-IDF и сохранения
+        - dedup_days: почти-дубликаты статей за последние dedup_days дней
+          (та же история у другого источника) не сохраняются и не публикуются
         Возвращает список URL-ов новых статей.
         """
-        filtered_links = filter_link_by_substring(links, substring)
+        # отпечатки прошлого прогона должны быть в БД до поиска дубликатов
+        self._wait_pending_writes()
+        filtered_links = dedupe_links(filter_link_by_substring(links, substring))
         log_info(f"После фильтра по '{substring}' осталось {len(filtered_links)} ссылок")
 
-        new_articles: List[Tuple[str, str, Optional[str], str, str]] = []
-        # (url, title, summary, content, source)
+        new_articles: List[Tuple[str, str, str, Optional[str], str, Optional[str]]] = []
+        # (url, title, summary, content, source, published_at)
+
+        variants = self._load_page_variants()
+        junk_stats = JunkStats() if self.junk_filter else None
+        fingerprints: Dict[str, Tuple[str, str]] = {}  # url -> (source, отпечаток)
+        dedup = (
+            NearDuplicateDetector(self.db_path, days_back=self.dedup_days)
+            if self.dedup_days > 0
+            else None
+        )
 
         for url in filtered_links:
             if len(new_articles) >= max_to_fetch:
@@ -285,42 +450,224 @@ class NewsProfessor:
                 continue
 
             try:
-                content = fetch_text_content(url)
+                html = fetch_page(url, variants=variants, archive=self.html_archive)
+                meta = extract_head_metadata(html)
+                head_only = not full_body and meta.is_complete
+                content = None if head_only else extract_text_content(html)
             except Exception as e:
                 log_error(f"Ошибка парсинга {url}: {e}", alert=False)
                 continue
 
-            if not content:
+            if not head_only and not content:
                 continue
 
-            title, summary = split_title_and_summary(content)
             source = guess_source_from_url(url)
-            new_articles.append((url, title or "", summary or "", content, source))
+            if junk_stats is not None and not head_only:
+                reason = junk_reason(content, html)
+                junk_stats.record(source, reason is not None)
+                if reason is not None:
+                    log_info(f"Пропускаю мусорную страницу {url}: {reason}")
+                    continue
+                fingerprints[url] = (source, boilerplate_fingerprint(content))
+
+            # в дни без тела content остаётся NULL: тело не скачивали, а не «пустое»;
+            # его дописывает переразбор из архива HTML (python -m app.reprocess)
+            title, summary = title_and_summary_from_metadata(meta, content)
+            new_articles.append(
+                (url, title or "", summary or "", content, source, meta.published_at)
+            )
 
-        if not new_articles:
+        self._store_page_variants(variants)
+        if self.html_archive is not None:
+            log_info(self.html_archive.stats_message())
+        if junk_stats is not None:
+            new_articles = self._drop_repeated_boilerplate(new_articles, fingerprints, junk_stats)
+            for message in junk_stats.stats_messages():
+                log_info(message)
+        if dedup is not None:
+            # после отсева мусора: оригиналом может стать только статья, которая будет сохранена
+            new_articles = self._drop_near_duplicates(new_articles, dedup)
+
+        inserted: List[str] = []
+        if new_articles:
+            inserted = self._score_and_save(new_articles)
+        else:
             log_info("Новых статей для сохранения нет.")
-            return []
 
-        # TF-IDF ранжирование
+        if dedup is not None:
+            # оригиналы запоминаем, только если они действительно сохранены;
+            # публикации отпечатки не нужны — фоновый писатель пишет их без ожидания
+            future = dedup.flush(inserted, writer=self.db_writer)
+            if future is not None:
+                self._pending_writes.append(future)
+            if dedup.duplicates:
+                log_info(f"Почти-дубликатов отброшено: {dedup.duplicates}.")
+
+        return inserted
+
+    def _score_and_save(
+        self, new_articles: List[Tuple[str, str, str, Optional[str], str, Optional[str]]]
+    ) -> List[str]:
+        """
+        TF-IDF по пачке и сохранение одной транзакцией.
+        Возвращает URL, которые действительно добавлены в БД.
+        """
         texts_for_scoring = [
-            f"{title}\n{summary}\n{content}" for _, title, summary, content, _ in new_articles
+            f"{title}\n{summary}\n{content or ''}"
+            for _, title, summary, content, *_ in new_articles
         ]
         scores = compute_tfidf_scores(texts_for_scoring)
 
-        # Сохраняем в БД
-        for (url, title, summary, content, source), score in zip(new_articles, scores):
-            save_news(
-                self.db_path,
-                url=url,
-                title=title,
-                summary=summary,
-                content=content,
-                source=source,
-                score=score,
+        rows = [
+            (url, title, summary, content, source, score, published_at)
+            for (url, title, summary, content, source, published_at), score in zip(
+                new_articles, scores
+            )
+        ]
+        if self.db_writer is not None:
+            # ждём только вставку: по добавленным url сразу строится публикация
+            inserted = self.db_writer.save_news_many(rows, compress=self.compress_content).result()
+        else:
+            inserted = save_news_many(self.db_path, rows, compress=self.compress_content)
+
+        scores_by_url = {row[0]: row[5] for row in rows}
+        for url in inserted:
+            log_info(f"Сохранена новость: {url} (score={scores_by_url[url]:.3f})")
+        return inserted
+
+    def reprocess_from_archive(self, archive: HtmlArchive) -> int:
+        """
+        Переразбор и переоценка сохранённых новостей из архива HTML, без сети:
+        заново извлекаем title/summary/content и пересчитываем TF-IDF.
+        TF-IDF считается по дням fetched_at — как при ежедневных прогонах.
+        Возвращает число обновлённых новостей.
+        """
+        by_day: Dict[str, List[str]] = {}
+        for url, fetched_at in get_news_urls(self.db_path):
+            by_day.setdefault((fetched_at or "")[:10], []).append(url)
+
+        updated = 0
+        pending = []
+        for day, urls in by_day.items():
+            rows = []
+            for url, html in archive.iter_pages(urls):
+                try:
+                    meta = extract_head_metadata(html)
+                    content = extract_text_content(html)
+                except Exception as e:
+                    log_error(f"Ошибка переразбора {url}: {e}", alert=False)
+                    continue
+                if not content:
+                    continue
+                title, summary = title_and_summary_from_metadata(meta, content)
+                rows.append((url, title or "", summary or "", content, meta.published_at))
+
+            if not rows:
+                continue
+
+            scores = compute_tfidf_scores(
+                [f"{title}\n{summary}\n{content}" for _, title, summary, content, _ in rows]
             )
-            log_info(f"Сохранена новость: {url} (score={score:.3f})")
+            update_rows = [
+                (url, title, summary, content, score, published_at)
+                for (url, title, summary, content, published_at), score in zip(rows, scores)
+            ]
+            if self.db_writer is not None:
+                # пока пишется этот день, разбираем следующий
+                pending.append(
+                    self.db_writer.update_news_content(update_rows, compress=self.compress_content)
+                )
+            else:
+                update_news_content(self.db_path, update_rows, compress=self.compress_content)
+            updated += len(rows)
+            log_info(f"Переразбор из архива за {day or 'без даты'}: {len(rows)} новостей")
+
+        for future in pending:
+            future.result()  # ошибки записи — вызывающему
+        return updated
+
+    @staticmethod
+    def _drop_near_duplicates(
+        articles: List[Tuple[str, str, str, Optional[str], str, Optional[str]]],
+        dedup: NearDuplicateDetector,
+    ) -> List[Tuple[str, str, str, Optional[str], str, Optional[str]]]:
+        kept = []
+        for article in articles:
+            url, title, summary, content = article[:4]
+            # без тела сравниваем по заголовку и summary
+            original = dedup.check(url, f"{title}\n{summary if content is None else content}")
+            if original is not None:
+                log_info(f"Пропускаю почти-дубликат {url} (оригинал: {original})")
+                continue
+            kept.append(article)
+        return kept
+
+    @staticmethod
+    def _drop_repeated_boilerplate(
+        articles: List[Tuple[str, str, str, Optional[str], str, Optional[str]]],
+        fingerprints: Dict[str, Tuple[str, str]],
+        junk_stats: JunkStats,
+    ) -> List[Tuple[str, str, str, Optional[str], str, Optional[str]]]:
+        """
+        Один и тот же текст под многими URL одного источника — шаблон, а не статья:
+        отбрасываются все копии. Если URL меньше BOILERPLATE_MIN_URLS, это одна
+        статья под разными адресами — остаётся первая копия.
+        """
+        repeated = repeated_fingerprints(fingerprints.values())
+        seen = set()
+
+        kept = []
+        for article in articles:
+            url, source = article[0], article[4]
+            fingerprint = fingerprints.get(url)
+            if fingerprint in repeated:
+                junk_stats.record_junk(source)
+                log_info(f"Пропускаю повторяющийся шаблон источника {source}: {url}")
+                continue
+            if fingerprint is not None:
+                if fingerprint in seen:
+                    log_info(f"Пропускаю повтор статьи под другим URL: {url}")
+                    continue
+                seen.add(fingerprint)
+            kept.append(article)
+        return kept
+
+    def _load_page_variants(self) -> Optional[PageVariants]:
+        """
+        Выученные шаблоны лёгких AMP/print-версий (если фича включена).
+        """
+        if not self.light_variants:
+            return None
+        return PageVariants(templates=get_page_variants(self.db_path))
+
+    def _store_page_variants(self, variants: Optional[PageVariants]) -> None:
+        """
+        Запоминает новые шаблоны лёгких версий и пишет статистику байтов за прогон.
+        """
+        if variants is None:
+            return
+
+        # иначе следующий прогон снова начнёт с неработающего шаблона
+        for host in sorted(variants.invalidated):
+            delete_page_variant(self.db_path, host)
+            log_info(f"Лёгкая версия страниц для {host} больше не используется.")
+
+        for host, (template, ratio) in variants.learned.items():
+            save_page_variant(self.db_path, host, template, ratio)
+            log_info(f"Выучена лёгкая версия страниц для {host}: {template}")
 
-        return [url for url, *_ in new_articles]
+        log_info(
+            f"Лёгкие версии страниц: скачано {variants.bytes_downloaded // 1024} КБ, "
+            f"сэкономлено ≈{variants.bytes_saved // 1024} КБ."
+        )
+
+    def _translate_news_content(self, content: str) -> str:
+        """
+        Переводим только то, что попадёт в пост: заголовок и тело до BODY_MAX_LEN.
+        """
+        title, body = split_title_and_body(content)
+        title = self._translate(title)
+        return f"{title}\n{self._translate(body)}" if body else title
 
     def publish_top_news(self, new_urls: List[str], max_to_publish: int = 5) -> None:
         settings = get_settings()
@@ -367,9 +714,12 @@ class NewsProfessor:
             else:
                 source_tag = default_source_tag
 
+            if content is None:
+                # статья сохранена без тела (день подборок) — пост из заголовка и summary
+                content = f"{title or ''}\n{summary or ''}"
             msg = format_news_message(
                 url=url,
-                content=content,
+                content=self._translate_news_content(content),
                 topic_tag=topic_tag,
                 source_tag=source_tag,
             )
@@ -389,17 +739,17 @@ class NewsProfessor:
         if not new_urls:
             return []
 
-        rows = get_news_by_urls(self.db_path, new_urls)
+        # content для подборки не нужен — его не читаем
+        rows = get_news_by_urls(self.db_path, new_urls, columns=DIGEST_COLUMNS)
         if not rows:
             return []
 
-        # rows: (url, title, summary, content, source, score)
         items = []
-        for url, title, summary, content, source, score in rows:
+        for url, title, summary, source, score in rows:
             items.append(
                 {
                     "url": url,
-                    "title": (title or "Новый инструмент")[:120],
+                    "title": title or "",
                     "summary": (summary or "").strip()[:250],
                     "source": source or "other",
                     "score": score or 0.0,
@@ -410,8 +760,11 @@ class NewsProfessor:
         items.sort(key=lambda x: x["score"], reverse=True)
         items = items[:max_tools]
 
-        # добавляем use_case и source_tag
+        # переводим только попавшие в подборку title/summary, добавляем use_case и source_tag
         for it in items:
+            it["title"] = (self._translate(it["title"]) or "Новый инструмент")[:120]
+            it["summary"] = self._translate(it["summary"])[:250]
+
             src = it["source"]
             it["use_case"] = build_tool_use_case(src)
 
@@ -448,6 +801,7 @@ class NewsProfessor:
             links=all_links,
             substring=plan.substring,
             max_to_fetch=plan.max_fetch,
+            full_body=plan.full_body,
         )
 
         if weekday in {0, 1, 2, 3, 4}:
@@ -482,6 +836,8 @@ class NewsProfessor:
             )
             log_info("Воскресный дайджест недели опубликован.")
 
+        self._log_translation_stats()
+
     def run_monitoring(self, max_days_without_news: int = 3) -> None:
         """
         Простая задача мониторинга:
@@ -489,7 +845,9 @@ class NewsProfessor:
         - проверяет, когда была сохранена последняя новость;
         - если не было новых новостей дольше max_days_without_news дней — шлёт алерт.
         """
-        rows = get_last_news(self.db_path, limit=1)
+        rows = get_last_news(
+            self.db_path, limit=1, columns=("fetched_at", "fetched_ts"), readonly=True
+        )
         if not rows:
             msg = (
                 "Мониторинг: в базе новостей нет ни одной записи. "
@@ -498,26 +856,20 @@ class NewsProfessor:
             log_error(msg, alert=True)
             return
 
-        # rows: (url, title, summary, content, source, score, fetched_at)
-        _, _, _, _, _, _, fetched_at_str = rows[0]
+        fetched_at_str, fetched_ts = rows[0]
 
         if not fetched_at_str:
             log_warning("Мониторинг: у последней новости отсутствует fetched_at.")
             return
 
-        try:
-            last_dt = datetime.fromisoformat(fetched_at_str)
-        except Exception:  # pragma: no cover
+        if fetched_ts is None:
             log_warning(
                 f"Мониторинг: не удалось разобрать fetched_at='{fetched_at_str}'."
             )
             return
 
-        if last_dt.tzinfo is None:
-            last_dt = last_dt.replace(tzinfo=timezone.utc)
-
-        now_utc = datetime.now(timezone.utc)
-        delta = now_utc - last_dt
+        # fetched_ts — секунды Unix (UTC), сравнение без разбора строк и часовых поясов
+        delta = timedelta(seconds=time.time() - fetched_ts)
 
         if delta.days >= max_days_without_news:
             msg = (
@@ -542,12 +894,14 @@ class NewsProfessor:
             get_top_news_for_period,  # локальный импорт, чтобы избежать циклических
         )
 
-        rows = get_top_news_for_period(self.db_path, days_back=days_back, limit=limit)
+        rows = get_top_news_for_period(
+            self.db_path, days_back=days_back, limit=limit, columns=DIGEST_COLUMNS
+        )
         if not rows:
             return []
 
         items = []
-        for url, title, summary, content, source, score, fetched_at in rows:
+        for url, title, summary, source, score in rows:
             src = source or "other"
 
             if src in {"openai", "anthropic", "huggingface", "stability_ai", "google_ai_blog"}:
@@ -566,8 +920,8 @@ class NewsProfessor:
             items.append(
                 {
                     "url": url,
-                    "title": (title or "Событие недели")[:140],
-                    "summary": (summary or "").strip()[:260],
+                    "title": (self._translate(title or "") or "Событие недели")[:140],
+                    "summary": self._translate((summary or "").strip()[:260])[:260],
                     "source_tag": source_tag,
                     "score": score or 0.0,
                 }
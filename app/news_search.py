@@ -0,0 +1,157 @@
+# app/news_search.py
+"""
+Полнотекстовый поиск по архиву новостей:
+
+    python -m app.news_search kafka streams [--days 30] [--since 2025-01-01] [--until ...]
+    python -m app.news_search --raw '"apache kafka" OR redpanda'
+
+Ищет по title/summary/content рабочей БД (не по годовым архивам), ранжирует
+по bm25 и показывает сниппеты. Индекс пополняется при записи новостей,
+пересобирается командой: python -m app.db_tools fts-rebuild
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+
+from .config import get_settings
+from .db import NewsRecord, init_db, search_news
+from .logging_utils import log_error, setup_logging
+
+SEARCH_LIMIT = 20
+# Длина сниппета в словах
+SNIPPET_WORDS = 24
+
+WORD_PATTERN = re.compile(r"\w+")
+# слово и «*» префиксного поиска — в том числе после кавычки: "kafka"*
+QUERY_TERM_PATTERN = re.compile(r'(\w+)"?(\*?)')
+
+
+def to_fts_query(text: str) -> str:
+    """
+    Свободный текст → безопасный запрос FTS5: каждое слово в кавычках
+    (знаки вроде «c++» или «-» не ломают синтаксис), слова через AND,
+    «слово*» остаётся поиском по префиксу.
+    """
+    return " ".join(f'"{word}"{star}' for word, star in QUERY_TERM_PATTERN.findall(text))
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    Слова запроса в нижнем регистре для подсветки; префиксные — с «*» на конце.
+    Операторы FTS5 (AND/OR/NOT/NEAR) словами не считаются.
+    """
+    return [
+        word.lower() + star
+        for word, star in QUERY_TERM_PATTERN.findall(query)
+        if word not in ("AND", "OR", "NOT", "NEAR")
+    ]
+
+
+def _term_matches(word: str, terms: Sequence[str]) -> bool:
+    word = word.lower()
+    return any(
+        word.startswith(term[:-1]) if term.endswith("*") else word == term for term in terms
+    )
+
+
+def make_snippet(text: Optional[str], terms: Sequence[str], words: int = SNIPPET_WORDS) -> str:
+    """
+    Фрагмент text вокруг первого совпадения со словами запроса; совпадения — в [скобках].
+    Без совпадений — начало текста. Аналог snippet() из FTS5: индекс хранит только
+    токены, а content в news может быть сжат, поэтому фрагмент режется здесь.
+    """
+    tokens = list(WORD_PATTERN.finditer(text or ""))
+    if not tokens:
+        return ""
+
+    first = next((i for i, m in enumerate(tokens) if _term_matches(m.group(), terms)), 0)
+    start = max(0, min(first - words // 3, len(tokens) - words))
+    end = min(len(tokens), start + words)
+    fragment = text[tokens[start].start() : tokens[end - 1].end()]
+    fragment = WORD_PATTERN.sub(
+        lambda m: f"[{m.group()}]" if _term_matches(m.group(), terms) else m.group(),
+        fragment,
+    )
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(tokens) else ""
+    return " ".join(f"{prefix}{fragment}{suffix}".split())
+
+
+def snippet_for(record: NewsRecord, terms: Sequence[str]) -> str:
+    """
+    Сниппет из того поля, где нашлось совпадение: content, затем summary, затем title.
+    """
+    fields = (record.content, record.summary, record.title)
+    for text in fields:
+        if any(_term_matches(m.group(), terms) for m in WORD_PATTERN.finditer(text or "")):
+            return make_snippet(text, terms)
+    return make_snippet(next((text for text in fields if text), ""), terms)
+
+
+def _date_ts(value: str) -> int:
+    """YYYY-MM-DD (UTC) → секунды Unix — для окна по fetched_ts."""
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидается дата YYYY-MM-DD: {value!r}") from None
+    return int(day.replace(tzinfo=timezone.utc).timestamp())
+
+
+def format_hit(record: NewsRecord, terms: Sequence[str]) -> str:
+    return (
+        f"{(record.fetched_at or '')[:10]}  {record.source or '-'}  {record.title or record.url}\n"
+        f"    {record.url}\n"
+        f"    {snippet_for(record, terms)}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Полнотекстовый поиск по архиву новостей.")
+    parser.add_argument("query", nargs="+", help="слова для поиска (все должны встретиться)")
+    parser.add_argument(
+        "--raw", action="store_true", help="query — выражение FTS5 (фразы, OR, NOT, NEAR)"
+    )
+    parser.add_argument("--days", type=float, help="только за последние N дней")
+    parser.add_argument("--since", type=_date_ts, help="с даты YYYY-MM-DD включительно")
+    parser.add_argument("--until", type=_date_ts, help="до даты YYYY-MM-DD, не включая её")
+    parser.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    parser.add_argument("--db", help="путь к БД (по умолчанию DATABASE_PATH)")
+    args = parser.parse_args(argv)
+
+    text = " ".join(args.query)
+    query = text if args.raw else to_fts_query(text)
+    if not query:
+        log_error(f"Пустой поисковый запрос: {text!r}.", alert=False)
+        return 1
+
+    since = args.since
+    if args.days is not None:
+        since = max(since or 0, int(time.time() - args.days * 86400))
+
+    db_path = args.db or get_settings().database_path
+    init_db(db_path)
+    try:
+        records = search_news(
+            db_path, query, limit=args.limit, since_ts=since, until_ts=args.until
+        )
+    except sqlite3.OperationalError as exc:
+        # синтаксическая ошибка в --raw запросе
+        log_error(f"Ошибка поискового запроса {query!r}: {exc}", alert=False)
+        return 1
+
+    terms = query_terms(query)
+    for record in records:
+        print(format_hit(record, terms))
+    print(f"Найдено: {len(records)}.")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    setup_logging()  # pragma: no cover
+    sys.exit(main())  # pragma: no cover
@@ -0,0 +1,60 @@
+# app/reprocess.py
+"""
+Переразбор истории из архива HTML без повторного скачивания:
+
+    python -m app.reprocess [--archive html_archive.db]
+
+Заодно дописывает content новостей, сохранённых в дни подборок и дайджестов
+только по метаданным страницы (content = NULL).
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import List, Optional
+
+from .config import get_settings
+from .html_archive import HtmlArchive
+from .logging_utils import log_error, log_info, setup_logging
+from .news_professor import NewsProfessor
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Заново извлечь текст и пересчитать score новостей из архива HTML."
+    )
+    parser.add_argument(
+        "--archive",
+        help="путь к архиву HTML (по умолчанию NEWS_BOT_HTML_ARCHIVE)",
+    )
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    archive_path = args.archive or settings.html_archive_path
+    if not archive_path:
+        log_error("Архив HTML не задан: укажите --archive или NEWS_BOT_HTML_ARCHIVE.", alert=False)
+        return 1
+
+    archive = HtmlArchive(archive_path)
+    stats = archive.stats()
+    log_info(
+        f"Архив HTML: {stats['pages']} страниц для {stats['urls']} URL, "
+        f"{stats['bytes_raw'] // 1024} КБ → {stats['bytes_stored'] // 1024} КБ на диске."
+    )
+
+    professor = NewsProfessor(
+        db_path=settings.database_path,
+        compress_content=settings.compress_content,
+        db_writer=settings.db_writer,
+    )
+    try:
+        updated = professor.reprocess_from_archive(archive)
+    finally:
+        professor.close()
+    log_info(f"Переразбор из архива завершён: обновлено {updated} новостей.")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    setup_logging()  # pragma: no cover
+    sys.exit(main())  # pragma: no cover
@@ -1,8 +1,12 @@
+import signal
+
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 import pytz
 
 from .config import get_settings
+from .db import checkpoint_and_close
+from .db_tools import run_retention
 from .news_professor import NewsProfessor
 from .logging_utils import setup_logging, log_info, log_error
 
@@ -10,8 +14,11 @@ from .logging_utils import setup_logging, log_info, log_error
 def job_daily_news() -> None:
     try:
         settings = get_settings()
-        professor = NewsProfessor(db_path=settings.database_path)
-        professor.run_for_today()
+        professor = NewsProfessor.from_settings(settings)
+        try:
+            professor.run_for_today()
+        finally:
+            professor.close()
     except Exception as e:
         log_error(f"Критическая ошибка в job_daily_news: {e}", alert=True)
 
@@ -30,6 +37,18 @@ def job_monitoring() -> None:
         log_error(f"Критическая ошибка в job_monitoring: {e}", alert=True)
 
 
+def job_retention() -> None:
+    """
+    Ночная задача хранения: старые новости — в годовые архивы,
+    затем incremental_vacuum и ANALYZE рабочей БД (без полного VACUUM).
+    """
+    try:
+        settings = get_settings()
+        run_retention(settings.database_path, settings.retention_days, settings.archive_dir)
+    except Exception as e:
+        log_error(f"Критическая ошибка в job_retention: {e}", alert=True)
+
+
 def main() -> None:
     setup_logging()
 
@@ -45,11 +64,23 @@ def main() -> None:
     trigger_monitor = CronTrigger(hour=10, minute=0, timezone=moscow_tz)
     scheduler.add_job(job_monitoring, trigger_monitor, id="monitoring_job")
 
+    # Каждый день в 04:00 по Москве — архивирование и обслуживание БД
+    trigger_retention = CronTrigger(hour=4, minute=0, timezone=moscow_tz)
+    scheduler.add_job(job_retention, trigger_retention, id="retention_job")
+
     log_info(
         "Планировщик запущен. "
-        "Ежедневный запуск новостей в 09:00 и мониторинга в 10:00 (Europe/Moscow)."
+        "Ежедневный запуск новостей в 09:00, мониторинга в 10:00 "
+        "и обслуживания БД в 04:00 (Europe/Moscow)."
     )
-    scheduler.start()
+    # docker stop шлёт SIGTERM: останавливаемся штатно, дожидаясь текущих задач
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.shutdown())
+    try:
+        scheduler.start()
+    finally:
+        # WAL — в основной файл, чтобы на томе не остался news.db без своего -wal
+        checkpoint_and_close(get_settings().database_path)
+        log_info("Планировщик остановлен.")
 
 
 if __name__ == "__main__":
@@ -1,77 +1,177 @@
 # app/text_parser.py
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+import json
 import time
 import re
 
 import requests
 from requests import RequestException
 from bs4 import BeautifulSoup
-from deep_translator import GoogleTranslator
 
+from .html_archive import HtmlArchive
+from .logging_utils import log_warning
+from .translation import PLACEHOLDER_PATTERN, TranslationEngine, default_translation_engine
 
-# Удаляем невидимые/мусорные unicode-символы
-CLEAN_PATTERN = re.compile(
-    r"[\u200b\u200c\u200d\u200e\u200f"        # Zero-width chars
-    r"\ufeff"                                 # BOM
-    r"\uf0b7\uf02d\uf0a7\uf0fc"               # Bullet-like private-use chars
-    r"\xa0"                                   # non-breaking space
-    r"]+"
+
+# --- нормализация текста: unicode + пробелы за один проход --- #
+
+# невидимые символы — удаляем
+INVISIBLE_CHARS = (
+    "\u200b\u200c\u200d\u200e\u200f"  # Zero-width chars
+    "\u2060\u00ad"  # word joiner, soft hyphen
+    "\ufeff"  # BOM
+)
+# экзотические пробелы и «буллеты» из private-use — в обычный пробел
+SPACE_LIKE_CHARS = (
+    "\uf0b7\uf02d\uf0a7\uf0fc"  # Bullet-like private-use chars
+    "\xa0\u202f\u205f\u3000"  # non-breaking / wide spaces
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\t\v\f\r"
+)
+# юникодные разделители строк/абзацев — в перевод строки
+NEWLINE_LIKE_CHARS = "\u2028\u2029\x85"
+
+UNICODE_TABLE = str.maketrans(
+    {
+        **dict.fromkeys(INVISIBLE_CHARS, None),
+        **dict.fromkeys(SPACE_LIKE_CHARS, " "),
+        **dict.fromkeys(NEWLINE_LIKE_CHARS, "\n"),
+    }
 )
 
+_ODD_CHARS = re.escape(INVISIBLE_CHARS + SPACE_LIKE_CHARS + NEWLINE_LIKE_CHARS)
+
+# Регулярка находит только то, что нужно менять: серии из 2+ пробельных/мусорных
+# символов и одиночные «нестандартные» символы. Обычный одиночный пробел
+# и одиночный перевод строки не матчатся — на чистом тексте это один быстрый проход.
+NORMALIZE_PATTERN = re.compile(f"[ \\n{_ODD_CHARS}]{{2,}}|[{_ODD_CHARS}]")
+
+
+def _normalize_repl(match: re.Match) -> str:
+    run = match.group(0).translate(UNICODE_TABLE)
+    if "\n" in run:
+        return "\n"  # граница строки/абзаца сохраняется
+    return " " if run else ""
+
 
 def clean_unicode(text: str) -> str:
-    return CLEAN_PATTERN.sub(" ", text)
+    return text.translate(UNICODE_TABLE)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Нормализация за один проход регуляркой (str.translate — только на найденных кусках):
+    убирает мусорные unicode-символы, схлопывает пробелы внутри строк,
+    удаляет пустые строки и пробелы по краям строк, сохраняя переводы строк.
+    """
+    return NORMALIZE_PATTERN.sub(_normalize_repl, text).strip()
 
 
 # --- защита технических терминов от перевода --- #
 
-TECH_TERM_PATTERNS = [
-    re.compile(r"\bPython\b", re.IGNORECASE),
-    re.compile(r"\bAPI\b", re.IGNORECASE),
-    re.compile(r"\bCVE\b", re.IGNORECASE),
-    re.compile(r"\bZero[-\s]?Day\b", re.IGNORECASE),
-    re.compile(r"\bDocker\b", re.IGNORECASE),
-    re.compile(r"\bKafka\b", re.IGNORECASE),
-    re.compile(r"\bSpark\b", re.IGNORECASE),
-    re.compile(r"\bAirflow\b", re.IGNORECASE),
-    re.compile(r"\betc\b", re.IGNORECASE),
-    # при желании сюда легко добавить Docker, Kafka, etc.
-]
+# Базовый словарь терминов, которые не переводим. Пробел/дефис внутри термина
+# матчится гибко: "Zero-Day" ловит и "Zero Day", и "ZeroDay". Совпадение идёт
+# без учёта регистра, поэтому названия, совпадающие с обычными словами (Rust,
+# Swift, React…), сюда не входят — их добавляют через NEWS_BOT_TECH_TERMS_FILE.
+DEFAULT_TECH_TERMS = (
+    "Python", "API", "CVE", "Zero-Day", "Docker", "Kafka", "Spark", "Airflow", "etc",
+)
+
+# Разделитель внутри многословного термина (узел префиксного дерева)
+_TERM_SEPARATOR = " "
+_TERM_SPLIT_PATTERN = re.compile(r"[-\s]+")
 
 
-def _protect_tech_terms(text: str) -> tuple[str, dict[str, str]]:
+def load_tech_terms(path: str) -> List[str]:
     """
-    Заменяет технические термины плейсхолдерами, чтобы переводчик их не трогал.
-    Возвращает (новый_текст, словарь {плейсхолдер -> исходное_слово}).
+    Словарь терминов из файла: один термин на строку, # — комментарий.
     """
-    placeholders: dict[str, str] = {}
-    counter = 0
+    with open(path, encoding="utf-8") as fh:
+        lines = (line.split("#", 1)[0].strip() for line in fh)
+        return [line for line in lines if line]
 
-    def make_repl():
-        nonlocal counter
 
-        def _repl(match: re.Match) -> str:
-            nonlocal counter
-            placeholder = f"__TECH_TERM_{counter}__"
-            counter += 1
-            placeholders[placeholder] = match.group(0)
-            return placeholder
+def _term_tokens(term: str) -> List[str]:
+    tokens: List[str] = []
+    for i, word in enumerate(_TERM_SPLIT_PATTERN.split(term.strip().lower())):
+        if i:
+            tokens.append(_TERM_SEPARATOR)
+        tokens.extend(word)
+    return tokens
 
-        return _repl
 
-    for pattern in TECH_TERM_PATTERNS:
-        text = pattern.sub(make_repl(), text)
+def _trie_to_regex(node: dict) -> str:
+    """
+    Префиксное дерево → регулярка без перебора альтернатив по всем терминам:
+    на каждой позиции текста движок идёт по одной ветке дерева,
+    так что стоимость не зависит от размера словаря.
+    """
+    is_end = None in node
+    branches = []
+    for token in sorted(key for key in node if key is not None):
+        child = node[token]
+        head = r"[-\s]?" if token == _TERM_SEPARATOR else re.escape(token)
+        branches.append(head + _trie_to_regex(child))
+
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 and not is_end else "(?:" + "|".join(branches) + ")"
+    return body + "?" if is_end else body
+
+
+def build_tech_term_pattern(terms: Iterable[str]) -> re.Pattern:
+    """
+    Один скомпилированный автомат (регулярка по префиксному дереву) на весь словарь.
+    Ищет самое длинное совпадение целым словом, без учёта регистра.
+    """
+    trie: dict = {}
+    for term in terms:
+        tokens = _term_tokens(term)
+        if not tokens:
+            continue
+        node = trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[None] = True  # маркер конца термина
+
+    if not trie:
+        return re.compile(r"(?!x)x")  # пустой словарь — ничего не защищаем
+    return re.compile(r"(?<!\w)" + _trie_to_regex(trie) + r"(?!\w)", re.IGNORECASE)
+
+
+TECH_TERM_PATTERN = build_tech_term_pattern(DEFAULT_TECH_TERMS)
+
+
+def _protect_tech_terms(
+    text: str, pattern: Optional[re.Pattern] = None
+) -> tuple[str, dict[str, str]]:
+    """
+    Заменяет технические термины плейсхолдерами за один проход по тексту,
+    чтобы переводчик их не трогал.
+    Возвращает (новый_текст, словарь {плейсхолдер -> исходное_слово}).
+    """
+    placeholders: dict[str, str] = {}
 
+    def _repl(match: re.Match) -> str:
+        placeholder = f"__TECH_TERM_{len(placeholders)}__"
+        placeholders[placeholder] = match.group(0)
+        return placeholder
+
+    text = (pattern or TECH_TERM_PATTERN).sub(_repl, text)
     return text, placeholders
 
 
 def _restore_tech_terms(text: str, placeholders: dict[str, str]) -> str:
     """
-    Возвращает плейсхолдеры обратно в исходные термины.
+    Возвращает плейсхолдеры обратно в исходные термины одной регуляркой.
     """
-    for placeholder, original in placeholders.items():
-        text = text.replace(placeholder, original)
-    return text
+    if not placeholders:
+        return text
+    return PLACEHOLDER_PATTERN.sub(
+        lambda match: placeholders.get(match.group(0), match.group(0)), text
+    )
 
 
 def _download_with_retry(url: str, timeout: int = 10, max_attempts: int = 3) -> str:
@@ -96,20 +196,32 @@ def _download_with_retry(url: str, timeout: int = 10, max_attempts: int = 3) ->
                 raise RuntimeError(f"Не удалось загрузить контент {url}") from exc
 
 
-def translate_to_ru(text: str) -> str:
+def translate_to_ru(
+    text: str,
+    engine: Optional[TranslationEngine] = None,
+    tech_terms: Optional[re.Pattern] = None,
+) -> str:
     """
     Перевод текста на русский язык.
     Технические термины (Python, API, CVE, Zero-Day и т.п.) оставляем без перевода.
-    Если переводчик недоступен — возвращаем оригинал.
+    engine — TranslationEngine с кэшем/памятью переводов; по умолчанию — общий
+    для процесса движок без них (default_translation_engine).
+    tech_terms — паттерн из build_tech_term_pattern; по умолчанию — DEFAULT_TECH_TERMS.
+    Длинные тексты режутся под лимит провайдера и переводятся по кускам параллельно.
+    Текст уже на русском и «нетекстовые» куски (код, ссылки, CVE) не переводятся.
+    Если переводчик недоступен (или отключён предохранителем) — возвращаем оригинал.
     """
     # пустые строки не трогаем
     if not text.strip():
         return text
 
-    protected_text, placeholders = _protect_tech_terms(text)
+    if engine is None:
+        engine = default_translation_engine()
+
+    protected_text, placeholders = _protect_tech_terms(text, tech_terms)
 
     try:
-        translated = GoogleTranslator(source="auto", target="ru").translate(protected_text)
+        translated = engine.translate(protected_text, "ru")
     except Exception:
         # если deep_translator отвалился — безопасно вернуть исходный текст
         return text
@@ -118,16 +230,317 @@ def translate_to_ru(text: str) -> str:
     return translated
 
 
-def fetch_text_content(url: str, timeout: int = 10) -> Optional[str]:
+# --- облегчённые версии страниц (AMP / print) --- #
+
+# лёгкую версию запоминаем, только если она заметно меньше полной
+LIGHT_VARIANT_MAX_RATIO = 0.8
+
+
+@dataclass
+class PageVariants:
     """
-    Скачивает HTML и возвращает текстовый контент:
-    - достаёт <title> и вставляет первой строкой (если есть);
-    - удаляет <script>, <style>, <noscript>;
-    - возвращает текст без HTML-тегов;
-    - при HTTP-проблемах бросает RuntimeError.
+    Выученные шаблоны «лёгких» версий страниц (AMP / print) по хостам
+    и статистика скачанных байтов за прогон.
+    templates: {host -> (шаблон URL, во сколько раз полная версия тяжелее)}.
+    """
+
+    templates: Dict[str, Tuple[str, float]] = field(default_factory=dict)
+    learned: Dict[str, Tuple[str, float]] = field(default_factory=dict)
+    # хосты, чьи шаблоны перестали работать: их нужно удалить и из БД
+    invalidated: Set[str] = field(default_factory=set)
+    bytes_downloaded: int = 0
+    bytes_saved: int = 0
+
+    def learn(self, host: str, template: str, ratio: float) -> None:
+        self.templates[host] = (template, ratio)
+        self.learned[host] = (template, ratio)
+        self.invalidated.discard(host)
+
+    def invalidate(self, host: str) -> None:
+        self.templates.pop(host, None)
+        self.learned.pop(host, None)
+        self.invalidated.add(host)
+
+
+def _html_size(html: str) -> int:
+    return len(html.encode("utf-8"))
+
+
+def _head_html(html: str) -> str:
+    """
+    Возвращает только <head> страницы (всё до </head>), чтобы не парсить тяжёлое тело.
+    Если </head> не нашли — возвращаем документ целиком.
+    """
+    idx = html.lower().find("</head>")
+    return html if idx == -1 else html[: idx + len("</head>")]
+
+
+def find_light_variant_url(html: str, url: str) -> Optional[str]:
+    """
+    Ищет в <head> ссылку на облегчённую версию страницы:
+    <link rel="amphtml"> или <link rel="alternate" media="print">.
+    Возвращает абсолютный URL или None.
+    """
+    head = BeautifulSoup(_head_html(html), "lxml")
+
+    link = head.find("link", rel="amphtml", href=True)
+    if link is None:
+        link = head.find("link", rel="alternate", media="print", href=True)
+    if link is None:
+        return None
+
+    return urljoin(url, link["href"].strip())
+
+
+def canonical_url(html: str, url: str) -> Optional[str]:
+    """
+    Канонический адрес страницы из <head>: <link rel="canonical"> или og:url.
+    """
+    head = BeautifulSoup(_head_html(html), "lxml")
+    link = head.find("link", rel="canonical", href=True)
+    if link is not None and link["href"].strip():
+        return urljoin(url, link["href"].strip())
+    meta = head.find("meta", property="og:url", content=True)
+    if meta is not None and meta["content"].strip():
+        return urljoin(url, meta["content"].strip())
+    return None
+
+
+def _same_article(url: str, other: str) -> bool:
+    """Тот же адрес с точностью до схемы, www., регистра хоста и «/» в конце пути."""
+    parts, other_parts = urlsplit(url), urlsplit(other)
+
+    def host(p):
+        return p.netloc.lower().removeprefix("www.")
+
+    return (
+        host(parts) == host(other_parts)
+        and parts.path.rstrip("/") == other_parts.path.rstrip("/")
+        and parts.query == other_parts.query
+    )
+
+
+def _is_light_version_of(html: str, light_url: str, url: str) -> bool:
+    """
+    Лёгкой версии доверяем, только если её canonical/og:url указывает на саму
+    статью: иначе под URL статьи сохранился бы текст другой страницы.
+    """
+    canonical = canonical_url(html, light_url)
+    return canonical is not None and _same_article(canonical, url)
+
+
+def _variant_template(url: str, variant_url: str) -> Optional[str]:
+    """
+    Превращает пару (url, url лёгкой версии) в шаблон для других статей хоста:
+    "https://amp.example.com{path}/amp?amp=1" — хост лёгкой версии, путь статьи
+    с постоянным суффиксом и постоянные параметры, которые добавляются к query
+    каждой статьи. Свой query статьи в шаблон не попадает. Если query лёгкой
+    версии — не «query статьи + постоянные параметры», шаблона нет.
     """
+    parts = urlsplit(url)
+    variant_parts = urlsplit(variant_url)
+    path = parts.path.rstrip("/")
+    if not path or not variant_parts.path.startswith(path):
+        return None
+
+    if not parts.query:
+        extra = variant_parts.query
+    elif variant_parts.query == parts.query:
+        extra = ""
+    elif variant_parts.query.startswith(parts.query + "&"):
+        extra = variant_parts.query[len(parts.query) + 1 :]
+    else:
+        return None
+
+    suffix = variant_parts.path[len(path):]
+    template = f"{variant_parts.scheme}://{variant_parts.netloc}{{path}}{suffix}"
+    return f"{template}?{extra}" if extra else template
+
+
+def _apply_variant_template(template: str, url: str) -> str:
+    """URL лёгкой версии статьи: её путь и query, к query — параметры шаблона."""
+    parts = urlsplit(url)
+    variant = urlsplit(template.replace("{path}", parts.path.rstrip("/"), 1))
+    query = "&".join(q for q in (parts.query, variant.query) if q)
+    return urlunsplit((variant.scheme, variant.netloc, variant.path, query, ""))
+
+
+def _download_preferring_light_variant(url: str, timeout: int, variants: PageVariants) -> str:
+    """
+    Скачивает страницу, предпочитая лёгкую версию:
+    - если для хоста шаблон уже выучен — сразу идём на лёгкий URL;
+    - иначе качаем полную страницу и ищем в ней AMP/print-ссылку;
+      если лёгкая версия заметно меньше — запоминаем шаблон для хоста.
+    Лёгкая версия принимается, только если её canonical указывает на статью;
+    шаблон, давший недоступную или чужую страницу, забывается (и в БД).
+    """
+    host = urlsplit(url).netloc
+
+    known = variants.templates.get(host)
+    if known:
+        template, ratio = known
+        light_url = _apply_variant_template(template, url)
+        try:
+            html = _download_with_retry(light_url, timeout=timeout)
+        except RuntimeError:
+            log_warning(f"Лёгкая версия {light_url} недоступна, качаю полную страницу.")
+            variants.invalidate(host)
+        else:
+            size = _html_size(html)
+            variants.bytes_downloaded += size
+            if _is_light_version_of(html, light_url, url):
+                variants.bytes_saved += int(size * (ratio - 1))
+                return html
+            log_warning(f"Лёгкая версия {light_url} — не {url}, качаю полную страницу.")
+            variants.invalidate(host)
+
     html = _download_with_retry(url, timeout=timeout)
+    full_size = _html_size(html)
+    variants.bytes_downloaded += full_size
+
+    variant_url = find_light_variant_url(html, url)
+    template = _variant_template(url, variant_url) if variant_url else None
+    if not template:
+        return html
+
+    try:
+        light_html = _download_with_retry(variant_url, timeout=timeout)
+    except RuntimeError:
+        return html
+
+    light_size = _html_size(light_html)
+    variants.bytes_downloaded += light_size
+    if (
+        light_size
+        and light_size <= full_size * LIGHT_VARIANT_MAX_RATIO
+        and _is_light_version_of(light_html, variant_url, url)
+    ):
+        variants.learn(host, template, full_size / light_size)
+        return light_html
+
+    return html
+
+
+# --- метаданные из <head> (og:/meta/JSON-LD) --- #
+
+JSONLD_ARTICLE_TYPES = {"NewsArticle", "Article", "BlogPosting", "TechArticle", "ReportageNewsArticle"}
+
+
+@dataclass
+class PageMetadata:
+    """
+    Заголовок, описание и дата публикации, извлечённые только из <head>.
+    """
+
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    published_at: Optional[str] = None
+
+    @property
+    def is_complete(self) -> bool:
+        """Хватает ли метаданных, чтобы обойтись без разбора тела статьи."""
+        return bool(self.title and self.summary)
+
+
+def _meta_content(head: BeautifulSoup, *keys: str) -> Optional[str]:
+    """
+    Первое непустое content у <meta property=...> / <meta name=...> / <meta itemprop=...>.
+    """
+    for key in keys:
+        for attr in ("property", "name", "itemprop"):
+            tag = head.find("meta", attrs={attr: key, "content": True})
+            if tag and tag["content"].strip():
+                return clean_unicode(tag["content"]).strip()
+    return None
+
 
+def _iter_jsonld_objects(data):
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_jsonld_objects(item)
+    elif isinstance(data, dict):
+        yield data
+        yield from _iter_jsonld_objects(data.get("@graph"))
+
+
+def _jsonld_article(head: BeautifulSoup) -> dict:
+    """
+    Первый объект NewsArticle/Article/BlogPosting из JSON-LD в <head> (или {}).
+    """
+    for script in head.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+
+        for obj in _iter_jsonld_objects(data):
+            types = obj.get("@type")
+            types = types if isinstance(types, list) else [types]
+            if JSONLD_ARTICLE_TYPES.intersection(t for t in types if isinstance(t, str)):
+                return obj
+    return {}
+
+
+def extract_head_metadata(html: str) -> PageMetadata:
+    """
+    Дешёвое извлечение метаданных статьи — парсим только <head>:
+    - title: og:title → twitter:title → JSON-LD headline → <title>;
+    - summary: og:description → description → twitter:description → JSON-LD description;
+    - published_at: article:published_time → datePublished (meta / JSON-LD).
+    """
+    head = BeautifulSoup(_head_html(html), "lxml")
+    article = _jsonld_article(head)
+
+    def _jsonld(key: str) -> Optional[str]:
+        value = article.get(key)
+        if not isinstance(value, str):
+            return None
+        return clean_unicode(value).strip() or None
+
+    title = _meta_content(head, "og:title", "twitter:title") or _jsonld("headline")
+    if not title and head.title and head.title.string:
+        title = clean_unicode(head.title.string).strip() or None
+
+    summary = _meta_content(
+        head, "og:description", "description", "twitter:description"
+    ) or _jsonld("description")
+
+    published_at = _meta_content(head, "article:published_time", "datePublished") or _jsonld(
+        "datePublished"
+    )
+
+    return PageMetadata(title=title, summary=summary, published_at=published_at)
+
+
+def fetch_page(
+    url: str,
+    timeout: int = 10,
+    variants: Optional[PageVariants] = None,
+    archive: Optional[HtmlArchive] = None,
+) -> str:
+    """
+    Скачивает HTML страницы (при HTTP-проблемах бросает RuntimeError).
+    Если передан variants — предпочитаем лёгкие AMP/print-версии страниц
+    и копим в нём статистику скачанных байтов.
+    Если передан archive — скачанный HTML сохраняется в архив (для переразбора).
+    """
+    if variants is None:
+        html = _download_with_retry(url, timeout=timeout)
+    else:
+        html = _download_preferring_light_variant(url, timeout, variants)
+
+    if archive is not None:
+        archive.put(url, html)
+    return html
+
+
+def extract_text_content(html: str) -> Optional[str]:
+    """
+    Достаёт из HTML текстовый контент:
+    - достаёт <title> и вставляет первой строкой (если есть);
+    - удаляет <script>, <style>, <noscript>;
+    - возвращает текст без HTML-тегов.
+    """
     soup = BeautifulSoup(html, "lxml")
 
     # title
@@ -139,19 +552,26 @@ def fetch_text_content(url: str, timeout: int = 10) -> Optional[str]:
     for tag in soup(["script", "style", "noscript"]):
         tag.decompose()
 
-    text = soup.get_text(separator="\n", strip=True)
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-
-    if title_text:
-        if not lines or lines[0] != title_text:
-            lines.insert(0, title_text)
-
-    cleaned = "\n".join(lines)
-    cleaned = clean_unicode(cleaned)
+    cleaned = normalize_text(soup.get_text(separator="\n", strip=True))
 
-    # нормализуем двойные пробелы и обрезаем края
-    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip()
+    # заголовок — первой строкой (если страница не начинается с него)
+    title_text = normalize_text(title_text)
+    if title_text and cleaned.partition("\n")[0] != title_text:
+        cleaned = f"{title_text}\n{cleaned}" if cleaned else title_text
 
-    cleaned = translate_to_ru(cleaned)
+    # перевод здесь не делаем: скоринг идёт по оригиналу,
+    # а переводятся только публикуемые поля (см. NewsProfessor)
     return cleaned or None
 
+
+def fetch_text_content(
+    url: str,
+    timeout: int = 10,
+    variants: Optional[PageVariants] = None,
+) -> Optional[str]:
+    """
+    Скачивает HTML и возвращает текстовый контент (см. fetch_page и extract_text_content).
+    При HTTP-проблемах бросает RuntimeError.
+    """
+    html = fetch_page(url, timeout=timeout, variants=variants)
+    return extract_text_content(html)
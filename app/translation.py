@@ -0,0 +1,719 @@
+# app/translation.py
+from __future__ import annotations
+
+import bisect
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Callable, List, Optional, Tuple
+
+from deep_translator import GoogleTranslator
+
+from .db import (
+    get_cached_translation,
+    get_cached_translations,
+    put_cached_translation,
+    put_cached_translations,
+)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    Персистентный кэш переводов в SQLite.
+    Ключ — (sha256 защищённого текста, целевой язык), вытеснение — LRU по max_entries.
+    Копит статистику за прогон: попадания, промахи, сэкономленные символы.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 5000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.saved_chars = 0
+
+    def get(self, text: str, target: str) -> Optional[str]:
+        translated = get_cached_translation(self.db_path, text_hash(text), target)
+        if translated is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.saved_chars += len(text)
+        return translated
+
+    def put(self, text: str, target: str, translated: str) -> None:
+        put_cached_translation(
+            self.db_path, text_hash(text), target, translated, self.max_entries
+        )
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats_message(self) -> str:
+        return (
+            f"Кэш переводов: попаданий {self.hits} из {self.hits + self.misses} "
+            f"({self.hit_rate:.0%}), сэкономлено {self.saved_chars} символов."
+        )
+
+
+# --- память переводов (translation memory) по предложениям --- #
+
+# Плейсхолдеры тех-терминов, которые ставит text_parser._protect_tech_terms
+PLACEHOLDER_PATTERN = re.compile(r"__TECH_TERM_(\d+)__")
+
+# Делим текст на сегменты: по переводам строк и по концу предложения.
+# Разделители сохраняем (группа в split), чтобы собрать текст обратно как был.
+SEGMENT_SPLIT_PATTERN = re.compile(r"(\s*\n\s*|(?<=[.!?])\s+)")
+
+
+def split_segments(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Возвращает (сегменты, разделители): len(разделители) == len(сегменты) - 1.
+    """
+    parts = SEGMENT_SPLIT_PATTERN.split(text)
+    return parts[0::2], parts[1::2]
+
+
+def join_segments(segments: List[str], separators: List[str]) -> str:
+    out = [segments[0]]
+    for sep, seg in zip(separators, segments[1:]):
+        out.append(sep)
+        out.append(seg)
+    return "".join(out)
+
+
+def _normalize_placeholders(segment: str) -> Tuple[str, List[str]]:
+    """
+    Перенумеровывает плейсхолдеры внутри сегмента с нуля, чтобы одно и то же
+    предложение из разных статей давало один ключ в памяти переводов.
+    Возвращает (нормализованный сегмент, исходные номера по порядку).
+    """
+    originals: List[str] = []
+
+    def _repl(match: re.Match) -> str:
+        originals.append(match.group(1))
+        return f"__TECH_TERM_{len(originals) - 1}__"
+
+    return PLACEHOLDER_PATTERN.sub(_repl, segment), originals
+
+
+def _denormalize_placeholders(segment: str, originals: List[str]) -> str:
+    def _repl(match: re.Match) -> str:
+        idx = int(match.group(1))
+        number = originals[idx] if idx < len(originals) else match.group(1)
+        return f"__TECH_TERM_{number}__"
+
+    return PLACEHOLDER_PATTERN.sub(_repl, segment)
+
+
+class TranslationMemory:
+    """
+    Персистентная память переводов по сегментам (предложения / строки).
+    Повторяющиеся куски (футеры рассылок, дисклеймеры, био авторов) переводятся
+    один раз: в переводчик уходят только сегменты, которых ещё нет в памяти.
+    """
+
+    table = "translation_memory"
+
+    def __init__(self, db_path: str, max_entries: int = 50000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.segments_total = 0
+        self.segments_hit = 0
+        self.saved_chars = 0
+
+    def translate(
+        self,
+        text: str,
+        target: str,
+        translate_batch: Callable[[List[str]], List[str]],
+    ) -> str:
+        """
+        Переводит текст (уже с плейсхолдерами тех-терминов) по сегментам.
+        translate_batch получает список уникальных новых сегментов и возвращает
+        их переводы в том же порядке.
+        """
+        segments, separators = split_segments(text)
+
+        # (префикс, ключ, суффикс, исходные номера плейсхолдеров) для каждого сегмента
+        parsed = []
+        for seg in segments:
+            key = seg.strip()
+            lead = seg[: len(seg) - len(seg.lstrip())]
+            tail = seg[len(seg.rstrip()):] if key else ""
+            normalized, originals = _normalize_placeholders(key)
+            parsed.append((lead, normalized, tail, originals))
+
+        unique = list(dict.fromkeys(norm for _, norm, _, _ in parsed if norm))
+        hashes = {norm: text_hash(norm) for norm in unique}
+
+        found = get_cached_translations(
+            self.db_path, hashes.values(), target, table=self.table
+        )
+        memory = {norm: found[h] for norm, h in hashes.items() if h in found}
+
+        unseen = [norm for norm in unique if norm not in memory]
+        if unseen:
+            translated = translate_batch(unseen)
+            new_items = dict(zip(unseen, translated))
+            memory.update(new_items)
+            # сегменты, пропущенные мимо переводчика (уже на target, код, ссылки),
+            # не запоминаем: они не экономят запросов, а вытесняли бы настоящие переводы
+            learned = {hashes[norm]: tr for norm, tr in new_items.items() if tr != norm}
+            if learned:
+                put_cached_translations(
+                    self.db_path, learned, target, self.max_entries, table=self.table
+                )
+
+        self.segments_total += len(unique)
+        self.segments_hit += len(unique) - len(unseen)
+        unseen_set = set(unseen)
+        self.saved_chars += sum(len(norm) for norm in unique if norm not in unseen_set)
+
+        out = [
+            lead + _denormalize_placeholders(memory[norm], originals) + tail if norm else lead
+            for lead, norm, tail, originals in parsed
+        ]
+        return join_segments(out, separators)
+
+    def stats_message(self) -> str:
+        return (
+            f"Память переводов: найдено {self.segments_hit} из {self.segments_total} "
+            f"сегментов, сэкономлено {self.saved_chars} символов."
+        )
+
+
+# --- нарезка под лимит провайдера и параллельный перевод --- #
+
+# GoogleTranslator не принимает тексты длиннее ~5000 символов — берём с запасом
+PROVIDER_MAX_CHARS = 4500
+TRANSLATION_WORKERS = 4
+
+
+def _split_long_segment(segment: str, max_chars: int) -> List[str]:
+    """
+    Режет слишком длинное предложение по пробелам (в крайнем случае — жёстко).
+    Склейка кусков без разделителей даёт исходный сегмент.
+    """
+    pieces: List[str] = []
+    current = ""
+    for word in re.split(r"(?<=\s)", segment):
+        if current and len(current) + len(word) > max_chars:
+            pieces.append(current)
+            current = ""
+        while len(word) > max_chars:
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        current += word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_chars: int = PROVIDER_MAX_CHARS) -> Tuple[List[str], List[str]]:
+    """
+    Режет текст на куски не длиннее max_chars по границам абзацев/предложений.
+    Возвращает (куски, разделители между ними) — как split_segments.
+    """
+    segments, separators = split_segments(text)
+
+    # (текст, разделитель после него)
+    units: List[Tuple[str, str]] = []
+    for seg, sep in zip(segments, separators + [""]):
+        if len(seg) <= max_chars:
+            units.append((seg, sep))
+            continue
+        pieces = _split_long_segment(seg, max_chars)
+        units.extend((piece, "") for piece in pieces[:-1])
+        units.append((pieces[-1], sep))
+
+    chunks: List[str] = []
+    chunk_separators: List[str] = []
+    current = ""
+    pending_sep = ""
+    started = False
+    for unit, sep in units:
+        if started and len(current) + len(pending_sep) + len(unit) > max_chars:
+            chunks.append(current)
+            chunk_separators.append(pending_sep)
+            current = unit
+        else:
+            current = current + pending_sep + unit if started else unit
+        started = True
+        pending_sep = sep
+    chunks.append(current)
+
+    return chunks, chunk_separators
+
+
+def _keep_outer_whitespace(translate_one: Callable[[str], str], text: str) -> str:
+    """
+    Переводчики срезают пробелы по краям — возвращаем их на место.
+    """
+    core = text.strip()
+    if not core:
+        return text
+    lead = text[: len(text) - len(text.lstrip())]
+    tail = text[len(text.rstrip()):]
+    return lead + translate_one(core) + tail
+
+
+# --- бэкенды переводчика, ограничение частоты и предохранитель --- #
+
+
+class TranslatorBackend:
+    """
+    Интерфейс «сырого» переводчика: один кусок текста (до лимита провайдера) → перевод.
+    """
+
+    name = "base"
+
+    def translate(self, text: str) -> str:  # pragma: no cover
+        raise NotImplementedError
+
+
+class OfflineBackend(TranslatorBackend):
+    """
+    Локальная замена провайдера для тестов, бенчмарков и прогонов без сети.
+    По умолчанию возвращает текст как есть; delay имитирует сетевую задержку.
+    """
+
+    name = "offline"
+
+    def __init__(self, transform: Optional[Callable[[str], str]] = None, delay: float = 0.0):
+        self.transform = transform
+        self.delay = delay
+
+    def translate(self, text: str) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        return self.transform(text) if self.transform is not None else text
+
+
+class GoogleBackend(TranslatorBackend):
+    """
+    Бэкенд Google через deep_translator.
+    GoogleTranslator меняет своё состояние на каждом запросе, поэтому экземпляр
+    переиспользуется в пределах потока, а не создаётся заново на каждый вызов.
+    """
+
+    name = "google"
+
+    def __init__(self, target: str = "ru"):
+        self.target = target
+        self._local = threading.local()
+
+    def translate(self, text: str) -> str:
+        translator = getattr(self._local, "translator", None)
+        if translator is None:
+            translator = GoogleTranslator(source="auto", target=self.target)
+            self._local.translator = translator
+        return translator.translate(text)
+
+
+TRANSLATOR_BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    OfflineBackend.name: OfflineBackend,
+}
+
+
+def make_translator_backend(name: str) -> TranslatorBackend:
+    """
+    Бэкенд переводчика по имени из настроек (NEWS_BOT_TRANSLATOR).
+    """
+    try:
+        return TRANSLATOR_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Неизвестный бэкенд переводчика: {name}") from None
+
+
+class TranslationUnavailable(RuntimeError):
+    """
+    Предохранитель разомкнут: переводчик отключён до конца прогона.
+    """
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов «ведро токенов»: rate запросов в секунду,
+    допускает всплеск до capacity запросов. Потокобезопасный.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.waited = 0.0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.waited += wait
+            self.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель: после max_failures ошибок подряд размыкается до конца прогона,
+    и следующие запросы к переводчику не отправляются вовсе.
+    """
+
+    def __init__(self, max_failures: int = 5):
+        self.max_failures = max_failures
+        self.failures = 0
+        self.skipped = 0
+        self.is_open = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.is_open:
+                self.skipped += 1
+            return not self.is_open
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.max_failures:
+                self.is_open = True
+
+    def stats_message(self) -> Optional[str]:
+        if not self.is_open:
+            return None
+        return (
+            f"Переводчик отключён до конца прогона после {self.max_failures} ошибок подряд, "
+            f"пропущено запросов: {self.skipped}."
+        )
+
+
+# верхние границы корзин гистограммы задержек, мс
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек запросов к одному бэкенду переводчика.
+    """
+
+    def __init__(self, name: str, bounds: Tuple[int, ...] = LATENCY_BUCKETS_MS):
+        self.name = name
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, latency_ms)] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def stats_message(self) -> Optional[str]:
+        if not self.total:
+            return None
+        labels = [f"≤{bound} мс" for bound in self.bounds] + [f">{self.bounds[-1]} мс"]
+        buckets = ", ".join(
+            f"{label}: {count}" for label, count in zip(labels, self.counts) if count
+        )
+        return f"Переводчик {self.name}: {self.total} запросов ({buckets})."
+
+
+# --- определение языка: что переводить не нужно --- #
+
+# URL, CVE-идентификаторы и плейсхолдеры тех-терминов — не «текст» для переводчика
+NON_LINGUISTIC_PATTERN = re.compile(
+    r"https?://\S+|www\.\S+|\bCVE-\d{4}-\d{4,}\b|__TECH_TERM_\d+__",
+    re.IGNORECASE,
+)
+CYRILLIC_PATTERN = re.compile(r"[а-яё]", re.IGNORECASE)
+
+# минимум букв и их доля среди непробельных символов, чтобы считать сегмент текстом
+MIN_LETTERS = 2
+MIN_LETTER_RATIO = 0.5
+# доля кириллицы среди букв, начиная с которой текст считаем русским
+CYRILLIC_RATIO = 0.5
+
+
+def detect_language(text: str) -> Optional[str]:
+    """
+    Быстрое локальное определение языка по письменности.
+    Возвращает "ru" (кириллица), "other" или None — если это не текст
+    (код, ссылки, CVE-идентификаторы, числа).
+    """
+    stripped = NON_LINGUISTIC_PATTERN.sub(" ", text)
+    chars = "".join(stripped.split())
+    letters = sum(1 for ch in chars if ch.isalpha())
+    if letters < MIN_LETTERS or letters < len(chars) * MIN_LETTER_RATIO:
+        return None
+
+    cyrillic = len(CYRILLIC_PATTERN.findall(stripped))
+    return "ru" if cyrillic >= letters * CYRILLIC_RATIO else "other"
+
+
+class LanguageFilter:
+    """
+    Пропускает мимо переводчика тексты уже на целевом языке и «нетекстовые»
+    сегменты. Считает пропуски за прогон. Потокобезопасный.
+    """
+
+    def __init__(self, target: str = "ru"):
+        self.target = target
+        self.skipped_target = 0
+        self.skipped_non_linguistic = 0
+        self.saved_chars = 0
+        self._lock = threading.Lock()
+
+    def needs_translation(self, text: str) -> bool:
+        language = detect_language(text)
+        if language is not None and language != self.target:
+            return True
+
+        with self._lock:
+            if language is None:
+                self.skipped_non_linguistic += 1
+            else:
+                self.skipped_target += 1
+            self.saved_chars += len(text)
+        return False
+
+    def stats_message(self) -> Optional[str]:
+        if not (self.skipped_target or self.skipped_non_linguistic):
+            return None
+        return (
+            f"Без перевода: уже на языке «{self.target}» — {self.skipped_target}, "
+            f"код/ссылки/CVE — {self.skipped_non_linguistic}, "
+            f"сэкономлено {self.saved_chars} символов."
+        )
+
+
+class TranslationEngine:
+    """
+    Перевод статей поверх бэкенда переводчика (TranslatorBackend):
+    - сначала кэш целых текстов, затем (если есть) память переводов по предложениям;
+    - тексты длиннее лимита провайдера режутся на куски по абзацам/предложениям;
+    - куски переводятся параллельно ограниченным пулом и собираются по порядку;
+    - тексты/сегменты уже на целевом языке и «нетекстовые» в переводчик не уходят;
+    - запросы к бэкенду проходят через ограничитель частоты и предохранитель;
+    - копит задержку перевода на каждый текст (мс) и гистограмму задержек бэкенда.
+    """
+
+    def __init__(
+        self,
+        backend: TranslatorBackend,
+        cache: Optional[TranslationCache] = None,
+        memory: Optional[TranslationMemory] = None,
+        max_chars: int = PROVIDER_MAX_CHARS,
+        max_workers: int = TRANSLATION_WORKERS,
+        rate_limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        language_filter: Optional[LanguageFilter] = None,
+    ):
+        self.backend = backend
+        self.cache = cache
+        self.memory = memory
+        self.max_chars = max_chars
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker
+        self.language_filter = language_filter
+        self.histogram = LatencyHistogram(backend.name)
+        self.latencies_ms: List[float] = []
+        # пул потоков движка: создаётся при первом параллельном переводе, живёт до close()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._local = threading.local()
+
+    def translate_one(self, text: str) -> str:
+        """
+        Один запрос к бэкенду: предохранитель → ограничитель частоты → замер задержки.
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            raise TranslationUnavailable(f"Переводчик {self.backend.name} отключён")
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        started = time.perf_counter()
+        try:
+            translated = self.backend.translate(text)
+        except Exception:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise
+        finally:
+            self.histogram.record((time.perf_counter() - started) * 1000)
+
+        if self.breaker is not None:
+            self.breaker.record_success()
+        return translated
+
+    def _needs_translation(self, text: str) -> bool:
+        return self.language_filter is None or self.language_filter.needs_translation(text)
+
+    def _cacheable(self, text: str, translated: str) -> bool:
+        """
+        В кэш кладём только настоящие переводы: офлайн-бэкенд и «перевод», равный
+        исходнику, иначе отравили бы кэш для следующего прогона с живым переводчиком.
+        """
+        return (
+            self.cache is not None
+            and self.backend.name != OfflineBackend.name
+            and translated != text
+        )
+
+    def translate(self, text: str, target: str = "ru") -> str:
+        if not self._needs_translation(text):
+            return text
+
+        started = time.perf_counter()
+        try:
+            translated = self.cache.get(text, target) if self.cache is not None else None
+            if translated is None:
+                if self.memory is not None:
+                    translated = self.memory.translate(text, target, self.translate_segments)
+                else:
+                    translated = self.translate_text(text)
+
+                if self._cacheable(text, translated):
+                    self.cache.put(text, target, translated)
+            return translated
+        finally:
+            self.latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    def _map(self, func: Callable, items: List) -> List:
+        """
+        Общий для движка пул потоков; pool.map сохраняет порядок результатов.
+        Из потока самого пула (кусок длинного сегмента) — последовательно:
+        задачи, поставленные в занятый пул изнутри него, могли бы не дождаться потока.
+        """
+        if len(items) <= 1 or getattr(self._local, "in_pool", False):
+            return [func(item) for item in items]
+        return list(self._pool().map(func, items))
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, self.max_workers),
+                    thread_name_prefix="translation",
+                    initializer=self._mark_pool_thread,
+                )
+            return self._executor
+
+    def _mark_pool_thread(self) -> None:
+        self._local.in_pool = True
+
+    def close(self) -> None:
+        """
+        Останавливает пул потоков; следующий параллельный перевод создаст новый.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def translate_text(self, text: str) -> str:
+        """
+        Один текст: режем под лимит провайдера, куски переводим параллельно.
+        """
+        if len(text) <= self.max_chars:
+            return _keep_outer_whitespace(self.translate_one, text)
+
+        chunks, separators = chunk_text(text, self.max_chars)
+        translated = self._map(partial(_keep_outer_whitespace, self._translate_chunk), chunks)
+        return join_segments(translated, separators)
+
+    def _translate_chunk(self, chunk: str) -> str:
+        return self.translate_one(chunk) if self._needs_translation(chunk) else chunk
+
+    def _translate_group(self, group: List[str]) -> List[str]:
+        if len(group) == 1:
+            return [self.translate_text(group[0])]
+
+        translated = self.translate_one("\n".join(group)).split("\n")
+        if len(translated) == len(group):
+            return translated
+        # переводчик «съел» или добавил строки — переводим по одному
+        return [self.translate_one(segment) for segment in group]
+
+    def translate_segments(self, segments: List[str]) -> List[str]:
+        """
+        Список сегментов (для памяти переводов): склеиваем в запросы через
+        перевод строки под лимит провайдера, запросы отправляем параллельно.
+        """
+        pending = [segment for segment in segments if self._needs_translation(segment)]
+
+        groups: List[List[str]] = []
+        size = 0
+        for segment in pending:
+            if groups and size + 1 + len(segment) <= self.max_chars:
+                groups[-1].append(segment)
+                size += 1 + len(segment)
+            else:
+                groups.append([segment])
+                size = len(segment)
+
+        results = self._map(self._translate_group, groups)
+        translated = dict(zip(pending, (item for group in results for item in group)))
+        return [translated.get(segment, segment) for segment in segments]
+
+    def stats_messages(self) -> List[str]:
+        messages = []
+        if self.cache is not None:
+            messages.append(self.cache.stats_message())
+        if self.memory is not None:
+            messages.append(self.memory.stats_message())
+        if self.latencies_ms:
+            ordered = sorted(self.latencies_ms)
+            p50 = ordered[len(ordered) // 2]
+            messages.append(
+                f"Перевод: {len(ordered)} текстов, задержка p50={p50:.0f} мс, "
+                f"max={ordered[-1]:.0f} мс."
+            )
+        for extra in (
+            self.histogram.stats_message(),
+            self.breaker.stats_message() if self.breaker is not None else None,
+            self.language_filter.stats_message() if self.language_filter is not None else None,
+        ):
+            if extra:
+                messages.append(extra)
+        return messages
+
+
+@lru_cache(maxsize=1)
+def default_translation_engine() -> TranslationEngine:
+    """
+    Общий движок для translate_to_ru без явного engine: создаётся при первом
+    вызове, дальше переиспользуется вместе с клиентом Google (по потокам).
+    """
+    return TranslationEngine(GoogleBackend(), language_filter=LanguageFilter())
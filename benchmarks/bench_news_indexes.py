@@ -0,0 +1,126 @@
+# benchmarks/bench_news_indexes.py
+"""
+Бенчмарк индексов news на синтетической БД:
+планы и время запросов до миграций схемы (без индексов) и после них.
+
+Запуск: python -m benchmarks.bench_news_indexes [число_строк]
+"""
+from __future__ import annotations
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.db import _create_news_table, _create_simhash_table, _migration_v2_epoch, init_db
+
+SOURCES = ("openai", "python_org", "databricks", "the_hacker_news", "github_blog", "other")
+# доля повторяющихся url — они появлялись, пока INSERT OR IGNORE ничего не игнорировал
+DUPLICATE_SHARE = 0.01
+
+
+def build_db(path: str, rows: int) -> None:
+    rnd = random.Random(42)
+    now = datetime.now(timezone.utc)
+    with sqlite3.connect(path) as conn:
+        _create_news_table(conn)
+
+        def generate():
+            for i in range(rows):
+                n = rnd.randrange(i) if i and rnd.random() < DUPLICATE_SHARE else i
+                fetched_at = now - timedelta(seconds=(rows - i) * 60)
+                yield (
+                    f"https://example.com/news/{n}",
+                    f"Title {n}",
+                    f"Summary of article {n}",
+                    f"Content of article {n}. " * 10,
+                    rnd.choice(SOURCES),
+                    rnd.random(),
+                    fetched_at.isoformat(),
+                )
+
+        conn.executemany(
+            """
+            INSERT INTO news (url, title, summary, content, source, score, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?);
+            """,
+            generate(),
+        )
+    conn.close()
+
+
+def queries(rows: int):
+    since = int(time.time()) - 7 * 86400
+    url = f"https://example.com/news/{rows // 2}"
+    return {
+        "link_exists": ("SELECT 1 FROM news WHERE url = ? LIMIT 1;", (url,)),
+        "get_news_by_urls": (
+            "SELECT url, title, summary, source, score FROM news WHERE url IN (?, ?, ?);",
+            (url, f"https://example.com/news/{rows - 1}", "https://missing"),
+        ),
+        "top_for_period": (
+            """
+            SELECT url, title, summary, source, score FROM news
+            WHERE fetched_ts >= ?
+            ORDER BY score DESC, fetched_ts DESC
+            LIMIT 8;
+            """,
+            (since,),
+        ),
+        "count_for_period": ("SELECT COUNT(*) FROM news WHERE fetched_ts >= ?;", (since,)),
+    }
+
+
+def measure(path: str, rows: int, label: str, number: int = 20) -> None:
+    print(f"--- {label} ---")
+    with sqlite3.connect(path) as conn:
+        for name, (sql, params) in queries(rows).items():
+            plan = "; ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+            start = time.perf_counter()
+            for _ in range(number):
+                conn.execute(sql, params).fetchall()
+            elapsed = (time.perf_counter() - start) / number * 1000
+            print(f"{name:>17}: {elapsed:9.3f} мс  | {plan}")
+    conn.close()
+
+
+def run(rows: int = 500_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "news.db")
+        start = time.perf_counter()
+        build_db(path, rows)
+        print(f"Синтетическая БД: {rows} строк за {time.perf_counter() - start:.1f} с")
+
+        # «до»: те же колонки, что после миграций, но без индексов
+        with sqlite3.connect(path) as conn:
+            _create_simhash_table(conn)
+            _migration_v2_epoch(conn)
+            for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = 'news' AND sql IS NOT NULL;"
+            ).fetchall():
+                conn.execute(f"DROP INDEX {name};")
+        conn.close()
+        measure(path, rows, "без индексов")
+
+        start = time.perf_counter()
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA user_version = 0;")
+        conn.close()
+        init_db(path)
+        with sqlite3.connect(path) as conn:
+            (left,) = conn.execute("SELECT COUNT(*) FROM news;").fetchone()
+        conn.close()
+        print(
+            f"Миграции схемы: {time.perf_counter() - start:.1f} с, "
+            f"удалено дубликатов url: {rows - left}"
+        )
+
+        measure(path, rows, "после миграций")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,68 @@
+# benchmarks/bench_text_normalization.py
+"""
+Бенчмарк очистки текста на больших страницах:
+старая многопроходная очистка из extract_text_content против normalize_text.
+
+Запуск: python -m benchmarks.bench_text_normalization [размер_в_КБ ...]
+"""
+from __future__ import annotations
+
+import re
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+from app.text_parser import normalize_text
+
+LEGACY_CLEAN_PATTERN = re.compile(
+    r"[\u200b\u200c\u200d\u200e\u200f\ufeff\uf0b7\uf02d\uf0a7\uf0fc\xa0]+"
+)
+
+# «чистая» вёрстка и вёрстка с &nbsp; / zero-width символами
+BLOCKS = {
+    "clean": (
+        '<div class="post"><h2>Kafka 4.0 ships KRaft</h2>'
+        '<p>The ZooKeeper mode is gone. Upgrade <a href="/x">notes</a> are in the docs.</p>'
+        "<ul><li>Item one</li><li>Item two</li></ul></div>\n"
+    ),
+    "messy": (
+        '<div class="post"><h2>Kafka&nbsp;4.0 ships&nbsp; KRaft</h2>'
+        "<p>The ZooKeeper&#8203; mode is gone.\t Upgrade <a>notes</a>&nbsp;are in the docs.</p>"
+        "<ul><li>Item&#8203;one&nbsp;</li><li>&nbsp;Item two</li></ul></div>\n"
+    ),
+}
+
+
+def legacy_normalize(text: str) -> str:
+    """
+    Очистка в том виде, как она была в extract_text_content.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    cleaned = "\n".join(lines)
+    cleaned = LEGACY_CLEAN_PATTERN.sub(" ", cleaned)
+    return re.sub(r"\s{2,}", " ", cleaned).strip()
+
+
+def make_page_text(kind: str, size_kb: int) -> str:
+    block = BLOCKS[kind]
+    html = "<html><body>" + block * (size_kb * 1024 // len(block) + 1) + "</body></html>"
+    return BeautifulSoup(html, "lxml").get_text(separator="\n", strip=True)
+
+
+def run(sizes_kb=(100, 1000, 5000), number: int = 5) -> None:
+    for kind in BLOCKS:
+        for size_kb in sizes_kb:
+            text = make_page_text(kind, size_kb)
+            legacy = min(timeit.repeat(lambda: legacy_normalize(text), number=number, repeat=3))
+            fused = min(timeit.repeat(lambda: normalize_text(text), number=number, repeat=3))
+            print(
+                f"{kind:>5} {size_kb:>6} КБ: старая очистка {legacy / number * 1000:8.1f} мс "
+                f"({legacy_normalize(text).count(chr(10)) + 1} строк), "
+                f"normalize_text {fused / number * 1000:8.1f} мс "
+                f"({normalize_text(text).count(chr(10)) + 1} строк)"
+            )
+
+
+if __name__ == "__main__":
+    run(tuple(int(arg) for arg in sys.argv[1:]) or (100, 1000, 5000))
@@ -1,5 +1,17 @@
 import pytest
 from app.config import Settings, get_settings
+from app.translation import default_translation_engine
+
+
+@pytest.fixture(autouse=True)
+def fresh_default_translation_engine():
+    """
+    Общий движок перевода держит клиент переводчика, созданный в первом вызове:
+    каждый тест начинает с нового, чтобы подмены GoogleTranslator не протекали.
+    """
+    default_translation_engine.cache_clear()
+    yield
+    default_translation_engine.cache_clear()
 
 
 @pytest.fixture
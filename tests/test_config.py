@@ -18,3 +18,71 @@ def test_settings_from_env_missing_vars_raises(monkeypatch):
 
     with pytest.raises(RuntimeError):
         cfg.Settings.from_env()
+
+
+def test_settings_from_env_light_variants_flag(monkeypatch):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "chat")
+
+    monkeypatch.delenv("NEWS_BOT_LIGHT_VARIANTS", raising=False)
+    assert cfg.Settings.from_env().light_variants is False
+
+    monkeypatch.setenv("NEWS_BOT_LIGHT_VARIANTS", "1")
+    assert cfg.Settings.from_env().light_variants is True
+
+
+def test_settings_from_env_translator_options(monkeypatch):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "chat")
+    monkeypatch.setenv("NEWS_BOT_TRANSLATOR", "offline")
+    monkeypatch.setenv("NEWS_BOT_TRANSLATOR_RATE_LIMIT", "2.5")
+    monkeypatch.setenv("NEWS_BOT_TRANSLATOR_MAX_FAILURES", "3")
+
+    settings = cfg.Settings.from_env()
+
+    assert settings.translator_backend == "offline"
+    assert settings.translator_rate_limit == 2.5
+    assert settings.translator_max_failures == 3
+    assert settings.tech_terms_file is None
+
+    monkeypatch.setenv("NEWS_BOT_TECH_TERMS_FILE", "/etc/news_bot/terms.txt")
+    assert cfg.Settings.from_env().tech_terms_file == "/etc/news_bot/terms.txt"
+
+
+def test_settings_from_env_junk_filter_flag(monkeypatch):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "chat")
+
+    for name in ("NEWS_BOT_JUNK_FILTER", "NEWS_BOT_DEDUP_DAYS", "NEWS_BOT_HTML_ARCHIVE"):
+        monkeypatch.delenv(name, raising=False)
+    # новые возможности по умолчанию выключены — как в NewsProfessor.__init__
+    assert cfg.Settings.from_env().junk_filter is False
+    assert cfg.Settings.from_env().dedup_days == 0
+    monkeypatch.setenv("NEWS_BOT_DEDUP_DAYS", "3")
+    assert cfg.Settings.from_env().dedup_days == 3
+    assert cfg.Settings.from_env().html_archive_path is None
+
+    monkeypatch.setenv("NEWS_BOT_HTML_ARCHIVE", "html_archive.db")
+    assert cfg.Settings.from_env().html_archive_path == "html_archive.db"
+
+    monkeypatch.setenv("NEWS_BOT_JUNK_FILTER", "1")
+    assert cfg.Settings.from_env().junk_filter is True
+
+    monkeypatch.delenv("NEWS_BOT_COMPRESS_CONTENT", raising=False)
+    monkeypatch.delenv("NEWS_BOT_DB_WRITER", raising=False)
+    assert cfg.Settings.from_env().compress_content is False
+    monkeypatch.setenv("NEWS_BOT_COMPRESS_CONTENT", "1")
+    assert cfg.Settings.from_env().compress_content is True
+
+    assert cfg.Settings.from_env().db_writer is False
+    monkeypatch.setenv("NEWS_BOT_DB_WRITER", "1")
+    assert cfg.Settings.from_env().db_writer is True
+
+    monkeypatch.delenv("NEWS_BOT_RETENTION_DAYS", raising=False)
+    monkeypatch.delenv("NEWS_BOT_ARCHIVE_DIR", raising=False)
+    assert cfg.Settings.from_env().retention_days == 0
+    assert cfg.Settings.from_env().archive_dir is None
+    monkeypatch.setenv("NEWS_BOT_RETENTION_DAYS", "365")
+    monkeypatch.setenv("NEWS_BOT_ARCHIVE_DIR", "/data/archive")
+    assert cfg.Settings.from_env().retention_days == 365
+    assert cfg.Settings.from_env().archive_dir == "/data/archive"
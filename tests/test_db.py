@@ -1,6 +1,10 @@
 # tests/test_db.py
 import sqlite3
+import time
 from typing import List, Tuple
+
+import pytest
+
 from app.config import get_settings
 from app.db import (
     get_last_news,
@@ -260,3 +264,705 @@ def test_get_top_news_for_period_no_news_in_period(tmp_path):
 
     rows = get_top_news_for_period(str(db_path), days_back=1, limit=10)
     assert rows == []
+
+
+def test_page_variants_roundtrip(tmp_path):
+    from app.db import get_page_variants, save_page_variant
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+
+    assert get_page_variants(db_path) == {}
+
+    save_page_variant(db_path, "site.com", "{url}/amp", 3.0)
+    save_page_variant(db_path, "site.com", "{url}/amp/", 4.0)
+
+    assert get_page_variants(db_path) == {"site.com": ("{url}/amp/", 4.0)}
+
+
+def test_save_news_stores_published_at(tmp_path):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+
+    save_news(
+        db_path=db_path,
+        url="https://example.com/p",
+        title="T",
+        summary="S",
+        content="C",
+        source="src",
+        score=1.0,
+        published_at="2025-01-02T03:04:05Z",
+    )
+
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.execute("SELECT published_at FROM news;")
+        assert cur.fetchone()[0] == "2025-01-02T03:04:05Z"
+    finally:
+        conn.close()
+
+
+def test_compressed_content_roundtrip_and_lazy_record(tmp_path):
+    from app.db import NewsRecord, unpack_content
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    body = "Kafka 4.0 release notes. " * 400
+
+    save_news(db_path, "https://example.com/z", "T", "S", body, "src", 1.0, compress=True)
+    _insert_sample_news(db_path, "https://example.com/plain")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        stored = dict(conn.execute("SELECT url, content FROM news;").fetchall())
+    finally:
+        conn.close()
+    assert isinstance(stored["https://example.com/z"], bytes)
+    assert len(stored["https://example.com/z"]) < len(body) / 10
+    assert stored["https://example.com/plain"] == "Content https://example.com/plain"
+
+    record = get_news_by_urls(db_path, ["https://example.com/z"])[0]
+    assert isinstance(record, NewsRecord)
+    assert isinstance(record._values[3], bytes)  # ещё не распакован
+    assert record.title == "T"
+    assert record.content == body
+    assert record[3] == body and record[-1] == 1.0
+    assert len(record) == 6
+    assert record == ("https://example.com/z", "T", "S", body, "src", 1.0)
+    assert record == NewsRecord(record._fields, tuple(record))
+    assert record[:2] == ("https://example.com/z", "T")
+    assert record[-2:] == ("src", 1.0) and record[::5] == ("https://example.com/z", 1.0)
+    assert hash(record) == hash(tuple(record))
+    assert {record, NewsRecord(record._fields, tuple(record)), tuple(record)} == {record}
+    assert "NewsRecord(url='https://example.com/z'" in repr(record)
+    with pytest.raises(AttributeError):
+        record.missing
+
+    url, title, summary, content, source, score, fetched_at = get_last_news(db_path, limit=2)[1]
+    assert content == body
+    assert unpack_content(None) is None
+
+
+def test_compress_news_content_migrates_existing_rows(tmp_path):
+    from app.db import compress_news_content, vacuum
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    for i in range(5):
+        save_news(db_path, f"https://example.com/{i}", "T", "S", "Body text. " * 500, "src", 1.0)
+    save_news(db_path, "https://example.com/none", "T", "S", None, "src", 1.0)
+
+    assert compress_news_content(db_path, batch_size=2) == 5
+    assert compress_news_content(db_path) == 0
+    vacuum(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        types = {t for (t,) in conn.execute("SELECT typeof(content) FROM news;")}
+    finally:
+        conn.close()
+    assert types == {"blob", "null"}
+    rows = get_news_by_urls(db_path, ["https://example.com/3"])
+    assert rows[0].content == "Body text. " * 500
+
+
+def test_read_helpers_return_only_requested_columns(tmp_path):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    save_news(db_path, "https://example.com/a", "A", "SA", "Body", "src", 2.0, compress=True)
+    save_news(db_path, "https://example.com/b", "B", "SB", "Body", "src", 1.0)
+
+    (last,) = get_last_news(db_path, limit=1, columns=("fetched_at",))
+    assert len(last) == 1 and last.fetched_at
+
+    rows = get_news_by_urls(db_path, ["https://example.com/a"], columns=("url", "score"))
+    assert rows == [("https://example.com/a", 2.0)]
+
+    top = get_top_news_for_period(db_path, days_back=1, limit=5, columns=("title", "source"))
+    assert [tuple(r) for r in top] == [("A", "src"), ("B", "src")]
+    with pytest.raises(AttributeError):
+        top[0].content
+
+    for bad in ((), ("url", "content; DROP TABLE news")):
+        with pytest.raises(ValueError):
+            get_last_news(db_path, columns=bad)
+
+
+def test_schema_v1_dedupes_urls_and_adds_indexes(tmp_path):
+    from app.db import SCHEMA_VERSION
+
+    db_path = str(tmp_path / "news.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE news (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT, title TEXT, "
+        "summary TEXT, content TEXT, source TEXT, score REAL, fetched_at TEXT);"
+    )
+    conn.executemany(
+        "INSERT INTO news (url, title, fetched_at) VALUES (?, ?, ?);",
+        [
+            ("https://a", "first", "2025-01-01"),
+            ("https://b", "b", "2025-01-02"),
+            ("https://a", "second", "2025-01-03"),
+            (None, "no url", "2025-01-04"),
+            (None, "no url 2", "2025-01-05"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    init_db(db_path)
+    init_db(db_path)  # повторный запуск миграцию не повторяет
+    save_news(db_path, "https://b", "again", "S", "C", "src", 1.0)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version;").fetchone()[0] == SCHEMA_VERSION
+        rows = conn.execute("SELECT url, title FROM news ORDER BY id;").fetchall()
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT 1 FROM news WHERE url = ?;", ("https://a",)
+            )
+        )
+        period_plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM news WHERE fetched_ts >= ?;", (0,)
+            )
+        )
+    finally:
+        conn.close()
+
+    assert rows == [
+        ("https://a", "first"),
+        ("https://b", "b"),
+        (None, "no url"),
+        (None, "no url 2"),
+    ]
+    assert "idx_news_url" in plan
+    assert "idx_news_fetched_ts_score" in period_plan
+
+
+def test_get_connection_reuses_tuned_connection_per_thread(tmp_path):
+    import threading
+
+    from app.db import close_connections, get_connection
+
+    db_path = str(tmp_path / "news.db")
+    with get_connection(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous;").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout;").fetchone()[0] == 5000
+        conn.execute("CREATE TABLE t (x INTEGER);")
+        conn.execute("INSERT INTO t VALUES (1);")  # без commit — откатится
+    with get_connection(db_path) as again:
+        assert again is conn
+        assert again.execute("SELECT COUNT(*) FROM t;").fetchone()[0] == 0
+
+    with pytest.raises(RuntimeError):
+        with get_connection(db_path) as conn:
+            conn.execute("INSERT INTO t VALUES (2);")
+            raise RuntimeError("boom")
+    assert not conn.in_transaction
+
+    other = []
+
+    def worker():
+        with get_connection(db_path) as thread_conn:
+            other.append(thread_conn)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+    with get_connection(":memory:") as first:
+        first.execute("CREATE TABLE m (x);")
+    with get_connection(":memory:") as second:
+        assert second is not first
+        assert second.execute("SELECT COUNT(*) FROM sqlite_master;").fetchone()[0] == 0
+
+    close_connections()
+    with get_connection(db_path) as reopened:
+        assert reopened is not conn
+
+
+def test_get_connection_readonly_and_after_fork(monkeypatch, tmp_path):
+    import app.db as db
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    _insert_sample_news(db_path, "https://example.com/ro")
+
+    with db.get_connection(db_path, readonly=True) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM news;").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            conn.execute("DELETE FROM news;")
+    assert get_last_news(db_path, limit=1, columns=("url",), readonly=True)[0].url == (
+        "https://example.com/ro"
+    )
+
+    with pytest.raises(sqlite3.OperationalError):
+        with db.get_connection(str(tmp_path / "missing.db"), readonly=True):
+            pass  # pragma: no cover
+    assert not (tmp_path / "missing.db").exists()
+
+    with db.get_connection(db_path) as conn:
+        pass
+    monkeypatch.setattr(db._local, "pid", -1)  # как будто мы в дочернем процессе
+    with db.get_connection(db_path) as child_conn:
+        assert child_conn is not conn
+
+
+def test_checkpoint_and_close_truncates_wal(tmp_path):
+    import app.db as db
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    _insert_sample_news(db_path, "https://example.com/wal")
+    wal = tmp_path / "news.db-wal"
+    assert wal.stat().st_size > 0
+
+    db.checkpoint_and_close(db_path)
+
+    # последнее соединение закрыто — SQLite убирает пустой -wal
+    assert not wal.exists()
+    assert db._cached_connections() == {}
+    # несуществующий файл не создаём
+    db.checkpoint_and_close(str(tmp_path / "missing.db"))
+    db.checkpoint_and_close(":memory:")
+    assert not (tmp_path / "missing.db").exists()
+
+
+def test_locked_database_is_retried_with_logs(monkeypatch, tmp_path):
+    import threading
+
+    import app.db as db
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    db.close_connections()
+    monkeypatch.setattr(db, "BUSY_TIMEOUT_MS", 1)
+    monkeypatch.setattr(db, "LOCK_RETRY_DELAY", 0.05)
+    warnings, infos = [], []
+    monkeypatch.setattr(db, "log_warning", warnings.append)
+    monkeypatch.setattr(db, "log_info", infos.append)
+
+    holder = sqlite3.connect(db_path, check_same_thread=False)
+    holder.execute("BEGIN EXCLUSIVE;")
+    release = threading.Timer(0.08, holder.rollback)
+    release.start()
+    try:
+        save_news(db_path, "https://example.com/locked", "T", "S", "C", "src", 1.0)
+    finally:
+        release.join()
+    assert link_exists(db_path, "https://example.com/locked")
+    assert warnings and "занята" in warnings[0]
+    assert infos and "попытки" in infos[0]
+
+    warnings.clear()
+    with db.get_connection(db_path) as conn:
+        holder.execute("BEGIN EXCLUSIVE;")
+        try:
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                conn.executemany(
+                    "INSERT INTO page_variants (host, template, ratio) VALUES (?, ?, ?);",
+                    [("h", "t", 1.0)],
+                )
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                conn.executemany(
+                    "INSERT INTO page_variants (host, template, ratio) VALUES (?, ?, ?);",
+                    (row for row in [("h", "t", 1.0)]),
+                )
+        finally:
+            holder.rollback()
+        assert len(warnings) == db.LOCK_RETRIES  # генератор не повторяется
+
+        with pytest.raises(sqlite3.OperationalError, match="no such table"):
+            conn.execute("SELECT * FROM nope;")
+        conn.execute("INSERT INTO page_variants (host, template, ratio) VALUES ('h', 't', 1);")
+        conn.commit()
+    holder.close()
+
+
+def test_save_news_many_returns_only_inserted_urls(tmp_path):
+    from app.db import save_news_many
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    _insert_sample_news(db_path, "https://example.com/old")
+
+    rows = [
+        ("https://example.com/new", "N", "S", "Body", "src", 1.0, "2025-01-01"),
+        ("https://example.com/old", "O", "S", "Body", "src", 2.0, None),
+        ("https://example.com/new", "dup", "S", "Body", "src", 3.0, None),
+        ("https://example.com/z", "Z", "S", "Body", "src", 0.5, None),
+    ]
+    assert save_news_many(db_path, iter(rows), compress=True) == [
+        "https://example.com/new",
+        "https://example.com/z",
+    ]
+    assert save_news_many(db_path, []) == []
+
+    records = {r.url: r for r in get_last_news(db_path, limit=10)}
+    assert len(records) == 3
+    assert records["https://example.com/new"].title == "N"  # первая запись пачки
+    assert records["https://example.com/new"].content == "Body"
+    assert records["https://example.com/old"].title == "Title https://example.com/old"
+    assert records["https://example.com/new"].fetched_at == records["https://example.com/z"].fetched_at
+
+
+def test_migrate_is_a_single_pragma_read_when_up_to_date(monkeypatch, tmp_path):
+    import app.db as db
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+
+    statements = []
+    with db.get_connection(db_path) as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            init_db(db_path)
+        finally:
+            conn.set_trace_callback(None)
+    assert statements == ["PRAGMA user_version;"]
+
+    warnings = []
+    monkeypatch.setattr(db, "log_warning", warnings.append)
+    with db.get_connection(db_path) as conn:
+        conn.execute(f"PRAGMA user_version = {db.SCHEMA_VERSION + 1};")
+    assert db.migrate(db_path) == []
+    assert "новее" in warnings[0]
+
+
+def test_migration_applied_by_another_process_is_skipped(monkeypatch, tmp_path):
+    import threading
+
+    import app.db as db
+
+    db_path = str(tmp_path / "news.db")
+    holder = sqlite3.connect(db_path, isolation_level=None)
+    holder.execute("PRAGMA journal_mode = WAL;")
+    holder.execute("BEGIN IMMEDIATE;")
+
+    result = []
+    worker = threading.Thread(target=lambda: result.append(db.migrate(db_path)))
+    worker.start()
+    time.sleep(0.3)  # поток прочитал версию 0 и ждёт блокировку
+
+    for migration in db.MIGRATIONS:
+        migration.apply(holder)
+    holder.execute(f"PRAGMA user_version = {db.SCHEMA_VERSION};")
+    holder.execute("COMMIT;")
+    worker.join()
+    holder.close()
+
+    assert result == [[]]
+
+
+def test_epoch_columns_follow_iso_timestamps(tmp_path):
+    import app.db as db
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO news (url, fetched_at, published_at) VALUES (?, ?, ?);",
+        [
+            ("https://utc", "2025-01-02T03:04:05.123456+00:00", "2025-01-02"),
+            ("https://offset", "2025-01-02T06:04:05+03:00", "Thu, 02 Jan 2025 03:04:05 GMT"),
+            ("https://naive", "2025-01-02 03:04:05", None),
+        ],
+    )
+    conn.commit()
+    rows = conn.execute("SELECT url, fetched_ts, published_ts FROM news ORDER BY id;").fetchall()
+    conn.close()
+
+    assert rows == [
+        ("https://utc", 1735787045, 1735776000),
+        ("https://offset", 1735787045, None),  # не ISO — NULL, а не ошибка
+        ("https://naive", 1735787045, None),
+    ]
+    assert db._since_ts(1) == pytest.approx(time.time() - 86400, abs=2)
+
+    # повторное применение миграции ничего не ломает
+    with db.get_connection(db_path) as conn:
+        db._migration_v2_epoch(conn)
+        conn.commit()
+
+
+def test_fts_index_follows_inserts_updates_and_rebuild(tmp_path):
+    import app.db as db
+    from app.db import save_news_many, search_news, update_news_content
+
+    db_path = str(tmp_path / "news.db")
+    # строка, сохранённая до появления индекса, индексируется миграцией
+    with db.get_connection(db_path) as conn:
+        for migration in db.MIGRATIONS[:2]:
+            migration.apply(conn)
+        conn.execute("PRAGMA user_version = 2;")
+        conn.execute(
+            "INSERT INTO news (url, title, content, fetched_at) VALUES (?, ?, ?, ?);",
+            ("https://old", "Old Kafka post", db.pack_content("about brokers", True), "2025"),
+        )
+        conn.commit()
+    init_db(db_path)
+    assert [r.url for r in search_news(db_path, "kafka")] == ["https://old"]
+
+    save_news_many(
+        db_path,
+        [
+            ("https://a", "Kafka 4.0 released", "S", "Streams and brokers", "apache", 2.0, None),
+            ("https://b", "Redis", "S", "Compressed text mentions kafka once", "x", 1.0, None),
+            ("https://b", "Dup", "S", "ignored kafka duplicate", "x", 1.0, None),
+        ],
+        compress=True,
+    )
+    hits = search_news(db_path, "kafka")
+    # заголовок весит больше текста
+    assert [r.url for r in hits][-1] == "https://b"
+    assert hits[0].rank <= hits[-1].rank
+    assert hits[-1].content == "Compressed text mentions kafka once"
+    assert search_news(db_path, "duplicate") == []
+
+    update_news_content(
+        db_path,
+        [
+            ("https://b", "Redis", "S", "first rewrite about kafka", 1.0, None),
+            ("https://b", "Redis", "S", "now about postgres", 1.0, None),
+        ],
+        compress=True,
+    )
+    update_news_content(db_path, [])
+    assert "https://b" not in [r.url for r in search_news(db_path, "kafka")]
+    assert [r.url for r in search_news(db_path, "postgr*")] == ["https://b"]
+
+    with db.get_connection(db_path) as conn:
+        conn.execute(
+            "UPDATE news SET fetched_at = '2020-01-01T00:00:00+00:00' WHERE url = 'https://old';"
+        )
+        conn.commit()
+    since = db._since_ts(1)
+    assert "https://old" not in [r.url for r in search_news(db_path, "kafka", since_ts=since)]
+    assert [r.url for r in search_news(db_path, "kafka", until_ts=since)] == ["https://old"]
+
+    # строки, изменённые в обход функций записи, возвращаются после пересборки
+    with db.get_connection(db_path) as conn:
+        conn.execute("INSERT INTO news (url, title) VALUES ('https://raw', 'Raw kafka');")
+        conn.commit()
+    assert db.rebuild_news_fts(db_path, batch_size=2) == 4
+    assert "https://raw" in [r.url for r in search_news(db_path, "kafka")]
+
+
+def test_archive_old_news_moves_rows_to_yearly_files(tmp_path):
+    import app.db as db
+    from app.db import search_news
+
+    db_path = str(tmp_path / "news.db")
+    archive_dir = str(tmp_path / "archive")
+    init_db(db_path)
+    for i, fetched_at in enumerate(
+        ["2023-12-31T23:00:00+00:00", "2024-01-01T01:00:00+00:00", "2024-06-01", None]
+    ):
+        url = f"https://old/{i}"
+        save_news(db_path, url, f"Kafka {i}", "S", f"body {i}", "src", 1.0, compress=True)
+        with db.get_connection(db_path) as conn:
+            conn.execute("UPDATE news SET fetched_at = ? WHERE url = ?;", (fetched_at, url))
+            conn.commit()
+    save_news(db_path, "https://fresh", "Kafka fresh", "S", "body", "src", 1.0)
+
+    assert db.archive_old_news(db_path, 30, archive_dir, batch_size=2) == {2023: 1, 2024: 2}
+    assert db.archive_old_news(db_path, 30, archive_dir) == {}
+
+    # в рабочей БД — свежая строка и строка без даты; остальное видно только как url
+    assert sorted(r.url for r in get_last_news(db_path, limit=10)) == [
+        "https://fresh",
+        "https://old/3",
+    ]
+    assert link_exists(db_path, "https://old/1")
+    assert db.save_news_many(db_path, [("https://old/1", "T", "S", "C", "s", 1.0, None)]) == []
+    hits = search_news(db_path, "kafka")
+    assert sorted(r.url for r in hits) == ["https://fresh", "https://old/3"]
+    with db.get_connection(db_path) as conn:
+        archived = conn.execute(
+            "SELECT url, content_hash, year FROM news_archived ORDER BY url;"
+        ).fetchall()
+    assert [(url, year) for url, _, year in archived] == [
+        ("https://old/0", 2023),
+        ("https://old/1", 2024),
+        ("https://old/2", 2024),
+    ]
+    assert archived[0][1] == db._content_hash("body 0")
+
+    conn = sqlite3.connect(":memory:")
+    try:
+        with db.attach_archives(conn, archive_dir) as schemas:
+            assert schemas == ["archive_2023", "archive_2024"]
+            rows = conn.execute(
+                "SELECT url, content, fetched_ts FROM archive_2024.news ORDER BY id;"
+            ).fetchall()
+    finally:
+        conn.close()
+    assert [url for url, _, _ in rows] == ["https://old/1", "https://old/2"]
+    assert db.unpack_content(rows[0][1]) == "body 1"
+    assert rows[1][2] == 1717200000
+
+
+def test_attach_archives_skips_foreign_files(tmp_path):
+    import app.db as db
+
+    (tmp_path / "news_old.db").write_bytes(b"")
+    conn = sqlite3.connect(":memory:")
+    try:
+        with db.attach_archives(conn, str(tmp_path)) as schemas:
+            assert schemas == []
+    finally:
+        conn.close()
+
+
+def test_attach_archives_twice_on_cached_connection(tmp_path):
+    import app.db as db
+
+    (tmp_path / "archive").mkdir()
+    archive_dir = str(tmp_path / "archive")
+    init_db(db.archive_path(archive_dir, 2024))
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+
+    def attached(conn):
+        return [row[1] for row in conn.execute("PRAGMA database_list;")]
+
+    for _ in range(12):  # больше лимита SQLite на число ATTACH (10)
+        with db.get_connection(db_path) as conn:
+            with db.attach_archives(conn, archive_dir) as schemas:
+                assert schemas == ["archive_2024"]
+                # вложенный вызов не подключает схему повторно и не отключает чужую
+                with db.attach_archives(conn, archive_dir) as nested:
+                    assert nested == ["archive_2024"]
+                assert "archive_2024" in attached(conn)
+            assert attached(conn) == ["main"]
+
+
+def test_optimize_db_skips_legacy_db_until_converted(tmp_path):
+    import app.db as db
+
+    db_path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE t (x INTEGER);")  # создана до auto_vacuum=INCREMENTAL
+    legacy.commit()
+    legacy.close()
+
+    assert db.optimize_db(db_path) == {"freed_pages": 0, "full_vacuum": 0, "skipped": 1}
+    with db.get_connection(db_path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum;").fetchone()[0] == 0
+    assert db.optimize_db(db_path, convert=True)["full_vacuum"] == 1
+    with db.get_connection(db_path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum;").fetchone()[0] == 2
+
+
+def test_optimize_db_incremental_vacuum_and_analyze(tmp_path):
+    import app.db as db
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    with db.get_connection(db_path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum;").fetchone()[0] == 2  # новая БД
+
+    db.save_news_many(
+        db_path, [(f"https://n/{i}", "T", "S", "x" * 5000, "s", 1.0, None) for i in range(50)]
+    )
+    with db.get_connection(db_path) as conn:
+        conn.execute("DELETE FROM news;")
+        conn.commit()
+    stats = db.optimize_db(db_path)
+    assert stats["full_vacuum"] == stats["skipped"] == 0
+    assert stats["freed_pages"] > 0
+    with db.get_connection(db_path) as conn:
+        assert conn.execute("PRAGMA freelist_count;").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1;").fetchone()[0] > 0
+
+
+def test_get_news_by_urls_keeps_input_order_on_every_path(monkeypatch, tmp_path):
+    import app.db as db
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    urls = [f"https://n/{i}" for i in range(20)]
+    db.save_news_many(
+        db_path, [(url, "T", "S", "C", "s", float(i), None) for i, url in enumerate(urls)]
+    )
+    wanted = [urls[7], "https://missing", urls[3], urls[7], urls[19], urls[0]]
+    expected = [urls[7], urls[3], urls[19], urls[0]]
+
+    statements = []
+    with db.get_connection(db_path) as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            assert [r.url for r in get_news_by_urls(db_path, wanted)] == expected
+            monkeypatch.setattr(db, "URLS_CHUNK_SIZE", 3)
+            records = get_news_by_urls(db_path, wanted, columns=("score",))
+            # 3 + 2 url → IN из 4 и 2 мест
+            assert [r.score for r in records] == [7.0, 3.0, 19.0, 0.0]
+        finally:
+            conn.set_trace_callback(None)
+    in_sizes = [sql.split(" IN (")[1].count(",") + 1 for sql in statements]
+    assert in_sizes == [8, 4, 2]  # 5 url добиты NULL до 8
+
+    monkeypatch.setattr(db, "URLS_TEMP_TABLE_THRESHOLD", 2)
+    assert [r.url for r in get_news_by_urls(db_path, wanted)] == expected
+    assert [r.score for r in get_news_by_urls(db_path, wanted, columns=("score",))][0] == 7.0
+
+
+def test_nested_get_connection_keeps_callers_transaction(monkeypatch, tmp_path):
+    from app import db
+
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    save_news(db_path, "https://n/1", "T", "S", "C", "s", 1.0)
+    monkeypatch.setattr(db, "URLS_TEMP_TABLE_THRESHOLD", 0)
+
+    with db.get_connection(db_path) as conn:
+        conn.execute("UPDATE news SET score = 5 WHERE url = 'https://n/1';")
+        # вложенные блоки: ни отката на выходе, ни чужого commit
+        assert [r.url for r in get_news_by_urls(db_path, ["https://n/1"])] == ["https://n/1"]
+        assert conn.in_transaction
+        conn.rollback()
+    assert [r.score for r in get_news_by_urls(db_path, ["https://n/1"], ("score",))] == [1.0]
+
+    with db.get_connection(db_path) as conn:
+        conn.execute("UPDATE news SET score = 7 WHERE url = 'https://n/1';")
+        with db.get_connection(db_path):
+            pass
+        conn.commit()
+    assert [r.score for r in get_news_by_urls(db_path, ["https://n/1"], ("score",))] == [7.0]
+    assert not conn.in_transaction and conn.depth == 0
+
+
+def test_get_news_by_urls_beyond_sqlite_variable_limit(tmp_path):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    save_news(db_path, "https://n/last", "T", "S", "C", "s", 1.0)
+    urls = [f"https://missing/{i}" for i in range(40000)] + ["https://n/last"]
+    assert [r.url for r in get_news_by_urls(db_path, urls)] == ["https://n/last"]
+
+
+def test_migration_drops_old_page_variant_templates(tmp_path):
+    import app.db as db
+    from app.db import delete_page_variant, get_page_variants, save_page_variant
+
+    db_path = str(tmp_path / "news.db")
+    with db.get_connection(db_path) as conn:
+        for migration in db.MIGRATIONS[:4]:
+            migration.apply(conn)
+        conn.execute("PRAGMA user_version = 4;")
+        conn.commit()
+    # шаблон старого вида с query первой статьи
+    save_page_variant(db_path, "x.com", "https://m.x.com{path}?id=5&amp=1", 3.0)
+    init_db(db_path)
+    assert get_page_variants(db_path) == {}
+
+    save_page_variant(db_path, "x.com", "https://m.x.com{path}?amp=1", 3.0)
+    delete_page_variant(db_path, "x.com")
+    delete_page_variant(db_path, "missing.com")
+    assert get_page_variants(db_path) == {}
@@ -0,0 +1,110 @@
+# tests/test_db_tools.py
+import sqlite3
+from types import SimpleNamespace
+
+import app.db_tools as tools
+from app.db import init_db, save_news
+
+
+def test_compress_content_command(monkeypatch, tmp_path):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    save_news(db_path, "https://example.com/a", "T", "S", "Body. " * 2000, "src", 1.0)
+
+    infos = []
+    monkeypatch.setattr(tools, "log_info", infos.append)
+    monkeypatch.setattr(tools, "get_settings", lambda: SimpleNamespace(database_path=db_path))
+
+    assert tools.main(["compress-content", "--vacuum"]) == 0
+    assert infos[0] == "Сжатие content: обработано 1 строк."
+    assert infos[1].startswith("VACUUM: размер БД")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT typeof(content) FROM news;").fetchone()[0] == "blob"
+    finally:
+        conn.close()
+
+    other = str(tmp_path / "other.db")
+    assert tools.main(["--db", other, "compress-content"]) == 0
+    assert infos[-1] == "Сжатие content: обработано 0 строк."
+
+
+def test_migrate_command_dry_run_and_apply(monkeypatch, tmp_path):
+    import app.db as db
+
+    db_path = str(tmp_path / "fresh.db")
+    infos = []
+    monkeypatch.setattr(tools, "log_info", infos.append)
+    monkeypatch.setattr(db, "log_info", infos.append)
+
+    assert tools.main(["--db", db_path, "migrate", "--dry-run"]) == 0
+    assert infos == [
+        *(f"Миграция БД {m.version} ({m.name}) будет применена." for m in db.MIGRATIONS),
+        f"Ожидают применения миграций: {len(db.MIGRATIONS)}.",
+    ]
+
+    infos.clear()
+    assert tools.main(["--db", db_path, "migrate"]) == 0
+    assert infos[0].startswith("Миграция БД 1 (")
+    assert infos[-1] == (
+        f"Применено миграций: {len(db.MIGRATIONS)}, версия схемы {db.SCHEMA_VERSION}."
+    )
+
+    assert tools.main(["--db", db_path, "migrate"]) == 0
+    assert infos[-1] == f"Схема БД актуальна (версия {db.SCHEMA_VERSION})."
+
+
+def test_fts_rebuild_command(monkeypatch, tmp_path):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    save_news(db_path, "https://example.com/a", "T", "S", "Body", "src", 1.0)
+
+    infos = []
+    monkeypatch.setattr(tools, "log_info", infos.append)
+    assert tools.main(["--db", db_path, "fts-rebuild"]) == 0
+    assert infos == ["Полнотекстовый индекс пересобран: 1 новостей."]
+
+
+def test_retention_command(monkeypatch, tmp_path):
+    db_path = str(tmp_path / "news.db")
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE t (x INTEGER);")  # БД до auto_vacuum=INCREMENTAL
+    legacy.commit()
+    legacy.close()
+    init_db(db_path)
+    save_news(db_path, "https://example.com/old", "T", "S", "Body", "src", 1.0)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE news SET fetched_at = '2024-03-01T00:00:00+00:00';")
+    conn.commit()
+    conn.close()
+
+    infos = []
+    monkeypatch.setattr(tools, "log_info", infos.append)
+    settings = SimpleNamespace(database_path=db_path, retention_days=0, archive_dir=None)
+    monkeypatch.setattr(tools, "get_settings", lambda: settings)
+
+    # NEWS_BOT_RETENTION_DAYS=0 — только обслуживание файла; полного VACUUM по расписанию нет
+    assert tools.main(["retention"]) == 0
+    assert infos == [
+        "Обслуживание БД пропущено: auto_vacuum не INCREMENTAL. "
+        "Перевести (однократный полный VACUUM): python -m app.db_tools auto-vacuum."
+    ]
+
+    infos.clear()
+    assert tools.main(["auto-vacuum"]) == 0
+    assert infos[0] == "БД переведена в auto_vacuum=INCREMENTAL (однократный VACUUM)."
+    assert infos[1].startswith("Обслуживание БД: освобождено страниц")
+
+    infos.clear()
+    assert tools.main(["retention", "--days", "30"]) == 0
+    archive = tmp_path / "archive" / "news_2024.db"
+    assert infos[0] == f"Хранение: 1 новостей перенесено в {archive}."
+    assert archive.exists()
+    assert len(infos) == 2
+
+    infos.clear()
+    other_dir = str(tmp_path / "other")
+    assert tools.main(["retention", "--days", "30", "--archive-dir", other_dir]) == 0
+    assert infos[0] == "Хранение: новостей старше 30 дней нет."
+    assert tools.default_archive_dir("news.db") == "./archive"
@@ -0,0 +1,137 @@
+# tests/test_db_writer.py
+import sqlite3
+import threading
+
+import pytest
+
+import app.db_writer as dbw
+from app.db import get_last_news, init_db
+from app.db_writer import DbWriter
+
+
+@pytest.fixture
+def logs(monkeypatch):
+    collected = {"info": [], "error": []}
+    monkeypatch.setattr(dbw, "log_info", collected["info"].append)
+    monkeypatch.setattr(dbw, "log_error", lambda msg, alert=False: collected["error"].append(msg))
+    return collected
+
+
+def _row(url, score=1.0):
+    return (url, "T", "S", "Body " + url, "src", score, None)
+
+
+def test_writer_batches_operations_and_returns_results(tmp_path, logs):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    writer = DbWriter(db_path, batch_size=3, flush_interval=5.0).start()
+
+    futures = [writer.save_news_many([_row(f"https://n/{i}")], compress=True) for i in range(3)]
+    futures.append(writer.save_news_many([_row("https://n/0")]))  # уже сохранена
+    futures.append(writer.save_news_many([]))
+    futures.append(
+        writer.update_news_content([("https://n/1", "New", "S2", "Body2", 9.0, "2025-01-01")])
+    )
+
+    assert [f.result(timeout=5) for f in futures[:3]] == [
+        ["https://n/0"],
+        ["https://n/1"],
+        ["https://n/2"],
+    ]
+    writer.flush(timeout=5)  # неполная пачка коммитится по барьеру, не ждёт flush_interval
+    assert futures[3].result() == []
+    assert futures[4].result() == []
+    assert futures[5].result() is None
+
+    records = {r.url: r for r in get_last_news(db_path, limit=10)}
+    assert records["https://n/1"].title == "New" and records["https://n/1"].score == 9.0
+    assert records["https://n/2"].content == "Body https://n/2"
+
+    writer.close()
+    writer.close()  # повторно — ничего не делает
+    writer.flush()  # после закрытия — тоже
+    assert writer.operations == 6
+    assert writer.batches == 2  # 3 операции по размеру пачки + 3 по барьеру
+    assert logs["info"] == ["Фоновая запись в БД: операций 6, транзакций 2, ошибок 0."]
+    with pytest.raises(RuntimeError):
+        writer.submit(lambda conn: None)
+
+
+def test_writer_commits_partial_batch_by_time(tmp_path, logs):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    writer = DbWriter(db_path, batch_size=100, flush_interval=0.01).start()
+    try:
+        assert writer.save_news_many([_row("https://t/1")]).result(timeout=5) == ["https://t/1"]
+    finally:
+        writer.close()
+
+
+def test_failed_operation_is_rolled_back_alone(tmp_path, logs):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    writer = DbWriter(db_path, flush_interval=5.0).start()
+
+    def half_then_fail(conn):
+        conn.execute("INSERT INTO page_variants (host, template, ratio) VALUES ('h', 't', 1);")
+        conn.execute("SELECT * FROM no_such_table;")
+
+    bad = writer.submit(half_then_fail)
+    good = writer.save_news_many([_row("https://ok")])
+    writer.flush(timeout=5)  # та же пачка: ошибка одной операции не мешает барьеру
+    writer.close()
+
+    with pytest.raises(sqlite3.OperationalError):
+        bad.result()
+    assert good.result() == ["https://ok"]
+    assert writer.failed == 1
+    assert "no such table" in logs["error"][0]
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM page_variants;").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_unwritable_database_fails_every_future(tmp_path, logs):
+    writer = DbWriter(str(tmp_path / "missing" / "news.db")).start()
+    future = writer.save_news_many([_row("https://x")])
+    with pytest.raises(sqlite3.OperationalError):
+        writer.flush(timeout=5)
+    with pytest.raises(sqlite3.OperationalError):
+        future.result()
+    writer.close()
+    assert writer.failed == 2
+
+
+def test_bounded_queue_blocks_producer_until_writer_drains(tmp_path, logs):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    writer = DbWriter(db_path, max_queue=1, flush_interval=0.0)
+
+    writer.submit(lambda conn: None)  # поток ещё не запущен — очередь заполнена
+    blocked = threading.Thread(target=writer.submit, args=(lambda conn: None,))
+    blocked.start()
+    blocked.join(timeout=0.05)
+    assert blocked.is_alive()
+
+    writer.start()
+    blocked.join(timeout=5)
+    assert not blocked.is_alive()
+    writer.close()
+    assert writer.operations == 2
+
+
+def test_close_drains_queue_even_if_never_started(tmp_path, logs):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    writer = DbWriter(db_path, flush_interval=5.0)
+    first = writer.save_news_many([_row("https://late/1")])
+    second = writer.save_news_many([_row("https://late/2")])
+
+    writer.close()
+
+    assert first.result() == ["https://late/1"]
+    assert second.result() == ["https://late/2"]
+    assert writer.batches == 1
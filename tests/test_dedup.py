@@ -0,0 +1,125 @@
+# tests/test_dedup.py
+import pytest
+
+from app.db import init_db, link_exists
+from app.dedup import (
+    NearDuplicateDetector,
+    _from_sqlite,
+    _to_sqlite,
+    hamming_distance,
+    simhash,
+    simhash_bands,
+)
+
+# SimHash рассчитан на статьи: сотни шинглов, а не одно предложение
+STORY = (
+    "A critical vulnerability CVE-2025-1234 in the popular XZ compression library "
+    "allows remote attackers to execute arbitrary code. Maintainers released a patch "
+    "and urge all users to update immediately. "
+    + " ".join(f"detail{i} of the incident report number {i}." for i in range(60))
+)
+OTHER = "Apache Kafka 4.0 removes ZooKeeper and makes KRaft the only metadata mode. " + " ".join(
+    f"kafka note {i} about brokers and partitions." for i in range(60)
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "news.db")
+    init_db(path)
+    return path
+
+
+def test_simhash_is_close_for_near_duplicates():
+    rewritten = STORY.replace("urge all users", "ask every user", 1)
+
+    assert hamming_distance(simhash(STORY), simhash(rewritten)) <= 3
+    assert hamming_distance(simhash(STORY), simhash(OTHER)) > 10
+    assert simhash(STORY) == simhash(STORY.upper())
+    assert simhash("") == 0
+    assert simhash("two words") != 0
+
+
+def test_simhash_bands_and_sqlite_roundtrip():
+    value = (0xABCD << 48) | (0x1234 << 16) | 0x0F0F
+    assert simhash_bands(value) == [0x0F0F, 0x1234, 0x0000, 0xABCD]
+
+    for v in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        assert -(1 << 63) <= _to_sqlite(v) < 1 << 63
+        assert _from_sqlite(_to_sqlite(v)) == v
+
+
+def test_detector_finds_duplicates_in_batch_and_history(db_path):
+    detector = NearDuplicateDetector(db_path, days_back=7)
+
+    assert detector.check("https://a.com/cve", STORY) is None
+    assert detector.check("https://b.com/cve", STORY + " Source: B.") == "https://a.com/cve"
+    assert detector.check("https://c.com/kafka", OTHER) is None
+    assert detector.duplicates == 1
+
+    # c.com в итоге не сохранили — его отпечаток в историю не попадает
+    detector.flush(["https://a.com/cve"])
+    assert link_exists(db_path, "https://b.com/cve")  # дубликат второй раз не качаем
+    assert not link_exists(db_path, "https://a.com/cve")  # оригинал живёт в news
+
+    next_run = NearDuplicateDetector(db_path, days_back=7)
+    assert next_run.check("https://d.com/cve", "Breaking: " + STORY) == "https://a.com/cve"
+    assert next_run.check("https://e.com/kafka", OTHER) is None
+    # тот же URL не считается дубликатом сам себя
+    assert next_run.check("https://a.com/cve", STORY) is None
+
+
+def test_detector_respects_history_window(db_path):
+    detector = NearDuplicateDetector(db_path, days_back=7)
+    detector.check("https://a.com/cve", STORY)
+    detector.flush(["https://a.com/cve"])
+
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE news_simhash SET fetched_at = '2000-01-01T00:00:00+00:00';")
+    conn.commit()
+    conn.close()
+
+    assert NearDuplicateDetector(db_path, days_back=7).check("https://b.com/cve", STORY) is None
+
+
+def test_detector_flush_without_items(db_path):
+    detector = NearDuplicateDetector(db_path)
+    detector.check("https://a.com/x", OTHER)
+    detector.flush([])
+    assert NearDuplicateDetector(db_path).check("https://b.com/x", OTHER) is None
+
+
+def test_duplicate_of_unsaved_original_is_not_remembered(db_path):
+    detector = NearDuplicateDetector(db_path, days_back=7)
+    detector.check("https://a.com/cve", STORY)
+    assert detector.check("https://b.com/cve", STORY + " Source: B.") == "https://a.com/cve"
+    detector.flush([])  # оригинал не сохранился
+
+    # b.com не потерян: на следующем прогоне он обычная новая статья
+    assert not link_exists(db_path, "https://b.com/cve")
+    next_run = NearDuplicateDetector(db_path, days_back=7)
+    assert next_run.check("https://b.com/cve", STORY + " Source: B.") is None
+    next_run.flush(["https://b.com/cve"])
+
+    # дубликат оригинала из истории запоминается, даже если в этом прогоне ничего не сохранено
+    third = NearDuplicateDetector(db_path, days_back=7)
+    assert third.check("https://c.com/cve", "Breaking: " + STORY) == "https://b.com/cve"
+    third.flush([])
+    assert link_exists(db_path, "https://c.com/cve")
+
+
+def test_flush_through_background_writer(db_path):
+    from app.db_writer import DbWriter
+
+    writer = DbWriter(db_path).start()
+    detector = NearDuplicateDetector(db_path, days_back=7)
+    detector.check("https://a.com/cve", STORY)
+    future = detector.flush(["https://a.com/cve"], writer=writer)
+    writer.close()
+    assert future.result() is None
+    assert NearDuplicateDetector(db_path, days_back=7).check("https://b.com/cve", STORY) == (
+        "https://a.com/cve"
+    )
+    assert detector.flush([], writer=writer) is None  # писать нечего — писатель не нужен
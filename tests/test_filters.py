@@ -1,4 +1,4 @@
-from app.filters import filter_link_by_substring
+from app.filters import dedupe_links, filter_link_by_substring
 
 
 def test_filter_link_by_substring_basic():
@@ -19,3 +19,13 @@ def test_filter_link_by_substring_basic():
 def test_filter_link_by_substring_empty():
     assert filter_link_by_substring([], "/2025/") == []
     assert filter_link_by_substring(["https://example.com"], "/2025/") == []
+
+
+def test_dedupe_links_strips_fragments_and_keeps_order():
+    links = [
+        "https://site.com/2025/kafka-4/",
+        "https://site.com/2025/kafka-4/#comments",
+        "https://site.com/2025/other#top",
+        "https://site.com/2025/other",
+    ]
+    assert dedupe_links(links) == ["https://site.com/2025/kafka-4/", "https://site.com/2025/other"]
@@ -28,7 +28,8 @@ def test_healthcheck_ok(monkeypatch):
             return None
 
     @contextmanager
-    def good_conn(_path: str):
+    def good_conn(_path: str, readonly: bool = False):
+        assert readonly is True
         yield DummyConn()
 
     monkeypatch.setattr(hc, "get_connection", good_conn)
@@ -83,7 +84,7 @@ def test_healthcheck_db_failure(monkeypatch):
     )
 
     @contextmanager
-    def bad_conn(_path: str):
+    def bad_conn(_path: str, readonly: bool = False):
         raise RuntimeError("boom")  # noqa: TRY003
         yield  # pragma: no cover
 
@@ -0,0 +1,134 @@
+# tests/test_html_archive.py
+from types import SimpleNamespace
+
+import pytest
+
+import app.text_parser as tp
+from app.db import get_news_urls, init_db, save_news
+from app.html_archive import HtmlArchive
+from app.news_professor import NewsProfessor
+
+PAGE = (
+    "<html><head><title>Kafka 4.0</title>"
+    '<meta property="article:published_time" content="2025-03-18T10:00:00Z"></head>'
+    "<body><p>KRaft is now the only mode.</p><p>ZooKeeper is gone.</p></body></html>"
+)
+
+
+def test_archive_stores_pages_once_and_compressed(tmp_path):
+    archive = HtmlArchive(str(tmp_path / "archive.db"))
+    big_page = PAGE + "<p>filler</p>" * 2000
+
+    first = archive.put("https://a.com/1", big_page)
+    second = archive.put("https://a.com/1?utm=x", big_page)
+
+    assert first == second
+    assert archive.get("https://a.com/1?utm=x") == big_page
+    assert archive.get("https://missing.com") is None
+
+    stats = archive.stats()
+    assert stats["pages"] == 1 and stats["urls"] == 2
+    assert stats["bytes_stored"] < stats["bytes_raw"] / 10
+    assert archive.stats_message().startswith("Архив HTML: записано")
+
+    assert list(archive.iter_pages(["https://missing.com", "https://a.com/1"])) == [
+        ("https://a.com/1", big_page)
+    ]
+
+
+def test_fetch_page_writes_to_archive(monkeypatch, tmp_path):
+    archive = HtmlArchive(str(tmp_path / "archive.db"))
+    monkeypatch.setattr(tp, "_download_with_retry", lambda url, timeout=10: PAGE)
+
+    assert tp.fetch_page("https://a.com/1", archive=archive) == PAGE
+    assert archive.get("https://a.com/1") == PAGE
+
+
+@pytest.mark.parametrize("db_writer", [False, True])
+def test_reprocess_from_archive_updates_history_offline(monkeypatch, tmp_path, db_writer):
+    import app.news_professor as np
+
+    db_path = str(tmp_path / "news.db")
+    archive = HtmlArchive(str(tmp_path / "archive.db"))
+    init_db(db_path)
+    for url in ("https://a.com/1", "https://a.com/2", "https://a.com/gone", "https://a.com/bad"):
+        save_news(db_path, url, "old", "old", "old content", "other", 0.0)
+    # «пропавшая» страница — за другой день, и в архиве её нет
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE news SET fetched_at = '2024-01-01' WHERE url = 'https://a.com/gone';")
+    conn.commit()
+    conn.close()
+
+    archive.put("https://a.com/1", PAGE)
+    archive.put("https://a.com/2", "<html><body></body></html>")
+    archive.put("https://a.com/bad", "<broken")
+
+    real_extract = np.extract_text_content
+
+    def flaky_extract(html):
+        if html == "<broken":
+            raise ValueError("bad html")
+        return real_extract(html)
+
+    errors = []
+    monkeypatch.setattr(np, "extract_text_content", flaky_extract)
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [0.7] * len(texts))
+    monkeypatch.setattr(np, "log_error", lambda msg, alert=False: errors.append(msg))
+
+    prof = NewsProfessor(db_path=db_path, db_writer=db_writer)
+    assert prof.reprocess_from_archive(archive) == 1
+    prof.close()
+    assert errors and "https://a.com/bad" in errors[0]
+
+    rows = {r[0]: r for r in np.get_news_by_urls(db_path, ["https://a.com/1", "https://a.com/gone"])}
+    assert rows["https://a.com/1"][1] == "Kafka 4.0"
+    assert "ZooKeeper is gone." in rows["https://a.com/1"][3]
+    assert rows["https://a.com/1"][5] == 0.7
+    assert rows["https://a.com/gone"][3] == "old content"
+    assert len(get_news_urls(db_path)) == 4
+
+
+def test_reprocess_cli(monkeypatch, tmp_path):
+    import app.reprocess as rp
+
+    infos, errors = [], []
+    calls = []
+    settings = SimpleNamespace(
+        database_path=str(tmp_path / "news.db"),
+        html_archive_path=None,
+        compress_content=True,
+        db_writer=True,
+    )
+    monkeypatch.setattr(rp, "get_settings", lambda: settings)
+    monkeypatch.setattr(rp, "log_info", infos.append)
+    monkeypatch.setattr(rp, "log_error", lambda msg, alert=False: errors.append(msg))
+    monkeypatch.setattr(
+        rp.NewsProfessor, "reprocess_from_archive", lambda self, archive: calls.append(archive) or 3
+    )
+
+    assert rp.main([]) == 1
+    assert "NEWS_BOT_HTML_ARCHIVE" in errors[0]
+
+    assert rp.main(["--archive", str(tmp_path / "archive.db")]) == 0
+    assert isinstance(calls[0], HtmlArchive)
+    assert infos[-1] == "Переразбор из архива завершён: обновлено 3 новостей."
+
+
+def test_professor_archives_fetched_pages(monkeypatch, tmp_path):
+    import app.news_professor as np
+
+    infos = []
+    monkeypatch.setattr(tp, "_download_with_retry", lambda url, timeout=10: PAGE)
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [1.0] * len(texts))
+    monkeypatch.setattr(np, "log_info", infos.append)
+
+    archive_path = str(tmp_path / "archive.db")
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"), html_archive=archive_path)
+    prof.fetch_and_store_new_articles_batch(
+        links=["https://a.com/2025/kafka"], substring="/2025/", max_to_fetch=1
+    )
+
+    assert HtmlArchive(archive_path).get("https://a.com/2025/kafka") == PAGE
+    assert any(m.startswith("Архив HTML: записано") for m in infos)
@@ -0,0 +1,60 @@
+# tests/test_junk_filter.py
+from app.junk_filter import (
+    JunkStats,
+    boilerplate_fingerprint,
+    junk_reason,
+    link_density,
+    repeated_fingerprints,
+)
+
+ARTICLE = "Kafka 4.0 drops ZooKeeper and ships KRaft by default. " * 10
+
+
+def test_junk_reason_interstitial_and_short_pages():
+    assert junk_reason("Page Not Found. Try the search.") == "заглушка «page not found»"
+    assert junk_reason("Страница не найдена") == "заглушка «страница не найдена»"
+    assert junk_reason("Just a title") == "слишком короткий текст"
+    assert junk_reason(ARTICLE) is None
+
+
+def test_junk_reason_ignores_phrases_in_long_articles():
+    long_text = ARTICLE * 4 + "We ask readers to subscribe to continue supporting us."
+    assert junk_reason(long_text) is None
+
+
+def test_link_density_detects_category_pages():
+    links = "".join(f'<li><a href="/p{i}">Headline number {i}</a></li>' for i in range(40))
+    category = f"<html><body><h1>Security</h1><ul>{links}</ul><script>x()</script></body></html>"
+    article = f"<html><body><p>{ARTICLE}</p><a href='/more'>More</a></body></html>"
+
+    assert link_density(category) > 0.9
+    assert link_density(article) < 0.1
+    assert link_density("<html><body></body></html>") == 0.0
+
+    category_text = "Security\n" + "\n".join(f"Headline number {i}" for i in range(40))
+    assert junk_reason(category_text, category).startswith("плотность ссылок")
+    assert junk_reason(ARTICLE, article) is None
+
+
+def test_boilerplate_fingerprint_ignores_digits_and_spaces():
+    assert boilerplate_fingerprint("Sale ends 12.05.2025!") == boilerplate_fingerprint(
+        "Sale  ends 01.06.2025!"
+    )
+    assert boilerplate_fingerprint("One text") != boilerplate_fingerprint("Other text")
+
+
+def test_repeated_fingerprints_and_stats():
+    items = [("src", "a"), ("src", "a"), ("src", "b"), ("other", "a")]
+    # два URL с одним текстом — ещё не шаблон
+    assert repeated_fingerprints(items) == set()
+    assert repeated_fingerprints(items + [("src", "a")]) == {("src", "a")}
+    assert repeated_fingerprints(items, min_count=2) == {("src", "a")}
+
+    stats = JunkStats()
+    stats.record("src", True)
+    stats.record("src", False)
+    stats.record("src", False)
+    stats.record_junk("src")
+    stats.record("clean", False)
+
+    assert stats.stats_messages() == ["Мусорные страницы src: 2 из 3 (67%)."]
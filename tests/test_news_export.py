@@ -0,0 +1,105 @@
+# tests/test_news_export.py
+import json
+import sys
+
+import pytest
+
+ds = pytest.importorskip("pyarrow.dataset")
+
+import app.news_export as ne
+from app.db import get_connection, init_db, save_news_many
+
+
+def _fill(db_path, start, count, source="openai", fetched_at=None):
+    save_news_many(
+        db_path,
+        [
+            (f"https://n/{i}", f"T{i}", "S", f"Body {i}", source, float(i), "2025-01-02")
+            for i in range(start, start + count)
+        ],
+        compress=True,
+    )
+    if fetched_at is not None:
+        with get_connection(db_path) as conn:
+            conn.execute("UPDATE news SET fetched_at = ? WHERE id > ?;", (fetched_at, start))
+            conn.commit()
+
+
+def test_export_partitions_by_month_and_source_and_appends(tmp_path):
+    db_path = str(tmp_path / "news.db")
+    out = str(tmp_path / "export")
+    init_db(db_path)
+    _fill(db_path, 0, 3, fetched_at="2025-01-15T10:00:00+00:00")
+    _fill(db_path, 3, 2, source="the hacker/news", fetched_at="2025-02-01T00:00:00Z")
+    _fill(db_path, 5, 1, source=None, fetched_at="junk")
+
+    stats = ne.export_news(db_path, out, chunk_size=4)
+    assert stats == {"rows": 6, "files": 4, "last_id": 6}
+    state = json.loads((tmp_path / "export" / ne.EXPORT_STATE_FILE).read_text())
+    assert state == {"last_id": 6, "with_content": False}
+
+    parts = sorted(str(p.relative_to(out)) for p in (tmp_path / "export").rglob("*.parquet"))
+    assert parts == [
+        "month=2025-01/source=openai/part-000000000001.parquet",
+        "month=2025-02/source=the%20hacker%2Fnews/part-000000000004.parquet",
+        "month=2025-02/source=the%20hacker%2Fnews/part-000000000005.parquet",
+        "month=__HIVE_DEFAULT_PARTITION__/source=__HIVE_DEFAULT_PARTITION__/"
+        "part-000000000006.parquet",
+    ]
+
+    table = ds.dataset(out, format="parquet", partitioning="hive").to_table()
+    rows = sorted(table.to_pylist(), key=lambda r: r["id"])
+    assert [r["id"] for r in rows] == [1, 2, 3, 4, 5, 6]
+    assert rows[0]["month"] == "2025-01" and rows[0]["source"] == "openai"
+    assert rows[0]["fetched_at"].isoformat() == "2025-01-15T10:00:00+00:00"
+    assert rows[0]["published_at"].isoformat() == "2025-01-02T00:00:00+00:00"
+    assert rows[3]["source"] == "the hacker/news"  # значение раскодировано
+    assert rows[5]["fetched_at"] is None
+    assert rows[5]["month"] is None and rows[5]["source"] is None
+    assert "content" not in table.column_names
+
+    # повторный запуск дописывает только новые строки
+    assert ne.export_news(db_path, out) == {"rows": 0, "files": 0, "last_id": 6}
+    _fill(db_path, 6, 1)
+    assert ne.export_news(db_path, out)["rows"] == 1
+
+
+def test_export_with_content_change_requires_full(tmp_path):
+    db_path = str(tmp_path / "news.db")
+    out = tmp_path / "export"
+    init_db(db_path)
+    _fill(db_path, 0, 2)
+    assert ne.export_news(db_path, str(out))["rows"] == 2
+    (out / "_notes.txt").write_text("своё")
+    _fill(db_path, 2, 1)
+
+    # другая схема в той же выгрузке не дописывается
+    with pytest.raises(RuntimeError, match="--full"):
+        ne.export_news(db_path, str(out), with_content=True)
+
+    assert ne.export_news(db_path, str(out), with_content=True, full=True)["rows"] == 3
+    table = ds.dataset(str(out), format="parquet", partitioning="hive").to_table()
+    assert sorted(table.column("content").to_pylist()) == ["Body 0", "Body 1", "Body 2"]
+    assert (out / "_notes.txt").read_text() == "своё"
+    assert ne.load_state(str(out)) == {"last_id": 3, "with_content": True}
+
+    # состояние старого формата — выгрузка без content
+    (out / ne.EXPORT_STATE_FILE).write_text('{"last_id": 3}')
+    assert ne.load_state(str(out)) == {"last_id": 3, "with_content": False}
+
+
+def test_export_cli(monkeypatch, tmp_path):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    _fill(db_path, 0, 2)
+    infos, errors = [], []
+    monkeypatch.setattr(ne, "log_info", infos.append)
+    monkeypatch.setattr(ne, "log_error", lambda msg, alert=False: errors.append(msg))
+
+    out = str(tmp_path / "export")
+    assert ne.main(["--db", db_path, "--out", out]) == 0
+    assert infos == ["Выгрузка в Parquet: строк 2, файлов 1, последний id 2."]
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)  # pyarrow не установлен
+    assert ne.main(["--db", db_path, "--out", out]) == 1
+    assert "requirements-export.txt" in errors[0]
@@ -1,6 +1,8 @@
 # test_news_professor.py
 from typing import List, Optional
 
+import pytest
+
 from app.news_professor import (
     NewsProfessor,
     build_tool_use_case,
@@ -10,6 +12,16 @@ from app.news_professor import (
 )
 
 
+@pytest.fixture
+def identity_translation(monkeypatch):
+    """
+    Тождественный перевод для тестов публикации и подборок — без сети.
+    """
+    import app.news_professor as np
+
+    monkeypatch.setattr(np, "translate_to_ru", lambda text, **kwargs: text)
+
+
 def test_guess_source_from_url_all_sources():
     from app import news_professor as np
 
@@ -143,20 +155,20 @@ def test_fetch_and_store_new_articles_batch_happy_path(monkeypatch, tmp_path):
 
     saved = []
 
-    def fake_save_news(
-        db_path: str, url: str, title: str, summary: str, content: str, source: str, score: float
-    ) -> None:
-        saved.append(
-            {
-                "db_path": db_path,
-                "url": url,
-                "title": title,
-                "summary": summary,
-                "content": content,
-                "source": source,
-                "score": score,
-            }
-        )
+    def fake_save_news_many(db_path: str, rows, compress: bool = False) -> List[str]:
+        for url, title, summary, content, source, score, published_at in rows:
+            saved.append(
+                {
+                    "db_path": db_path,
+                    "url": url,
+                    "title": title,
+                    "summary": summary,
+                    "content": content,
+                    "source": source,
+                    "score": score,
+                }
+            )
+        return [row[0] for row in rows]
 
     def fake_scores(texts: List[str]) -> List[float]:
         assert len(texts) == 1  # только new-tool
@@ -168,8 +180,10 @@ def test_fetch_and_store_new_articles_batch_happy_path(monkeypatch, tmp_path):
         lambda links, substring: [link for link in links if substring in link],
     )
     monkeypatch.setattr(np, "link_exists", fake_link_exists)
-    monkeypatch.setattr(np, "fetch_text_content", fake_fetch_text)
-    monkeypatch.setattr(np, "save_news", fake_save_news)
+    monkeypatch.setattr(np, "fetch_page", lambda url, variants=None, archive=None: url)
+    monkeypatch.setattr(np, "extract_head_metadata", lambda html: np.PageMetadata())
+    monkeypatch.setattr(np, "extract_text_content", fake_fetch_text)
+    monkeypatch.setattr(np, "save_news_many", fake_save_news_many)
     monkeypatch.setattr(np, "compute_tfidf_scores", fake_scores)
     monkeypatch.setattr(np, "log_info", lambda msg: None)
     monkeypatch.setattr(np, "log_error", lambda msg, alert=False: None)
@@ -205,7 +219,7 @@ def test_fetch_and_store_respects_max_to_fetch(monkeypatch, tmp_path):
 
     fetch_calls = []
 
-    def fake_fetch(url):
+    def fake_fetch(url, variants=None, archive=None):
         fetch_calls.append(url)
         return f"Title\nSummary\nBody for {url}"
 
@@ -214,9 +228,10 @@ def test_fetch_and_store_respects_max_to_fetch(monkeypatch, tmp_path):
 
     monkeypatch.setattr(np, "filter_link_by_substring", fake_filter)
     monkeypatch.setattr(np, "link_exists", fake_link_exists)
-    monkeypatch.setattr(np, "fetch_text_content", fake_fetch)
+    monkeypatch.setattr(np, "fetch_page", fake_fetch)
+    monkeypatch.setattr(np, "extract_text_content", lambda html: html)
     monkeypatch.setattr(np, "compute_tfidf_scores", fake_scores)
-    monkeypatch.setattr(np, "save_news", lambda *a, **k: None)
+    monkeypatch.setattr(np, "save_news_many", lambda db_path, rows, **k: [r[0] for r in rows])
     monkeypatch.setattr(np, "log_info", lambda msg: None)
     monkeypatch.setattr(np, "log_error", lambda msg, alert=False: None)
 
@@ -243,7 +258,7 @@ def test_fetch_and_store_handles_exception_and_no_articles(monkeypatch, tmp_path
     def fake_link_exists(db_path, url):
         return False
 
-    def fake_fetch(url):
+    def fake_fetch(url, variants=None, archive=None):
         raise RuntimeError("boom")
 
     errors = []
@@ -251,9 +266,9 @@ def test_fetch_and_store_handles_exception_and_no_articles(monkeypatch, tmp_path
 
     monkeypatch.setattr(np, "filter_link_by_substring", fake_filter)
     monkeypatch.setattr(np, "link_exists", fake_link_exists)
-    monkeypatch.setattr(np, "fetch_text_content", fake_fetch)
+    monkeypatch.setattr(np, "fetch_page", fake_fetch)
     monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [])
-    monkeypatch.setattr(np, "save_news", lambda *a, **k: None)
+    monkeypatch.setattr(np, "save_news_many", lambda db_path, rows, **k: [r[0] for r in rows])
     monkeypatch.setattr(np, "log_error", lambda msg, alert=False: errors.append(msg))
     monkeypatch.setattr(np, "log_info", lambda msg: infos.append(msg))
 
@@ -270,6 +285,7 @@ def test_fetch_and_store_handles_exception_and_no_articles(monkeypatch, tmp_path
     assert any("Новых статей для сохранения нет." in m for m in infos)
 
 
+@pytest.mark.usefixtures("identity_translation")
 def test_publish_top_news_sorts_and_sends(monkeypatch, tmp_path):
     import app.news_professor as np
 
@@ -361,6 +377,7 @@ def test_publish_top_news_no_rows(monkeypatch):
     assert any("вернул пустой результат" in m for m in warns)
 
 
+@pytest.mark.usefixtures("identity_translation")
 def test_publish_top_news_source_tags_all_topics(monkeypatch, tmp_path):
     import app.news_professor as np
 
@@ -416,18 +433,23 @@ def test_build_tools_digest_items_empty(monkeypatch, tmp_path):
     assert prof.build_tools_digest_items(["https://tool"], max_tools=5) == []
 
 
+@pytest.mark.usefixtures("identity_translation")
 def test_build_tools_digest_items_source_tags(monkeypatch, tmp_path):
     import app.news_professor as np
 
     monkeypatch.setattr(np, "init_db", lambda db_path: None)
 
     rows = [
-        ("https://tool1", "Tool 1", "Desc 1", "Content 1", "github_blog", 0.5),
-        ("https://tool2", "Tool 2", "Desc 2", "Content 2", "python_org", 2.0),
-        ("https://tool3", "Tool 3", "Desc 3", "Content 3", "other", 1.0),
+        ("https://tool1", "Tool 1", "Desc 1", "github_blog", 0.5),
+        ("https://tool2", "Tool 2", "Desc 2", "python_org", 2.0),
+        ("https://tool3", "Tool 3", "Desc 3", "other", 1.0),
     ]
 
-    monkeypatch.setattr(np, "get_news_by_urls", lambda db_path, urls: rows)
+    def fake_get_news_by_urls(db_path, urls, columns):
+        assert "content" not in columns
+        return rows
+
+    monkeypatch.setattr(np, "get_news_by_urls", fake_get_news_by_urls)
 
     prof = NewsProfessor(db_path=str(tmp_path / "news.db"))
     items = prof.build_tools_digest_items([r[0] for r in rows], max_tools=3)
@@ -449,6 +471,7 @@ def test_build_weekly_digest_items_empty_rows(monkeypatch, tmp_path):
     assert prof.build_weekly_digest_items(days_back=7, limit=5) == []
 
 
+@pytest.mark.usefixtures("identity_translation")
 def test_build_weekly_digest_items_all_source_tags(monkeypatch, tmp_path):
     import app.news_professor as np
     from app import db as db_module
@@ -456,14 +479,18 @@ def test_build_weekly_digest_items_all_source_tags(monkeypatch, tmp_path):
     monkeypatch.setattr(np, "init_db", lambda db_path: None)
 
     rows = [
-        ("https://ai", "AI", "S1", "C1", "openai", 3.0, "2025-01-01T00:00:00"),
-        ("https://py", "Py", "S2", "C2", "python_org", 2.0, "2025-01-01T00:00:00"),
-        ("https://de", "DE", "S3", "C3", "databricks", 1.5, "2025-01-01T00:00:00"),
-        ("https://sec", "Sec", "S4", "C4", "the_hacker_news", 1.0, "2025-01-01T00:00:00"),
-        ("https://dev", "Dev", "S5", "C5", "github_blog", 0.5, "2025-01-01T00:00:00"),
+        ("https://ai", "AI", "S1", "openai", 3.0),
+        ("https://py", "Py", "S2", "python_org", 2.0),
+        ("https://de", "DE", "S3", "databricks", 1.5),
+        ("https://sec", "Sec", "S4", "the_hacker_news", 1.0),
+        ("https://dev", "Dev", "S5", "github_blog", 0.5),
     ]
 
-    monkeypatch.setattr(db_module, "get_top_news_for_period", lambda *a, **k: rows)
+    def fake_top_news(db_path, days_back, limit, columns):
+        assert "content" not in columns
+        return rows
+
+    monkeypatch.setattr(db_module, "get_top_news_for_period", fake_top_news)
 
     prof = NewsProfessor(db_path=str(tmp_path / "news.db"))
     items = prof.build_weekly_digest_items(days_back=7, limit=10)
@@ -529,7 +556,7 @@ def test_run_for_today_weekday_news_flow(monkeypatch):
         collected.append(tuple(sites))
         return ["u1", "u2"]
 
-    def fake_fetch_batch(self, links, substring, max_to_fetch):
+    def fake_fetch_batch(self, links, substring, max_to_fetch, full_body=True):
         fetched.append((tuple(links), substring, max_to_fetch))
         return ["u1"]
 
@@ -560,7 +587,7 @@ def test_run_for_today_saturday_tools(monkeypatch):
     monkeypatch.setattr(
         np.NewsProfessor,
         "fetch_and_store_new_articles_batch",
-        lambda self, links, substring, max_to_fetch: ["u1"],
+        lambda self, links, substring, max_to_fetch, full_body=True: ["u1"],
     )
 
     infos = []
@@ -623,7 +650,7 @@ def test_run_for_today_sunday_digest(monkeypatch, tmp_path):
     monkeypatch.setattr(
         np.NewsProfessor,
         "fetch_and_store_new_articles_batch",
-        lambda self, links, substring, max_to_fetch: links,
+        lambda self, links, substring, max_to_fetch, full_body=True: links,
     )
 
     # --- мок для сборки недельного дайджеста ---
@@ -691,6 +718,7 @@ def test_run_for_today_sunday_digest(monkeypatch, tmp_path):
     assert sent == [{"token": "TOKEN", "chat_id": "CHAT", "text": "DIGEST_MSG"}]
 
 
+@pytest.mark.usefixtures("identity_translation")
 def test_build_weekly_digest_items_default_source_tag(monkeypatch, tmp_path):
     import app.news_professor as np
     from app import db as db_module
@@ -703,10 +731,8 @@ def test_build_weekly_digest_items_default_source_tag(monkeypatch, tmp_path):
             "https://other",
             "Other title",
             "Other summary",
-            "Other content",
             "weird_source",  # неизвестный source
             0.7,
-            "2025-01-01T00:00:00",
         )
     ]
 
@@ -722,3 +748,557 @@ def test_build_weekly_digest_items_default_source_tag(monkeypatch, tmp_path):
     assert len(items) == 1
     assert items[0]["url"] == "https://other"
     assert items[0]["source_tag"] == "#НовостиIT"
+
+
+def test_from_settings_and_light_variants_roundtrip(monkeypatch, tmp_path):
+    import app.news_professor as np
+    from app.config import Settings
+    from app.db import get_page_variants
+    from app.text_parser import PageVariants
+
+    db_path = str(tmp_path / "news.db")
+    settings = Settings(
+        telegram_bot_token="t",
+        telegram_chat_id="c",
+        error_chat_id="e",
+        database_path=db_path,
+        light_variants=True,
+    )
+    prof = NewsProfessor.from_settings(settings)
+    assert prof.light_variants is True
+
+    seen = []
+
+    def fake_fetch(url, variants=None, archive=None):
+        seen.append(variants)
+        variants.learn("site.com", "{url}/amp", 5.0)
+        variants.bytes_downloaded += 4096
+        variants.bytes_saved += 2048
+        return f"Title\nSummary\nBody of {url}"
+
+    infos = []
+    monkeypatch.setattr(np, "fetch_page", fake_fetch)
+    monkeypatch.setattr(np, "extract_text_content", lambda html: html)
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [1.0] * len(texts))
+    monkeypatch.setattr(np, "log_info", infos.append)
+
+    new_urls = prof.fetch_and_store_new_articles_batch(
+        links=["https://site.com/2025/a"], substring="/2025/", max_to_fetch=5
+    )
+
+    assert new_urls == ["https://site.com/2025/a"]
+    assert isinstance(seen[0], PageVariants)
+    assert get_page_variants(db_path) == {"site.com": ("{url}/amp", 5.0)}
+    assert any("скачано 4 КБ, сэкономлено ≈2 КБ" in m for m in infos)
+
+    # повторный прогон получает выученные шаблоны из БД
+    seen.clear()
+    prof.fetch_and_store_new_articles_batch(
+        links=["https://site.com/2025/b"], substring="/2025/", max_to_fetch=5
+    )
+    assert seen[0].templates["site.com"] == ("{url}/amp", 5.0)
+
+
+def test_invalidated_light_variant_is_deleted_from_db(monkeypatch, tmp_path):
+    import app.news_professor as np
+    from app.db import get_page_variants, save_page_variant
+
+    db_path = str(tmp_path / "news.db")
+    prof = NewsProfessor(db_path=db_path, light_variants=True)
+    save_page_variant(db_path, "site.com", "https://site.com{path}/amp", 4.0)
+    save_page_variant(db_path, "other.com", "https://other.com{path}/amp", 2.0)
+
+    def fake_fetch(url, variants=None, archive=None):
+        variants.invalidate("site.com")  # лёгкая версия перестала открываться
+        return "Title\nSummary\nBody"
+
+    infos = []
+    monkeypatch.setattr(np, "fetch_page", fake_fetch)
+    monkeypatch.setattr(np, "extract_text_content", lambda html: html)
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [1.0] * len(texts))
+    monkeypatch.setattr(np, "log_info", infos.append)
+
+    prof.fetch_and_store_new_articles_batch(
+        links=["https://site.com/2025/a"], substring="/2025/", max_to_fetch=5
+    )
+
+    assert get_page_variants(db_path) == {"other.com": ("https://other.com{path}/amp", 2.0)}
+    assert "Лёгкая версия страниц для site.com больше не используется." in infos
+
+
+def test_from_settings_passes_storage_options(tmp_path):
+    from app.config import Settings
+
+    settings = Settings(
+        telegram_bot_token="t",
+        telegram_chat_id="c",
+        error_chat_id="e",
+        database_path=str(tmp_path / "news.db"),
+        junk_filter=True,
+        dedup_days=7,
+        compress_content=True,
+        db_writer=True,
+    )
+    prof = NewsProfessor.from_settings(settings)
+    try:
+        assert prof.junk_filter is True
+        assert prof.dedup_days == 7
+        assert prof.compress_content is True
+        assert prof.db_writer is not None
+    finally:
+        prof.close()
+
+    defaults = Settings(
+        telegram_bot_token="t",
+        telegram_chat_id="c",
+        error_chat_id="e",
+        database_path=str(tmp_path / "news.db"),
+    )
+    assert NewsProfessor.from_settings(defaults).db_writer is None
+
+
+def test_fetch_and_store_through_background_writer(monkeypatch, tmp_path):
+    import app.db_writer as dbw
+    import app.news_professor as np
+
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"), db_writer=True, dedup_days=7)
+    infos = []
+    page = "Title\nSummary\nBody"
+    monkeypatch.setattr(np, "fetch_page", lambda url, variants=None, archive=None: page)
+    monkeypatch.setattr(np, "extract_text_content", lambda html: html)
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [1.0] * len(texts))
+    monkeypatch.setattr(np, "log_info", infos.append)
+    monkeypatch.setattr(dbw, "log_info", infos.append)
+
+    assert prof.fetch_and_store_new_articles_batch(
+        links=["https://site.com/2025/a"], substring="/2025/", max_to_fetch=5
+    ) == ["https://site.com/2025/a"]
+    # та же история под другим URL — почти-дубликат из истории
+    assert prof.fetch_and_store_new_articles_batch(
+        links=["https://other.com/2025/b"], substring="/2025/", max_to_fetch=5
+    ) == []
+
+    assert len(prof._pending_writes) == 1  # отпечатки второго прогона пишутся без ожидания
+    prof.close()
+    assert prof._pending_writes == []
+    # новость первого прогона и отпечатки обоих
+    assert prof.db_writer.operations == 3
+    assert any(m.startswith("Фоновая запись в БД: операций 3") for m in infos)
+
+
+def test_close_reports_failed_deferred_write(tmp_path):
+    import sqlite3
+
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"), db_writer=True)
+    prof._pending_writes.append(prof.db_writer.submit(lambda conn: conn.execute("BOGUS;")))
+    with pytest.raises(sqlite3.OperationalError):
+        prof.close()
+
+
+def test_fetch_and_store_head_only_skips_body(monkeypatch, tmp_path):
+    import app.news_professor as np
+    from app.db import get_connection
+
+    db_path = str(tmp_path / "news.db")
+    prof = NewsProfessor(db_path=db_path, dedup_days=7)
+
+    meta = np.PageMetadata(title="OG title", summary="OG summary", published_at="2025-05-01")
+
+    monkeypatch.setattr(np, "fetch_page", lambda url, variants=None, archive=None: "<html></html>")
+    monkeypatch.setattr(np, "extract_head_metadata", lambda html: meta)
+    monkeypatch.setattr(
+        np,
+        "extract_text_content",
+        lambda html: (_ for _ in ()).throw(AssertionError("body must not be parsed")),
+    )
+    monkeypatch.setattr(
+        np,
+        "translate_to_ru",
+        lambda text, **kwargs: (_ for _ in ()).throw(AssertionError("no translation before ranking")),
+    )
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [1.0] * len(texts))
+    monkeypatch.setattr(np, "log_info", lambda msg: None)
+
+    new_urls = prof.fetch_and_store_new_articles_batch(
+        links=["https://site.com/2025/a"], substring="/2025/", max_to_fetch=5, full_body=False
+    )
+    assert new_urls == ["https://site.com/2025/a"]
+
+    with get_connection(db_path) as conn:
+        row = conn.execute("SELECT title, summary, content, published_at FROM news;").fetchone()
+    # тело не скачивали — content NULL, а не заголовок с summary навсегда
+    assert row == ("OG title", "OG summary", None, "2025-05-01")
+
+    # если такую статью всё же публикуют — пост собирается из title и summary
+    sent = []
+    monkeypatch.setattr(np, "translate_to_ru", lambda text, **kwargs: text)
+    settings = type("S", (), {"telegram_bot_token": "t", "telegram_chat_id": "c"})
+    monkeypatch.setattr(np, "get_settings", lambda: settings)
+    monkeypatch.setattr(
+        np, "format_news_message", lambda url, content, topic_tag, source_tag: content
+    )
+    monkeypatch.setattr(np, "send_message", lambda bot_token, chat_id, text: sent.append(text))
+    prof.publish_top_news(new_urls)
+    assert sent == ["OG title\nOG summary"]
+
+
+def test_fetch_and_store_metadata_first_with_full_body(monkeypatch, tmp_path):
+    import app.news_professor as np
+
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"))
+
+    saved = []
+    monkeypatch.setattr(np, "fetch_page", lambda url, variants=None, archive=None: "<html></html>")
+    monkeypatch.setattr(
+        np, "extract_head_metadata", lambda html: np.PageMetadata(title="OG title")
+    )
+    monkeypatch.setattr(np, "extract_text_content", lambda html: "Nav\nFirst line\nSecond")
+    monkeypatch.setattr(np, "translate_to_ru", lambda text, **kwargs: text)
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [1.0] * len(texts))
+    def fake_save_news_many(db_path, rows, compress=False):
+        keys = ("url", "title", "summary", "content", "source", "score", "published_at")
+        saved.extend(dict(zip(keys, row)) for row in rows)
+        return [row[0] for row in rows]
+
+    monkeypatch.setattr(np, "save_news_many", fake_save_news_many)
+    monkeypatch.setattr(np, "log_info", lambda msg: None)
+
+    prof.fetch_and_store_new_articles_batch(
+        links=["https://site.com/2025/a"], substring="/2025/", max_to_fetch=5, full_body=False
+    )
+
+    assert saved[0]["title"] == "OG title"
+    assert saved[0]["summary"] == "First line Second"
+    assert saved[0]["content"] == "Nav\nFirst line\nSecond"
+
+
+def test_content_plan_weekend_days_skip_full_body():
+    from app.news_professor import CONTENT_PLAN
+
+    assert CONTENT_PLAN[5].full_body is False
+    assert CONTENT_PLAN[6].full_body is False
+    assert all(CONTENT_PLAN[d].full_body for d in range(5))
+
+
+def test_publish_top_news_translates_only_published_fields(monkeypatch, tmp_path):
+    import app.news_professor as np
+    from app.telegram_bot import BODY_MAX_LEN
+
+    monkeypatch.setattr(np, "init_db", lambda db_path: None)
+
+    long_body = "word " * 400
+    rows = [
+        ("https://top", "T", "S", f"Top title\n{long_body}", "openai", 2.0),
+        ("https://low", "T", "S", "Low title\nLow body", "openai", 0.1),
+    ]
+    monkeypatch.setattr(np, "get_news_by_urls", lambda db_path, urls: rows)
+    monkeypatch.setattr(np, "get_today_tags", lambda: {"topic_tag": "#T", "source_tag": "#S"})
+
+    translated = []
+
+    def fake_translate(text, **kwargs):
+        translated.append(text)
+        return f"RU[{text}]"
+
+    formatted = []
+    monkeypatch.setattr(np, "translate_to_ru", fake_translate)
+    monkeypatch.setattr(
+        np,
+        "format_news_message",
+        lambda url, content, topic_tag, source_tag: formatted.append(content) or "MSG",
+    )
+    monkeypatch.setattr(np, "send_message", lambda bot_token, chat_id, text: None)
+    monkeypatch.setattr(
+        np, "get_settings", type("S", (), {"telegram_bot_token": "T", "telegram_chat_id": "C"})
+    )
+    monkeypatch.setattr(np, "log_info", lambda msg: None)
+
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"))
+    prof.publish_top_news(["https://top", "https://low"], max_to_publish=1)
+
+    assert translated[0] == "Top title"
+    assert len(translated[1]) <= BODY_MAX_LEN
+    assert len(translated) == 2  # «низкая» новость не переводится
+    assert formatted[0].startswith("RU[Top title]\nRU[word")
+
+
+def test_translate_news_content_without_body(monkeypatch):
+    import app.news_professor as np
+
+    monkeypatch.setattr(np, "init_db", lambda db_path: None)
+    monkeypatch.setattr(np, "translate_to_ru", lambda text, **kwargs: f"RU[{text}]")
+
+    prof = NewsProfessor(db_path=":memory:")
+    assert prof._translate_news_content("Only title") == "RU[Only title]"
+
+
+def test_digest_builders_translate_selected_items_only(monkeypatch, tmp_path):
+    import app.news_professor as np
+    from app import db as db_module
+
+    monkeypatch.setattr(np, "init_db", lambda db_path: None)
+
+    translated = []
+
+    def fake_translate(text, **kwargs):
+        translated.append(text)
+        return text.upper()
+
+    monkeypatch.setattr(np, "translate_to_ru", fake_translate)
+
+    rows = [
+        ("https://t1", "Tool one", "Desc one", "github_blog", 2.0),
+        ("https://t2", None, None, "github_blog", 1.0),
+        ("https://t3", "Tool three", "Desc three", "github_blog", 0.5),
+    ]
+    monkeypatch.setattr(np, "get_news_by_urls", lambda db_path, urls, columns: rows)
+
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"))
+    items = prof.build_tools_digest_items([r[0] for r in rows], max_tools=2)
+
+    assert [it["title"] for it in items] == ["TOOL ONE", "Новый инструмент"]
+    assert items[0]["summary"] == "DESC ONE"
+    assert "Tool three" not in translated
+
+    weekly_rows = [("https://w1", None, "Weekly desc", "openai", 1.0)]
+    monkeypatch.setattr(db_module, "get_top_news_for_period", lambda *a, **k: weekly_rows)
+
+    events = prof.build_weekly_digest_items(days_back=7, limit=1)
+    assert events[0]["title"] == "Событие недели"
+    assert events[0]["summary"] == "WEEKLY DESC"
+
+
+def test_translation_cache_and_memory_wiring_and_stats(monkeypatch, tmp_path):
+    import app.news_professor as np
+
+    infos = []
+    calls = []
+
+    def fake_translate(text, **kwargs):
+        calls.append(kwargs)
+        return text
+
+    monkeypatch.setattr(np, "translate_to_ru", fake_translate)
+    monkeypatch.setattr(np, "log_info", infos.append)
+
+    bare = NewsProfessor(db_path=str(tmp_path / "a.db"))
+    assert bare.translation_engine.cache is None
+    assert bare.translation_engine.memory is None
+    assert bare.translation_engine.rate_limiter is None
+    assert bare.translation_engine.breaker is None
+
+    prof = NewsProfessor(
+        db_path=str(tmp_path / "news.db"),
+        translation_cache_size=10,
+        translation_memory_size=100,
+        translator_backend="offline",
+        translator_rate_limit=3,
+        translator_max_failures=2,
+    )
+    assert prof._translate("hello") == "hello"
+    assert prof.translation_engine.backend.name == "offline"
+    assert prof.translation_engine.rate_limiter.rate == 3
+    assert prof.translation_engine.breaker.max_failures == 2
+    assert calls == [{"engine": prof.translation_engine, "tech_terms": None}]
+    assert prof.translation_engine.cache.max_entries == 10
+    assert prof.translation_engine.memory.max_entries == 100
+
+    prof.translation_engine.latencies_ms.extend([5.0, 15.0, 10.0])
+    prof._log_translation_stats()
+    assert any("3 текстов, задержка p50=10 мс, max=15 мс" in m for m in infos)
+    assert any("Кэш переводов" in m for m in infos)
+    assert any("Память переводов" in m for m in infos)
+
+
+def test_tech_terms_file_extends_default_dictionary(tmp_path):
+    terms_file = tmp_path / "terms.txt"
+    terms_file.write_text("Grafana\n", encoding="utf-8")
+
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"), tech_terms_file=str(terms_file))
+
+    assert prof.tech_term_pattern.search("Grafana dashboards")
+    assert prof.tech_term_pattern.search("Python release")
+
+
+def test_fetch_and_store_drops_junk_pages_before_scoring(monkeypatch, tmp_path):
+    import app.news_professor as np
+
+    article = "Real article line. " * 40
+    pages = {
+        "https://site.com/2025/real": f"Kafka 4.0 released\n{article}",
+        "https://site.com/2025/short": "Tiny page",
+        "https://site.com/2025/wall": "Please subscribe to continue reading " + "x" * 400,
+        "https://site.com/2025/tpl-1": "Template page 1\n" + "Same boilerplate. " * 30,
+        "https://site.com/2025/tpl-2": "Template page 2\n" + "Same boilerplate. " * 30,
+        "https://site.com/2025/tpl-3": "Template page 3\n" + "Same boilerplate. " * 30,
+    }
+    scored = []
+    infos = []
+
+    monkeypatch.setattr(np, "fetch_page", lambda url, variants=None, archive=None: pages[url])
+    monkeypatch.setattr(np, "extract_text_content", lambda html: html)
+    monkeypatch.setattr(np, "link_exists", lambda db, url: False)
+    monkeypatch.setattr(np, "save_news_many", lambda db_path, rows, **k: [r[0] for r in rows])
+    monkeypatch.setattr(np, "log_info", infos.append)
+
+    def fake_scores(texts):
+        scored.extend(texts)
+        return [1.0] * len(texts)
+
+    monkeypatch.setattr(np, "compute_tfidf_scores", fake_scores)
+
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"), junk_filter=True)
+    new_urls = prof.fetch_and_store_new_articles_batch(
+        links=list(pages), substring="/2025/", max_to_fetch=10
+    )
+
+    assert new_urls == ["https://site.com/2025/real"]
+    assert len(scored) == 1
+    assert any("subscribe to continue" in m for m in infos)
+    assert any("повторяющийся шаблон" in m for m in infos)
+    assert "Мусорные страницы other: 5 из 6 (83%)." in infos
+
+
+def test_fetch_and_store_keeps_first_copy_of_article_under_two_urls(monkeypatch, tmp_path):
+    import app.news_professor as np
+
+    article = "Kafka 4.0 released\n" + "KRaft only, ZooKeeper removed. " * 20
+    pages = {
+        "https://site.com/2025/kafka-4/": article,
+        "https://site.com/2025/kafka-4/amp/": article,
+    }
+    fetched = []
+    infos = []
+
+    def fake_fetch(url, variants=None, archive=None):
+        fetched.append(url)
+        return pages[url]
+
+    monkeypatch.setattr(np, "fetch_page", fake_fetch)
+    monkeypatch.setattr(np, "extract_text_content", lambda html: html)
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [1.0] * len(texts))
+    monkeypatch.setattr(np, "log_info", infos.append)
+
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"), junk_filter=True)
+    new_urls = prof.fetch_and_store_new_articles_batch(
+        links=[
+            "https://site.com/2025/kafka-4/",
+            "https://site.com/2025/kafka-4/#comments",
+            "https://site.com/2025/kafka-4/amp/",
+        ],
+        substring="/2025/",
+        max_to_fetch=10,
+    )
+
+    # #comments — та же страница, её не скачиваем; /amp/ — та же статья под другим URL
+    assert fetched == ["https://site.com/2025/kafka-4/", "https://site.com/2025/kafka-4/amp/"]
+    assert new_urls == ["https://site.com/2025/kafka-4/"]
+    assert "Пропускаю повтор статьи под другим URL: https://site.com/2025/kafka-4/amp/" in infos
+    assert not any(m.startswith("Мусорные страницы") for m in infos)
+
+
+def test_fetch_and_store_junk_filter_keeps_real_articles(monkeypatch, tmp_path):
+    import app.news_professor as np
+
+    monkeypatch.setattr(np, "fetch_page", lambda url, variants=None, archive=None: f"Title {url}\n" + "Body. " * 80)
+    monkeypatch.setattr(np, "extract_text_content", lambda html: html)
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [1.0] * len(texts))
+
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"), junk_filter=True)
+    new_urls = prof.fetch_and_store_new_articles_batch(
+        links=["https://site.com/2025/a", "https://site.com/2025/b"],
+        substring="/2025/",
+        max_to_fetch=5,
+    )
+
+    assert new_urls == ["https://site.com/2025/a", "https://site.com/2025/b"]
+
+
+def test_fetch_and_store_suppresses_near_duplicates(monkeypatch, tmp_path):
+    import app.news_professor as np
+
+    story = "Critical CVE-2025-1234 in XZ allows remote code execution. " + " ".join(
+        f"detail{i} of the incident report number {i}." for i in range(60)
+    )
+    pages = {
+        "https://thehackernews.com/2025/xz": f"XZ backdoor\n{story}",
+        "https://gbhackers.com/2025/xz": f"XZ backdoor\n{story} Via GBHackers.",
+        "https://thehackernews.com/2025/kafka": "Kafka 4.0\n" + "KRaft only, ZooKeeper removed. " * 5,
+    }
+    infos = []
+    monkeypatch.setattr(np, "fetch_page", lambda url, variants=None, archive=None: pages[url])
+    monkeypatch.setattr(np, "extract_text_content", lambda html: html)
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [1.0] * len(texts))
+    monkeypatch.setattr(np, "log_info", infos.append)
+
+    prof = NewsProfessor(db_path=str(tmp_path / "news.db"), dedup_days=7)
+    new_urls = prof.fetch_and_store_new_articles_batch(
+        links=list(pages), substring="/2025/", max_to_fetch=10
+    )
+
+    assert new_urls == [
+        "https://thehackernews.com/2025/xz",
+        "https://thehackernews.com/2025/kafka",
+    ]
+    assert "Почти-дубликатов отброшено: 1." in infos
+
+    # на следующем прогоне дубликат уже считается обработанной ссылкой
+    assert prof.fetch_and_store_new_articles_batch(
+        links=list(pages), substring="/2025/", max_to_fetch=10
+    ) == []
+
+
+def test_near_duplicate_check_runs_after_junk_filter(monkeypatch, tmp_path):
+    import app.news_professor as np
+    from app.db import get_connection
+
+    text = "Weekly roundup of the blog. " + " ".join(
+        f"item{i} in the list of posts number {i}." for i in range(60)
+    )
+    pages = {f"https://site.com/2025/tag-{i}": text for i in range(3)}
+    # та же подборка у другого источника — единственная настоящая копия
+    pages["https://other.com/2025/roundup"] = text + " Reposted."
+    monkeypatch.setattr(np, "fetch_page", lambda url, variants=None, archive=None: pages[url])
+    monkeypatch.setattr(np, "extract_text_content", lambda html: html)
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [1.0] * len(texts))
+    monkeypatch.setattr(np, "log_info", lambda msg: None)
+
+    db_path = str(tmp_path / "news.db")
+    prof = NewsProfessor(db_path=db_path, junk_filter=True, dedup_days=7)
+    new_urls = prof.fetch_and_store_new_articles_batch(
+        links=list(pages), substring="/2025/", max_to_fetch=10
+    )
+
+    # шаблоны site.com отброшены до поиска дубликатов и не стали «оригиналом»
+    assert new_urls == ["https://other.com/2025/roundup"]
+    with get_connection(db_path) as conn:
+        assert conn.execute(
+            "SELECT COUNT(*) FROM news_simhash WHERE duplicate_of IS NOT NULL;"
+        ).fetchone() == (0,)
+
+
+def test_fetch_and_store_returns_only_inserted_urls(monkeypatch, tmp_path):
+    import app.news_professor as np
+    from app.db import save_news
+
+    db_path = str(tmp_path / "news.db")
+    prof = NewsProfessor(db_path=db_path)
+    # статью успел сохранить параллельный прогон — уже после проверки link_exists
+    save_news(db_path, "https://site.com/2025/raced", "T", "S", "C", "other", 1.0)
+
+    infos = []
+    monkeypatch.setattr(np, "link_exists", lambda db, url: False)
+    monkeypatch.setattr(np, "fetch_page", lambda url, variants=None, archive=None: url)
+    monkeypatch.setattr(np, "extract_text_content", lambda html: f"Title\nBody of {html}")
+    monkeypatch.setattr(np, "compute_tfidf_scores", lambda texts: [0.5] * len(texts))
+    monkeypatch.setattr(np, "log_info", infos.append)
+
+    new_urls = prof.fetch_and_store_new_articles_batch(
+        links=["https://site.com/2025/raced", "https://site.com/2025/fresh"],
+        substring="/2025/",
+        max_to_fetch=5,
+    )
+
+    assert new_urls == ["https://site.com/2025/fresh"]
+    saved_logs = [m for m in infos if m.startswith("Сохранена новость")]
+    assert saved_logs == ["Сохранена новость: https://site.com/2025/fresh (score=0.500)"]
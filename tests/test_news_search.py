@@ -0,0 +1,86 @@
+# tests/test_news_search.py
+import argparse
+
+import pytest
+
+import app.news_search as ns
+from app.db import get_connection, init_db, save_news_many
+
+
+def test_to_fts_query_and_terms():
+    assert ns.to_fts_query('c++ "kafka" stream*') == '"c" "kafka" "stream"*'
+    assert ns.to_fts_query("  -- ") == ""
+    assert ns.query_terms('"Apache Kafka" OR redis NOT "stream"*') == [
+        "apache",
+        "kafka",
+        "redis",
+        "stream*",
+    ]
+
+
+def test_make_snippet_highlights_window_around_first_match():
+    text = " ".join(f"w{i}" for i in range(100)) + " Kafka tail"
+    snippet = ns.make_snippet(text, ["kafka"], words=6)
+    assert snippet == "…w96 w97 w98 w99 [Kafka] tail"
+
+    text = "Intro. " + " ".join(f"w{i}" for i in range(50)) + " streaming kafka"
+    snippet = ns.make_snippet(text, ["stream*"], words=6)
+    assert snippet.startswith("…") and "[streaming]" in snippet and snippet.endswith("kafka")
+
+    assert ns.make_snippet("No   match\nhere at all", ["kafka"], words=3) == "No match here…"
+    assert ns.make_snippet(None, ["kafka"]) == ""
+
+
+def test_snippet_for_prefers_field_with_match():
+    record = type("R", (), {"content": "body", "summary": "about Kafka", "title": "T"})()
+    assert ns.snippet_for(record, ["kafka"]) == "about [Kafka]"
+    record.content = None
+    assert ns.snippet_for(record, ["redis"]) == "about Kafka"
+
+
+def test_date_argument():
+    assert ns._date_ts("2025-01-02") == 1735776000
+    with pytest.raises(argparse.ArgumentTypeError):
+        ns._date_ts("02.01.2025")
+
+
+def test_search_cli(monkeypatch, tmp_path, capsys):
+    db_path = str(tmp_path / "news.db")
+    init_db(db_path)
+    save_news_many(
+        db_path,
+        [
+            ("https://new", "Kafka 4.0", "S", "Release of kafka", "apache", 1.0, None),
+            ("https://old", "Old", "S", "Kafka in 2020", None, 1.0, None),
+        ],
+        compress=True,
+    )
+    with get_connection(db_path) as conn:
+        conn.execute(
+            "UPDATE news SET fetched_at = '2020-05-01T00:00:00+00:00' WHERE url = 'https://old';"
+        )
+        conn.commit()
+    errors = []
+    monkeypatch.setattr(ns, "log_error", lambda msg, alert=False: errors.append(msg))
+
+    assert ns.main(["--db", db_path, "kafka"]) == 0
+    out = capsys.readouterr().out
+    assert "https://new" in out and "https://old" in out
+    assert "2020-05-01  -  Old\n    https://old\n    [Kafka] in 2020" in out
+    assert out.endswith("Найдено: 2.\n")
+
+    assert ns.main(["--db", db_path, "--days", "30", "kafka"]) == 0
+    assert "https://old" not in capsys.readouterr().out
+
+    window = ["--since", "2020-01-01", "--until", "2021-01-01"]
+    assert ns.main(["--db", db_path, *window, "kafka"]) == 0
+    out = capsys.readouterr().out
+    assert "https://old" in out and "https://new" not in out
+
+    assert ns.main(["--db", db_path, "--raw", '"release of" OR nothing']) == 0
+    assert "https://new" in capsys.readouterr().out
+
+    assert ns.main(["--db", db_path, "--raw", "kafka AND"]) == 1
+    assert "Ошибка поискового запроса" in errors[-1]
+    assert ns.main(["--db", db_path, "++"]) == 1
+    assert "Пустой поисковый запрос" in errors[-1]
@@ -3,6 +3,7 @@ import pytest
 import requests
 
 from app import text_parser as tp
+from app import translation as tr
 
 
 class DummyResponse:
@@ -31,7 +32,7 @@ def mock_google_translator(monkeypatch):
         def translate(self, text: str) -> str:
             return text
 
-    monkeypatch.setattr(tp, "GoogleTranslator", DummyTranslator)
+    monkeypatch.setattr(tr, "GoogleTranslator", DummyTranslator)
 
 
 # --- тесты fetch_text_content ---
@@ -201,7 +202,7 @@ def test_translate_to_ru_ok_path(monkeypatch):
         def translate(self, text: str) -> str:
             return text + " RU"
 
-    monkeypatch.setattr(tp, "GoogleTranslator", DummyTranslator)
+    monkeypatch.setattr(tr, "GoogleTranslator", DummyTranslator)
 
     result = tp.translate_to_ru("hello")
     assert result == "hello RU"
@@ -218,19 +219,40 @@ def test_translate_to_ru_exception_path(monkeypatch):
         def translate(self, text: str) -> str:
             raise RuntimeError("boom")
 
-    monkeypatch.setattr(tp, "GoogleTranslator", FailingTranslator)
+    monkeypatch.setattr(tr, "GoogleTranslator", FailingTranslator)
 
     result = tp.translate_to_ru("hello")
     assert result == "hello"
 
 
+def test_translate_to_ru_skips_blank_text(monkeypatch):
+    class FailingTranslator:
+        def __init__(self, source="auto", target="ru"):
+            raise AssertionError("translator must not be created for blank text")
+
+    monkeypatch.setattr(tr, "GoogleTranslator", FailingTranslator)
+
+    assert tp.translate_to_ru("   ") == "   "
+
+
+def test_extract_text_content_does_not_translate(monkeypatch):
+    class FailingTranslator:
+        def __init__(self, source="auto", target="ru"):
+            raise AssertionError("extraction must not translate")
+
+    monkeypatch.setattr(tr, "GoogleTranslator", FailingTranslator)
+
+    content = tp.extract_text_content("<html><body><p>Original text</p></body></html>")
+    assert content == "Original text"
+
+
 # --- тест, который прогоняет полный пайплайн очистки ---
 
 
 def test_full_clean_pipeline(monkeypatch):
     """
-    Проверяет, что полная цепочка обработки (clean_unicode, нормализация пробелов,
-    translate_to_ru) реально выполняется.
+    Проверяет, что полная цепочка обработки (clean_unicode, нормализация пробелов)
+    реально выполняется.
     """
     html = """
     <html>
@@ -245,7 +267,6 @@ def test_full_clean_pipeline(monkeypatch):
     # мокаем скачивание
     monkeypatch.setattr(tp, "_download_with_retry", lambda url, timeout=10: html)
 
-    # переводчик уже замокан фикстурой mock_google_translator → вернёт исходный текст
     content = tp.fetch_text_content("https://example.com/full")
 
     # Заголовок на месте
@@ -260,6 +281,25 @@ def test_full_clean_pipeline(monkeypatch):
     assert "Another line" in content
 
 
+def test_normalize_text_keeps_line_structure():
+    text = "  Title\u00a0 \n\n\t Para\u200bgraph   one \u2028second\tline\r\n\n\ufeffLast\u202fline  "
+
+    assert tp.normalize_text(text) == "Title\nParagraph one\nsecond line\nLast line"
+    assert tp.normalize_text(" \n \u200b ") == ""
+    assert tp.clean_unicode("a\u00a0b\u200bc") == "a bc"
+
+
+def test_extract_text_content_keeps_lines_after_nbsp():
+    html = (
+        "<html><head><title> Big\u00a0 news </title></head>"
+        "<body><p>First\u00a0</p><p>\u00a0Second</p></body></html>"
+    )
+
+    assert tp.extract_text_content(html) == "Big news\nFirst\nSecond"
+    assert tp.extract_text_content("<html><head><title>Only</title></head></html>") == "Only"
+    assert tp.extract_text_content("<html><body> </body></html>") is None
+
+
 def test_protect_tech_terms():
     from app.text_parser import _protect_tech_terms
 
@@ -287,6 +327,62 @@ def test_restore_tech_terms():
     assert restored == "Hello Python world"
 
 
+def test_protect_tech_terms_single_pass_longest_match():
+    from app.text_parser import (
+        DEFAULT_TECH_TERMS,
+        _protect_tech_terms,
+        _restore_tech_terms,
+        build_tech_term_pattern,
+    )
+
+    pattern = build_tech_term_pattern(DEFAULT_TECH_TERMS + ("GitHub", "GitHub Actions", "Node.js"))
+    text = "GitHub Actions, github, Zero Day, ZeroDay, Node.js, Pythonic, Python"
+    protected, placeholders = _protect_tech_terms(text, pattern)
+
+    assert list(placeholders.values()) == [
+        "GitHub Actions",
+        "github",
+        "Zero Day",
+        "ZeroDay",
+        "Node.js",
+        "Python",
+    ]
+    assert "Pythonic" in protected  # только целые слова
+    assert _restore_tech_terms(protected, placeholders) == text
+    assert _restore_tech_terms("no placeholders", {}) == "no placeholders"
+    assert _restore_tech_terms("__TECH_TERM_9__", placeholders) == "__TECH_TERM_9__"
+
+
+def test_default_tech_terms_leave_everyday_words_alone():
+    from app.text_parser import _protect_tech_terms
+
+    text = "Rust on the old bridge: a swift react to the Go signal, then Java coffee."
+    assert _protect_tech_terms(text) == (text, {})
+
+
+def test_build_tech_term_pattern_from_large_dictionary(tmp_path):
+    from app.text_parser import _protect_tech_terms, build_tech_term_pattern, load_tech_terms
+
+    terms_file = tmp_path / "terms.txt"
+    terms_file.write_text(
+        "# продукты\nC++\n.NET  # платформа\n\n"
+        + "\n".join(f"Product{i}" for i in range(500)),
+        encoding="utf-8",
+    )
+    terms = load_tech_terms(str(terms_file))
+    assert terms[:2] == ["C++", ".NET"]
+    assert len(terms) == 502
+
+    pattern = build_tech_term_pattern(terms)
+    protected, placeholders = _protect_tech_terms("Use C++ and .NET with product42 and Product4", pattern)
+
+    assert list(placeholders.values()) == ["C++", ".NET", "product42", "Product4"]
+    assert "Use __TECH_TERM_0__ and" in protected
+
+    empty = build_tech_term_pattern(["", "  "])
+    assert _protect_tech_terms("Python", empty) == ("Python", {})
+
+
 def test_translate_to_ru_keeps_tech_terms(monkeypatch):
     """
     Проверяет, что Python/API/CVE/Zero-Day остаются неизменными,
@@ -302,7 +398,7 @@ def test_translate_to_ru_keeps_tech_terms(monkeypatch):
             # имитируем перевод: все остальное переводим в «ТЕКСТ»
             return text.replace("something", "что-то")
 
-    monkeypatch.setattr(tp, "GoogleTranslator", FakeTranslator)
+    monkeypatch.setattr(tr, "GoogleTranslator", FakeTranslator)
 
     result = tp.translate_to_ru("Python API CVE Zero-Day something")
 
@@ -314,3 +410,285 @@ def test_translate_to_ru_keeps_tech_terms(monkeypatch):
 
     # А остальной текст переведён
     assert "что-то" in result
+
+
+# --- лёгкие AMP/print-версии страниц ---
+
+
+AMP_PAGE = """
+<html>
+  <head>
+    <title>Heavy</title>
+    <link rel="amphtml" href="/2025/post/amp/">
+  </head>
+  <body><p>Heavy body</p>{padding}</body>
+</html>
+""".replace("{padding}", "<div>" + "x" * 5000 + "</div>")
+
+LIGHT_PAGE = "<html><head><title>Light</title></head><body><p>Light body</p></body></html>"
+
+
+def light_page(canonical: str, text: str = "Light body") -> str:
+    """Лёгкая версия, указывающая canonical на свою статью."""
+    return (
+        f'<html><head><title>Light</title><link rel="canonical" href="{canonical}"></head>'
+        f"<body><p>{text}</p></body></html>"
+    )
+
+
+def test_find_light_variant_url_amp_print_and_none():
+    amp = tp.find_light_variant_url(AMP_PAGE, "https://site.com/2025/post/")
+    assert amp == "https://site.com/2025/post/amp/"
+
+    print_html = (
+        '<html><head><link rel="alternate" media="print" href="https://site.com/print/2025/post">'
+        "</head><body></body></html>"
+    )
+    assert tp.find_light_variant_url(print_html, "https://site.com/2025/post") == (
+        "https://site.com/print/2025/post"
+    )
+
+    assert tp.find_light_variant_url("<p>no head</p>", "https://site.com/x") is None
+
+
+def test_variant_template_suffix_host_swap_and_unknown():
+    tpl = tp._variant_template("https://site.com/2025/post/", "https://site.com/2025/post/amp/")
+    assert tpl == "https://site.com{path}/amp/"
+    assert tp._apply_variant_template(tpl, "https://site.com/2025/other") == (
+        "https://site.com/2025/other/amp/"
+    )
+
+    tpl = tp._variant_template("https://site.com/2025/post", "https://amp.site.com/2025/post?print=1")
+    assert tpl == "https://amp.site.com{path}?print=1"
+    assert tp._apply_variant_template(tpl, "https://site.com/2025/next/") == (
+        "https://amp.site.com/2025/next?print=1"
+    )
+
+    tpl = tp._variant_template("https://site.com/2025/post", "https://amp.site.com/2025/post/amp")
+    assert tpl == "https://amp.site.com{path}/amp"
+
+    assert tp._variant_template("https://site.com/a", "https://other.com/b") is None
+
+
+def test_variant_template_keeps_each_articles_query():
+    # query первой статьи в шаблон не попадает — только постоянный суффикс
+    tpl = tp._variant_template(
+        "https://x.com/story.php?id=5", "https://m.x.com/story.php?id=5&amp=1"
+    )
+    assert tpl == "https://m.x.com{path}?amp=1"
+    assert tp._apply_variant_template(tpl, "https://x.com/story.php?id=6") == (
+        "https://m.x.com/story.php?id=6&amp=1"
+    )
+    # у статьи без query суффикс не превращается в «?a=1?amp=1»
+    tpl = tp._variant_template("https://x.com/story?a=1", "https://x.com/story/amp?a=1")
+    assert tpl == "https://x.com{path}/amp"
+    assert tp._apply_variant_template(tpl, "https://x.com/next?a=2") == "https://x.com/next/amp?a=2"
+
+    # query лёгкой версии — не «query статьи + суффикс»: шаблону не доверяем
+    assert tp._variant_template("https://x.com/s?id=5", "https://x.com/s?amp=1&id=5") is None
+    assert tp._variant_template("https://x.com/s?id=5", "https://x.com/s?id=6") is None
+
+
+def test_canonical_url_and_same_article():
+    assert tp.canonical_url(light_page("/2025/post"), "https://amp.site.com/2025/post") == (
+        "https://amp.site.com/2025/post"
+    )
+    og = '<html><head><meta property="og:url" content="https://site.com/p"></head></html>'
+    assert tp.canonical_url(og, "https://site.com/p/amp") == "https://site.com/p"
+    assert tp.canonical_url(LIGHT_PAGE, "https://site.com/p") is None
+
+    assert tp._same_article("http://www.Site.com/p/", "https://site.com/p")
+    assert not tp._same_article("https://site.com/p?id=5", "https://site.com/p?id=6")
+
+
+def test_fetch_text_content_learns_light_variant(monkeypatch):
+    pages = {
+        "https://site.com/2025/post": AMP_PAGE.replace("/2025/post/amp/", "/2025/post/amp"),
+        "https://site.com/2025/post/amp": light_page("https://site.com/2025/post"),
+    }
+    monkeypatch.setattr(tp, "_download_with_retry", lambda url, timeout=10: pages[url])
+
+    variants = tp.PageVariants()
+    content = tp.fetch_text_content("https://site.com/2025/post", variants=variants)
+
+    assert "Light body" in content
+    assert variants.learned["site.com"][0] == "https://site.com{path}/amp"
+    assert variants.learned["site.com"][1] > 1
+    assert variants.bytes_downloaded > len(LIGHT_PAGE)
+
+
+def test_fetch_text_content_uses_known_light_variant(monkeypatch):
+    calls = []
+
+    def fake_download(url, timeout=10):
+        calls.append(url)
+        return light_page("https://site.com/2025/next")
+
+    monkeypatch.setattr(tp, "_download_with_retry", fake_download)
+
+    variants = tp.PageVariants(templates={"site.com": ("https://site.com{path}/amp", 4.0)})
+    content = tp.fetch_text_content("https://site.com/2025/next", variants=variants)
+
+    assert calls == ["https://site.com/2025/next/amp"]
+    assert "Light body" in content
+    light_size = len(light_page("https://site.com/2025/next"))
+    assert variants.bytes_saved == light_size * 3
+    assert variants.learned == {}
+
+
+def test_light_variant_per_article_query(monkeypatch):
+    """Две статьи хоста отличаются только query — каждая получает свою лёгкую версию."""
+    def full_page(story_id):
+        return AMP_PAGE.replace(
+            'href="/2025/post/amp/"', f'href="https://m.x.com/story.php?id={story_id}&amp;amp=1"'
+        )
+
+    pages = {
+        "https://x.com/story.php?id=5": full_page(5),
+        "https://m.x.com/story.php?id=5&amp=1": light_page(
+            "https://x.com/story.php?id=5", "Story five"
+        ),
+        "https://m.x.com/story.php?id=6&amp=1": light_page(
+            "https://x.com/story.php?id=6", "Story six"
+        ),
+    }
+    calls = []
+
+    def fake_download(url, timeout=10):
+        calls.append(url)
+        return pages[url]
+
+    monkeypatch.setattr(tp, "_download_with_retry", fake_download)
+    variants = tp.PageVariants()
+
+    assert "Story five" in tp.fetch_text_content("https://x.com/story.php?id=5", variants=variants)
+    assert "Story six" in tp.fetch_text_content("https://x.com/story.php?id=6", variants=variants)
+    assert calls[-1] == "https://m.x.com/story.php?id=6&amp=1"
+
+
+def test_fetch_text_content_known_variant_failure_falls_back(monkeypatch):
+    warnings = []
+
+    def fake_download(url, timeout=10):
+        if url.endswith("/amp"):
+            raise RuntimeError("gone")
+        return "<html><body><p>Full body</p></body></html>"
+
+    monkeypatch.setattr(tp, "_download_with_retry", fake_download)
+    monkeypatch.setattr(tp, "log_warning", warnings.append)
+
+    variants = tp.PageVariants(templates={"site.com": ("https://site.com{path}/amp", 4.0)})
+    content = tp.fetch_text_content("https://site.com/2025/next", variants=variants)
+
+    assert "Full body" in content
+    assert "site.com" not in variants.templates
+    assert variants.invalidated == {"site.com"}
+    assert warnings
+
+
+def test_known_variant_pointing_to_other_article_is_dropped(monkeypatch):
+    warnings = []
+    pages = {
+        # выученный шаблон отдаёт чужую статью
+        "https://site.com/2025/next/amp": light_page("https://site.com/2025/first"),
+        "https://site.com/2025/next": "<html><body><p>Full body</p></body></html>",
+    }
+    monkeypatch.setattr(tp, "_download_with_retry", lambda url, timeout=10: pages[url])
+    monkeypatch.setattr(tp, "log_warning", warnings.append)
+
+    variants = tp.PageVariants(templates={"site.com": ("https://site.com{path}/amp", 4.0)})
+    assert "Full body" in tp.fetch_text_content("https://site.com/2025/next", variants=variants)
+    assert variants.invalidated == {"site.com"}
+    assert "не https://site.com/2025/next" in warnings[0]
+
+    # заново выученный шаблон снимает отметку
+    variants.learn("site.com", "https://site.com{path}/amp", 2.0)
+    assert variants.invalidated == set()
+
+
+def test_fetch_text_content_ignores_heavy_or_broken_variants(monkeypatch):
+    full = AMP_PAGE.replace("/2025/post/amp/", "/2025/post/amp")
+
+    # лёгкая версия оказалась не легче полной
+    pages = {"https://site.com/2025/post": full, "https://site.com/2025/post/amp": full}
+    monkeypatch.setattr(tp, "_download_with_retry", lambda url, timeout=10: pages[url])
+    variants = tp.PageVariants()
+    assert "Heavy body" in tp.fetch_text_content("https://site.com/2025/post", variants=variants)
+    assert variants.learned == {}
+
+    # лёгкая версия без canonical на статью — ей не доверяем
+    pages = {"https://site.com/2025/post": full, "https://site.com/2025/post/amp": LIGHT_PAGE}
+    monkeypatch.setattr(tp, "_download_with_retry", lambda url, timeout=10: pages[url])
+    variants = tp.PageVariants()
+    assert "Heavy body" in tp.fetch_text_content("https://site.com/2025/post", variants=variants)
+    assert variants.learned == {}
+
+    # лёгкая версия не скачалась
+    def failing_variant(url, timeout=10):
+        if url.endswith("/amp"):
+            raise RuntimeError("boom")
+        return full
+
+    monkeypatch.setattr(tp, "_download_with_retry", failing_variant)
+    variants = tp.PageVariants()
+    assert "Heavy body" in tp.fetch_text_content("https://site.com/2025/post", variants=variants)
+    assert variants.learned == {}
+
+    # ссылки на лёгкую версию нет вовсе
+    monkeypatch.setattr(tp, "_download_with_retry", lambda url, timeout=10: LIGHT_PAGE)
+    variants = tp.PageVariants()
+    assert "Light body" in tp.fetch_text_content("https://site.com/2025/post", variants=variants)
+    assert variants.bytes_downloaded == len(LIGHT_PAGE)
+
+
+# --- метаданные из <head> ---
+
+
+def test_extract_head_metadata_og_tags():
+    html = """
+    <html><head>
+      <title>Fallback title</title>
+      <meta property="og:title" content="OG title">
+      <meta name="description" content="Meta description">
+      <meta property="article:published_time" content="2025-03-01T10:00:00Z">
+    </head><body><p>Body is not parsed</p></body></html>
+    """
+    meta = tp.extract_head_metadata(html)
+
+    assert meta.title == "OG title"
+    assert meta.summary == "Meta description"
+    assert meta.published_at == "2025-03-01T10:00:00Z"
+    assert meta.is_complete
+
+
+def test_extract_head_metadata_jsonld_fallback():
+    html = """
+    <html><head>
+      <script type="application/ld+json">not json</script>
+      <script type="application/ld+json">
+        {"@graph": [{"@type": "WebSite", "name": "Site"},
+                    {"@type": ["NewsArticle"], "headline": "LD headline",
+                     "description": "LD description", "datePublished": "2025-04-02",
+                     "author": {"@type": "Person"}}]}
+      </script>
+    </head><body></body></html>
+    """
+    meta = tp.extract_head_metadata(html)
+
+    assert meta.title == "LD headline"
+    assert meta.summary == "LD description"
+    assert meta.published_at == "2025-04-02"
+
+
+def test_extract_head_metadata_title_only_and_empty():
+    meta = tp.extract_head_metadata(
+        '<html><head><title> Plain title </title>'
+        '<script type="application/ld+json">[{"@type": "Article", "headline": 42}]</script>'
+        "</head></html>"
+    )
+    assert meta.title == "Plain title"
+    assert meta.summary is None
+    assert not meta.is_complete
+
+    empty = tp.extract_head_metadata("<html><head></head><body>text</body></html>")
+    assert empty == tp.PageMetadata()
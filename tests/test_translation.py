@@ -0,0 +1,600 @@
+# tests/test_translation.py
+import pytest
+
+from app import text_parser as tp
+from app import translation as tr
+from app.db import init_db
+from app.translation import (
+    CircuitBreaker,
+    LanguageFilter,
+    LatencyHistogram,
+    OfflineBackend,
+    TokenBucket,
+    TranslationCache,
+    TranslationEngine,
+    TranslationMemory,
+    TranslationUnavailable,
+    _denormalize_placeholders,
+    _normalize_placeholders,
+    chunk_text,
+    detect_language,
+    join_segments,
+    split_segments,
+    text_hash,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "news.db")
+    init_db(path)
+    return path
+
+
+class CountingTranslator:
+    calls = []
+
+    def __init__(self, source="auto", target="ru"):
+        pass
+
+    def translate(self, text: str) -> str:
+        CountingTranslator.calls.append(text)
+        return f"RU[{text}]"
+
+
+@pytest.fixture
+def counting_translator(monkeypatch):
+    CountingTranslator.calls = []
+    monkeypatch.setattr(tr, "GoogleTranslator", CountingTranslator)
+    return CountingTranslator
+
+
+def test_text_hash_is_stable_sha256():
+    assert text_hash("abc") == text_hash("abc")
+    assert text_hash("abc") != text_hash("abd")
+    assert len(text_hash("abc")) == 64
+
+
+def test_cache_get_put_and_stats(db_path):
+    cache = TranslationCache(db_path)
+
+    assert cache.get("hello", "ru") is None
+    cache.put("hello", "ru", "привет")
+
+    assert cache.get("hello", "ru") == "привет"
+    assert cache.get("hello", "en") is None
+
+    assert cache.hits == 1
+    assert cache.misses == 2
+    assert cache.saved_chars == len("hello")
+    assert cache.hit_rate == pytest.approx(1 / 3)
+    assert "попаданий 1 из 3 (33%)" in cache.stats_message()
+    assert "сэкономлено 5 символов" in cache.stats_message()
+
+
+def test_cache_hit_rate_without_lookups(db_path):
+    from app.db import get_cached_translations
+
+    assert TranslationCache(db_path).hit_rate == 0.0
+    assert get_cached_translations(db_path, [], "ru") == {}
+
+
+def test_cache_evicts_least_recently_used(db_path, monkeypatch):
+    from app import db as db_module
+
+    clock = iter(range(100))
+    monkeypatch.setattr(db_module.time, "time", lambda: next(clock))
+
+    cache = TranslationCache(db_path, max_entries=2)
+    cache.put("a", "ru", "A")
+    cache.put("b", "ru", "B")
+    assert cache.get("a", "ru") == "A"  # "a" теперь свежее, чем "b"
+
+    cache.put("c", "ru", "C")
+
+    assert cache.get("b", "ru") is None
+    assert cache.get("a", "ru") == "A"
+    assert cache.get("c", "ru") == "C"
+
+
+def test_translate_to_ru_uses_cache_on_rerun(db_path, counting_translator):
+    cache = TranslationCache(db_path)
+
+    first = tp.translate_to_ru(
+        "Python release notes", engine=TranslationEngine(tr.GoogleBackend(), cache=cache)
+    )
+    second = tp.translate_to_ru(
+        "Python release notes",
+        engine=TranslationEngine(tr.GoogleBackend(), cache=TranslationCache(db_path)),
+    )
+
+    assert first == second == "RU[Python release notes]"
+    assert len(counting_translator.calls) == 1
+    # в кэше лежит перевод текста с плейсхолдерами, а не с терминами
+    assert "__TECH_TERM_0__" in counting_translator.calls[0]
+
+
+def test_translate_to_ru_failure_is_not_cached(db_path, monkeypatch):
+    class FailingTranslator:
+        def __init__(self, source="auto", target="ru"):
+            pass
+
+        def translate(self, text):
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(tr, "GoogleTranslator", FailingTranslator)
+    cache = TranslationCache(db_path)
+
+    engine = TranslationEngine(tr.GoogleBackend(), cache=cache)
+    assert tp.translate_to_ru("hello", engine=engine) == "hello"
+    assert cache.get("hello", "ru") is None
+
+
+def test_offline_backend_does_not_poison_cache(db_path, counting_translator):
+    offline = TranslationEngine(OfflineBackend(str.upper), cache=TranslationCache(db_path))
+    assert offline.translate("hello") == "HELLO"
+
+    identity = TranslationEngine(OfflineBackend(), cache=TranslationCache(db_path))
+    assert identity.translate("world") == "world"
+
+    google = TranslationEngine(tr.GoogleBackend(), cache=TranslationCache(db_path))
+    assert google.translate("hello") == "RU[hello]"
+    assert google.translate("world") == "RU[world]"
+    assert counting_translator.calls == ["hello", "world"]
+
+
+# --- память переводов по сегментам ---
+
+
+def test_split_and_join_segments_roundtrip():
+    text = "First sentence. Second one!\n\nThird line\n  Fourth?  Fifth"
+    segments, separators = split_segments(text)
+
+    assert segments == ["First sentence.", "Second one!", "Third line", "Fourth?", "Fifth"]
+    assert join_segments(segments, separators) == text
+
+
+def test_placeholder_normalization_roundtrip():
+    normalized, originals = _normalize_placeholders("Use __TECH_TERM_5__ with __TECH_TERM_7__")
+
+    assert normalized == "Use __TECH_TERM_0__ with __TECH_TERM_1__"
+    assert originals == ["5", "7"]
+    assert _denormalize_placeholders("С __TECH_TERM_1__ и __TECH_TERM_0__", originals) == (
+        "С __TECH_TERM_7__ и __TECH_TERM_5__"
+    )
+    # неизвестный номер (переводчик что-то выдумал) оставляем как есть
+    assert _denormalize_placeholders("__TECH_TERM_9__", originals) == "__TECH_TERM_9__"
+
+
+def test_memory_translates_only_unseen_segments(db_path):
+    batches = []
+
+    def fake_batch(segments):
+        batches.append(list(segments))
+        return [f"RU[{s}]" for s in segments]
+
+    memory = TranslationMemory(db_path)
+    footer = "Share this article. Subscribe to our newsletter."
+
+    first = memory.translate(f"Story one. {footer}", "ru", fake_batch)
+    assert first == "RU[Story one.] RU[Share this article.] RU[Subscribe to our newsletter.]"
+    assert batches == [["Story one.", "Share this article.", "Subscribe to our newsletter."]]
+
+    # другая статья того же источника: в переводчик уходит только новое предложение
+    second = TranslationMemory(db_path).translate(f"Story two.\n{footer}", "ru", fake_batch)
+    assert second == "RU[Story two.]\nRU[Share this article.] RU[Subscribe to our newsletter.]"
+    assert batches[1] == ["Story two."]
+
+    # всё уже в памяти — переводчик не вызывается
+    memory.translate(footer, "ru", fake_batch)
+    assert len(batches) == 2
+    assert memory.segments_hit == 2
+    assert memory.saved_chars == len("Share this article.") + len("Subscribe to our newsletter.")
+    assert "найдено 2 из 5 сегментов" in memory.stats_message()
+
+
+def test_memory_shares_segments_with_different_placeholders(db_path):
+    def fake_batch(segments):
+        return [s.replace("Update", "Обновите") for s in segments]
+
+    memory = TranslationMemory(db_path)
+    memory.translate("Update __TECH_TERM_0__ now.", "ru", fake_batch)
+
+    result = memory.translate(
+        "Intro.  Update __TECH_TERM_3__ now.  ",
+        "ru",
+        lambda segments: [f"RU[{s}]" for s in segments],
+    )
+    assert result == "RU[Intro.]  Обновите __TECH_TERM_3__ now.  "
+
+
+def test_translate_to_ru_with_memory_keeps_tech_terms(db_path, monkeypatch):
+    class LineTranslator(CountingTranslator):
+        def translate(self, text: str) -> str:
+            CountingTranslator.calls.append(text)
+            return "\n".join(f"RU[{line}]" for line in text.split("\n"))
+
+    CountingTranslator.calls = []
+    monkeypatch.setattr(tr, "GoogleTranslator", LineTranslator)
+    memory = TranslationMemory(db_path)
+
+    engine = TranslationEngine(tr.GoogleBackend(), memory=memory)
+    result = tp.translate_to_ru("Python is great. Docker too.", engine=engine)
+
+    assert result == "RU[Python is great.] RU[Docker too.]"
+    # один запрос на все новые сегменты
+    assert CountingTranslator.calls == ["__TECH_TERM_0__ is great.\n__TECH_TERM_0__ too."]
+
+
+def test_memory_does_not_store_segments_passed_through(db_path):
+    from app.db import get_connection
+
+    calls = []
+
+    def upper(text):
+        calls.append(text)
+        return text.upper()
+
+    memory = TranslationMemory(db_path)
+    engine = TranslationEngine(
+        OfflineBackend(upper), memory=memory, language_filter=LanguageFilter("ru")
+    )
+    text = "Release notes are out.\nУже по-русски.\nhttps://example.com/x"
+
+    assert engine.translate(text, "ru") == (
+        "RELEASE NOTES ARE OUT.\nУже по-русски.\nhttps://example.com/x"
+    )
+    with get_connection(db_path) as conn:
+        stored = conn.execute("SELECT translated FROM translation_memory;").fetchall()
+    assert stored == [("RELEASE NOTES ARE OUT.",)]
+
+    # только непереводимые сегменты — в память ничего не пишем
+    assert engine.translate("Только русский текст.", "ru") == "Только русский текст."
+    assert memory.segments_hit == 0 and calls == ["Release notes are out."]
+
+
+def test_translate_segments_falls_back_when_lines_mismatch():
+    calls = []
+
+    def merging(text):
+        calls.append(text)
+        return text.replace("\n", " ").upper()
+
+    engine = TranslationEngine(OfflineBackend(merging))
+
+    assert engine.translate_segments(["one", "two"]) == ["ONE", "TWO"]
+    assert calls == ["one\ntwo", "one", "two"]
+
+
+# --- нарезка под лимит провайдера и параллельный перевод ---
+
+
+def test_chunk_text_respects_limit_and_boundaries():
+    text = "Alpha beta. Gamma delta.\n\nEpsilon zeta eta theta."
+    chunks, separators = chunk_text(text, max_chars=25)
+
+    assert chunks == ["Alpha beta. Gamma delta.", "Epsilon zeta eta theta."]
+    assert separators == ["\n\n"]
+    assert join_segments(chunks, separators) == text
+
+
+def test_chunk_text_splits_oversized_sentence():
+    sentence = "word " * 10 + "x" * 12
+    chunks, separators = chunk_text(sentence, max_chars=10)
+
+    assert all(len(c) <= 10 for c in chunks)
+    assert join_segments(chunks, separators) == sentence
+
+    # текст, начинающийся с разделителя, собирается обратно без потерь
+    chunks, separators = chunk_text("\nTail.", max_chars=10)
+    assert join_segments(chunks, separators) == "\nTail."
+
+
+def test_engine_translates_long_text_in_ordered_concurrent_chunks():
+    calls = []
+
+    def slow_upper(text):
+        calls.append(text)
+        return text.upper()
+
+    engine = TranslationEngine(OfflineBackend(slow_upper), max_chars=30, max_workers=3)
+    text = "First sentence here. Second sentence here.\nThird sentence here. Last."
+
+    assert engine.translate(text) == text.upper()
+    assert len(calls) > 1
+    assert all(len(c) <= 30 for c in calls)
+    assert len(engine.latencies_ms) == 1
+
+
+def test_engine_reuses_one_thread_pool_until_closed():
+    import threading
+
+    threads = set()
+
+    def upper(text):
+        threads.add(threading.current_thread().name)
+        return text.upper()
+
+    engine = TranslationEngine(OfflineBackend(upper), max_chars=10, max_workers=2)
+    text = "First one. Second one. Third one."
+
+    assert engine.translate_text(text) == text.upper()
+    pool = engine._executor
+    assert pool is not None
+    # длинный сегмент режется на куски уже внутри пула — без вложенного пула
+    assert engine.translate_segments(["short", text]) == ["SHORT", text.upper()]
+    assert engine._executor is pool
+    assert threads and all(name.startswith("translation") for name in threads)
+
+    engine.close()
+    assert engine._executor is None
+    engine.close()  # повторно — ничего не делает
+    assert engine.translate_text(text) == text.upper()
+    assert engine._executor is not pool
+    engine.close()
+
+
+def test_engine_keeps_outer_whitespace_and_blank_chunks():
+    engine = TranslationEngine(OfflineBackend(lambda text: f"<{text}>"))
+
+    assert engine.translate_text("  padded  ") == "  <padded>  "
+    assert engine.translate_text("   ") == "   "
+
+
+def test_engine_long_segment_goes_through_chunking():
+    engine = TranslationEngine(OfflineBackend(lambda text: text.upper()), max_chars=10)
+
+    assert engine.translate_segments(["short", "a much longer segment"]) == [
+        "SHORT",
+        "A MUCH LONGER SEGMENT",
+    ]
+
+
+def test_engine_records_latency_even_on_failure():
+    def failing(text):
+        raise RuntimeError("provider down")
+
+    engine = TranslationEngine(OfflineBackend(failing))
+    with pytest.raises(RuntimeError):
+        engine.translate("hello")
+
+    assert len(engine.latencies_ms) == 1
+    assert any(m.startswith("Перевод: 1 текстов") for m in engine.stats_messages())
+    assert TranslationEngine(OfflineBackend(failing)).stats_messages() == []
+
+
+def test_translate_to_ru_translates_text_over_provider_limit(monkeypatch):
+    class LimitedTranslator:
+        def __init__(self, source="auto", target="ru"):
+            pass
+
+        def translate(self, text):
+            if len(text) > 5000:
+                raise RuntimeError("text too long")
+            return text.replace("news", "новости")
+
+    monkeypatch.setattr(tr, "GoogleTranslator", LimitedTranslator)
+
+    text = "Security news of the day. " * 400  # ~10k символов
+    result = tp.translate_to_ru(text)
+
+    assert "news" not in result
+    assert result.count("новости") == 400
+
+
+# --- бэкенды, ограничитель частоты, предохранитель ---
+
+
+def test_google_backend_reuses_translator_per_thread(monkeypatch):
+    created = []
+
+    class FakeTranslator:
+        def __init__(self, source="auto", target="ru"):
+            created.append(target)
+
+        def translate(self, text):
+            return text.upper()
+
+    monkeypatch.setattr(tr, "GoogleTranslator", FakeTranslator)
+
+    backend = tr.GoogleBackend()
+    assert [backend.translate("a"), backend.translate("b")] == ["A", "B"]
+    assert created == ["ru"]
+
+
+def test_translate_to_ru_reuses_default_engine(monkeypatch):
+    created = []
+
+    class FakeTranslator:
+        def __init__(self, source="auto", target="ru"):
+            created.append(target)
+
+        def translate(self, text):
+            return f"RU[{text}]"
+
+    monkeypatch.setattr(tr, "GoogleTranslator", FakeTranslator)
+
+    assert tp.translate_to_ru("first text") == "RU[first text]"
+    assert tp.translate_to_ru("second text") == "RU[second text]"
+    assert tr.default_translation_engine() is tr.default_translation_engine()
+    assert created == ["ru"]  # клиент переводчика создан один раз
+
+
+def test_make_translator_backend():
+    assert isinstance(tr.make_translator_backend("google"), tr.GoogleBackend)
+    offline = tr.make_translator_backend("offline")
+    assert isinstance(offline, OfflineBackend)
+    assert offline.translate("as is") == "as is"
+
+    with pytest.raises(ValueError):
+        tr.make_translator_backend("yandex")
+
+
+def test_offline_backend_simulates_delay(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("app.translation.time.sleep", sleeps.append)
+
+    assert OfflineBackend(str.upper, delay=0.2).translate("x") == "X"
+    assert sleeps == [0.2]
+
+
+def test_token_bucket_waits_when_empty():
+    now = [0.0]
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=fake_sleep)
+    for _ in range(3):
+        bucket.acquire()
+
+    # два запроса из «всплеска», третий ждёт 1 / rate
+    assert sleeps == [0.5]
+    assert bucket.waited == 0.5
+
+
+def test_circuit_breaker_opens_and_skips_rest_of_run(monkeypatch):
+    calls = []
+
+    def failing(text):
+        calls.append(text)
+        raise RuntimeError("provider down")
+
+    breaker = CircuitBreaker(max_failures=2)
+    engine = TranslationEngine(OfflineBackend(failing), breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            engine.translate("hello")
+    assert breaker.is_open
+
+    with pytest.raises(TranslationUnavailable):
+        engine.translate("hello")
+    assert len(calls) == 2
+
+    # translate_to_ru при разомкнутом предохранителе сразу отдаёт оригинал
+    assert tp.translate_to_ru("Python news", engine=engine) == "Python news"
+    assert len(calls) == 2
+    assert breaker.skipped == 2
+    assert any("отключён до конца прогона" in m for m in engine.stats_messages())
+
+
+def test_circuit_breaker_resets_on_success():
+    breaker = CircuitBreaker(max_failures=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert not breaker.is_open
+    assert breaker.stats_message() is None
+
+
+def test_engine_uses_rate_limiter_and_records_histogram():
+    acquired = []
+
+    class FakeLimiter:
+        def acquire(self):
+            acquired.append(1)
+
+    engine = TranslationEngine(
+        OfflineBackend(str.upper), rate_limiter=FakeLimiter(), breaker=CircuitBreaker(3)
+    )
+    assert engine.translate("a.\nb.") == "A.\nB."
+    assert acquired == [1]
+    assert engine.histogram.total == 1
+    assert any(m.startswith("Переводчик offline: 1 запросов (≤100 мс: 1)") for m in engine.stats_messages())
+
+
+def test_latency_histogram_buckets():
+    hist = LatencyHistogram("google", bounds=(100, 1000))
+    assert hist.stats_message() is None
+
+    for latency in (50, 100, 101, 5000):
+        hist.record(latency)
+
+    assert hist.counts == [2, 1, 1]
+    assert hist.stats_message() == (
+        "Переводчик google: 4 запросов (≤100 мс: 2, ≤1000 мс: 1, >1000 мс: 1)."
+    )
+
+
+# --- определение языка ---
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Вышел Python 3.13 с экспериментальным JIT", "ru"),
+        ("OpenAI released a new model today", "other"),
+        ("https://nvd.nist.gov/vuln/detail/CVE-2024-3094", None),
+        ("CVE-2024-3094, CVE-2023-4863", None),
+        ("x = f(a[1], b) -> {}; // 42", None),
+        ("__TECH_TERM_0__ 3.13", None),
+        ("", None),
+    ],
+)
+def test_detect_language(text, expected):
+    assert detect_language(text) == expected
+
+
+def test_engine_skips_russian_and_non_linguistic_text():
+    calls = []
+
+    def upper(text):
+        calls.append(text)
+        return text.upper()
+
+    language_filter = LanguageFilter("ru")
+    engine = TranslationEngine(OfflineBackend(upper), language_filter=language_filter)
+
+    assert engine.translate("Уже по-русски.") == "Уже по-русски."
+    assert engine.translate("See CVE-2024-3094") == "SEE CVE-2024-3094"
+    assert engine.translate_segments(["hello", "привет", "https://example.com"]) == [
+        "HELLO",
+        "привет",
+        "https://example.com",
+    ]
+    assert calls == ["See CVE-2024-3094", "hello"]
+    assert language_filter.skipped_target == 2
+    assert language_filter.skipped_non_linguistic == 1
+    assert any(
+        m.startswith("Без перевода: уже на языке «ru» — 2, код/ссылки/CVE — 1")
+        for m in engine.stats_messages()
+    )
+
+
+def test_engine_skips_russian_chunks_of_long_text():
+    calls = []
+
+    def upper(text):
+        calls.append(text)
+        return text.upper()
+
+    engine = TranslationEngine(
+        OfflineBackend(upper), max_chars=30, language_filter=LanguageFilter("ru")
+    )
+    text = "English sentence number one.\nРусское предложение тут.\nAnother english line."
+
+    assert engine.translate(text) == (
+        "ENGLISH SENTENCE NUMBER ONE.\nРусское предложение тут.\nANOTHER ENGLISH LINE."
+    )
+    assert len(calls) == 2
+
+
+def test_language_filter_without_skips_has_no_stats():
+    assert LanguageFilter().stats_message() is None
+
+
+def test_translate_to_ru_leaves_russian_text_untouched(monkeypatch):
+    class ExplodingTranslator:
+        def __init__(self, source="auto", target="ru"):
+            pass
+
+        def translate(self, text):  # pragma: no cover
+            raise AssertionError("переводчик не должен вызываться")
+
+    monkeypatch.setattr(tr, "GoogleTranslator", ExplodingTranslator)
+
+    assert tp.translate_to_ru("Новости Python за неделю") == "Новости Python за неделю"